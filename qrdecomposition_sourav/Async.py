@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the asyncio front end, which runs the decompositions in an executor and coalesces the concurrent requests for the same input"""
+
+
+
+import asyncio
+import weakref
+
+import numpy as np
+
+from . import CustomExceptions
+from .Cache import content_key
+from .Result import qr
+
+
+# for each event loop, the computations in flight: key -> [future, number of waiters]
+inflight = weakref.WeakKeyDictionary()
+
+
+#%%
+
+async def qr_async(matrix, mode='complete', executor=None, timeout=None):
+    """
+    The QR decomposition of QRdecomp.qr(), awaited without blocking the event
+    loop: it runs in an executor, and the requests for a matrix of the same
+    content, shape and mode made while one is being computed wait for that
+    same computation instead of starting another.
+
+    Parameters
+    ----------
+    matrix : array_like
+        A two dimensional array (or anything converted to one by numpy.array)
+        of integers or floats. It is copied, and hashed, in the event loop,
+        so it can be changed as soon as the coroutine is started.
+    mode : {'complete','reduced'} optional
+        As for QRdecomposition.
+    executor : concurrent.futures.Executor or None, optional
+        Where the decomposition runs, the default executor of the event loop
+        (a pool of threads) if None. A ProcessPoolExecutor keeps the Python
+        loop of the Householder transforms off the GIL of the event loop.
+    timeout : float or None, optional
+        The number of seconds to wait for, None for no limit.
+
+    Raises
+    ------
+    'The mode is unrecognized, please choose a valid mode.'
+        If mode not in {'complete','reduced'}.
+
+    'Sorry, we can only work with a two dimensional matrix!'
+        If the input matrix is not two dimensional.
+
+    asyncio.TimeoutError
+        If the timeout is reached, raised rather than printed.
+
+    asyncio.CancelledError
+        If the awaiting task is cancelled.
+
+    In both cases only this request is given up on: the computation goes on
+    for the others waiting for it, and is cancelled, if it hasn't started yet,
+    once nobody waits for it any more.
+
+    Returns
+    -------
+    out : QRResult
+        Q, R and the order of the floating point error. The requests that were
+        coalesced share the same QRResult, whose arrays are then read-only.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import numpy as np
+    >>> from QRdecomp import qr_async
+    >>> A = np.random.rand(1000,1000)
+    >>> async def main():
+    ...     return await asyncio.gather(qr_async(A), qr_async(A.copy()), qr_async(A, 'reduced'))
+    >>> res1, res2, res3 = asyncio.run(main())
+    >>> res1 is res2, res1 is res3
+    (True, False)
+
+    """
+
+    try:
+        if mode not in ['complete','reduced']:
+            raise CustomExceptions.ModeUnrecognized
+
+        matrix = np.array(matrix,dtype='float64')
+        if matrix.ndim != 2:
+            raise CustomExceptions.DimensionError
+
+    except CustomExceptions.ModeUnrecognized:
+        print('The mode is unrecognized, please choose a valid mode.')
+        print()
+        return
+
+    except CustomExceptions.DimensionError:
+        print('Sorry, we can only work with a two dimensional matrix!')
+        print()
+        return
+
+    loop = asyncio.get_running_loop()
+    pending = inflight.setdefault(loop, {})
+    key = content_key(matrix, mode)
+
+    # a computation cancelled by its last waiter may not have been removed yet
+    if key not in pending or pending[key][0].cancelled():
+        future = loop.run_in_executor(executor, qr, matrix, mode)
+        pending[key] = [future, 0]
+        future.add_done_callback(lambda future: finish(pending, key, future))
+
+    entry = pending[key]
+    entry[1] += 1
+    try:
+        # shielded, so that giving up on this request leaves the others be
+        return await asyncio.wait_for(asyncio.shield(entry[0]), timeout)
+
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        entry[1] -= 1
+        if entry[1] == 0:
+            entry[0].cancel()
+        raise
+
+
+
+def finish(pending, key, future):
+    """
+    Removes a finished computation from those in flight, making the arrays of
+    its result read-only if it's shared.
+    """
+
+    if key not in pending or pending[key][0] is not future:
+        return
+
+    waiters = pending.pop(key)[1]
+    if waiters > 1 and not future.cancelled() and future.exception() is None:
+        future.result().Q.flags.writeable = False
+        future.result().R.flags.writeable = False
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the QR decomposition of a stack of matrices in a single vectorized sweep"""
+
+
+
+import numpy as np
+
+from . import CustomExceptions
+from .Householder import s
+
+
+#%%
+
+def batched_QR(matrices, mode='complete'):
+    """
+    Computes the QR decompositions of a stack of matrices of the same shape. The
+    Householder transforms are applied to all the matrices at once, step by step,
+    with no Python loop over the stack.
+
+    Parameters
+    ----------
+    matrices : array_like
+        A three dimensional array (or anything converted to one by numpy.array)
+        of integers or floats, of shape (N, r, c). Each matrices[i] is
+        decomposed independently.
+    mode : {'complete','reduced'} optional
+        As for QRdecomposition.
+
+    Raises
+    ------
+    'The mode is unrecognized, please choose a valid mode.'
+        If mode not in {'complete','reduced'}.
+
+    'Sorry, the batched QR decomposition needs a three dimensional array!'
+        If the input is not three dimensional.
+
+    Returns
+    -------
+    Q : numpy.ndarray
+        The stacked Q matrices, of shape (N, r, r) if mode='complete' and
+        (N, r, min(r,c)) if mode='reduced'.
+    R : numpy.ndarray
+        The stacked R matrices, of shape (N, r, c) if mode='complete' and
+        (N, min(r,c), c) if mode='reduced'.
+    fperror : numpy.ndarray
+        A one dimensional array of length N holding, for each matrix, the order
+        in base 10 of the floating point error in the lower triangular
+        elements of R, as in QRdecomposition.FloatingPointErrorOrder(). The
+        entry is nan when there is no floating point error up to the max
+        precision at 0.
+
+    See Also
+    --------
+    QRdecomp.QRdecomposition: the class for the QR decomposition of a single matrix.
+    numpy.linalg.qr: numpy provided inbuilt function for QR decomposition, which
+                     also accepts stacks of matrices.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import batched_QR
+    >>> A = np.array([[[2,-2,18],[2,1,0],[1,2,0]], [[1,0,0],[0,1,0],[0,0,1]]])
+    >>> Q, R, fperror = batched_QR(A)
+    >>> R
+    array([[[ 3.,  0., 12.],
+            [ 0., -3., 12.],
+            [ 0.,  0.,  6.]],
+
+           [[ 1.,  0.,  0.],
+            [ 0.,  1.,  0.],
+            [ 0.,  0.,  1.]]])
+    >>> fperror
+    array([nan, nan])
+    >>> Q, R, fperror = batched_QR(np.random.rand(100000,6,4), 'reduced')
+    >>> Q.shape, R.shape
+    ((100000, 6, 4), (100000, 4, 4))
+
+    """
+
+    try:
+        if mode not in ['complete','reduced']:
+            raise CustomExceptions.ModeUnrecognized
+
+        R = np.array(matrices,dtype='float64')
+
+        if R.ndim != 3:
+            raise CustomExceptions.DimensionError
+
+    except CustomExceptions.ModeUnrecognized:
+        print('The mode is unrecognized, please choose a valid mode.')
+        print()
+        return
+
+    except CustomExceptions.DimensionError:
+        print('Sorry, the batched QR decomposition needs a three dimensional array!')
+        print()
+        return
+
+    N, r, c = R.shape
+    size = min(r,c)
+    reflectors = []
+
+    for step in range(size):
+        # the same steps as find_u and find_tau, for every matrix in the stack
+        u = R[:,step:,step].copy()
+        norm = np.copysign(np.linalg.norm(u,axis=1),u[:,0])
+        if s == -1:
+            # x1 - sign(x1)*||v|| cancels when v is close to (x1,0,0,...)
+            denominator = u[:,0]+norm
+            u[:,0] = -np.divide(np.einsum('ij,ij->i',u[:,1:],u[:,1:]),denominator,out=np.zeros(N),where=denominator!=0)
+        else:
+            u[:,0] += s*norm
+        inner = np.einsum('ij,ij->i',u,u)
+        tau = np.divide(2.,inner,out=np.zeros(N),where=inner!=0)
+
+        tu = tau[:,np.newaxis]*u
+        Rredu = R[:,step:,step:]
+        Rredu -= tu[:,:,np.newaxis]*np.matmul(u[:,np.newaxis,:],Rredu)
+        reflectors.append((u,tu))
+
+    # Q is accumulated backwards from the first ncols columns of the identity,
+    # so in reduced mode the other columns are never allocated, and each
+    # transform only touches the rows and columns from its step onwards
+    ncols = size if mode=='reduced' else r
+    Q = np.zeros((N,r,ncols))
+    Q[:,np.arange(ncols),np.arange(ncols)] = 1.
+    for step in reversed(range(size)):
+        u, tu = reflectors[step]
+        Qredu = Q[:,step:,step:]
+        Qredu -= tu[:,:,np.newaxis]*np.matmul(u[:,np.newaxis,:],Qredu)
+
+    max_lower_triangle = np.amax(np.abs(np.tril(R,-1)),axis=(1,2),initial=0.)
+    fperror = np.full(N,np.nan)
+    nonzero = max_lower_triangle > 0.
+    fperror[nonzero] = np.floor(np.log10(max_lower_triangle[nonzero]))
+
+    if mode=='reduced':
+        return Q, np.triu(R[:,:size,:]), fperror
+
+    return Q, np.triu(R), fperror
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the process wide cache of decompositions, keyed by the content of the input matrix, with LRU eviction under a memory budget"""
+
+
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'entries', 'nbytes', 'max_bytes'])
+
+_lock = threading.Lock()
+_entries = OrderedDict()        # key -> (state, nbytes), the least recently used first
+_max_bytes = None               # None while the cache is disabled
+_nbytes = 0
+_hits = 0
+_misses = 0
+_evictions = 0
+
+hash_chunk_bytes = 2**20        # the rows of a matrix that isn't C contiguous are hashed this many bytes at a time
+
+
+#%%
+
+def enable_cache(max_bytes=2**30):
+    """
+    Turns on the cache shared by all the QRdecomposition instances of the
+    process. The decomposition of a matrix whose content, shape, dtype and
+    options have been seen before is then taken from the cache instead of
+    being computed again, and so is Q once it has been formed. The arrays
+    shared this way are read-only.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        The memory budget, 1GB by default. The least recently used entries are
+        evicted to stay under it, and a decomposition larger than the whole
+        budget is never cached. Calling enable_cache again changes the budget
+        and keeps the entries that fit.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import QRdecomposition, enable_cache, cache_info
+    >>> enable_cache(10**8)
+    >>> A = np.random.rand(500,50)
+    >>> R1 = QRdecomposition(A).Rmatrix()
+    >>> R2 = QRdecomposition(A.copy()).Rmatrix()
+    >>> R1 is R2
+    True
+    >>> cache_info()
+    CacheInfo(hits=1, misses=1, evictions=0, entries=1, nbytes=400800, max_bytes=100000000)
+
+    """
+
+    global _max_bytes
+
+    with _lock:
+        _max_bytes = int(max_bytes)
+        _evict()
+
+
+
+def disable_cache():
+    """
+    Turns off the cache and drops all its entries. The statistics are kept.
+    """
+
+    global _max_bytes
+
+    with _lock:
+        _max_bytes = None
+        _drop()
+
+
+
+def clear_cache():
+    """
+    Drops all the entries of the cache and resets its statistics, leaving it
+    on or off.
+    """
+
+    global _hits, _misses, _evictions
+
+    with _lock:
+        _drop()
+        _hits = _misses = _evictions = 0
+
+
+
+def cache_info():
+    """
+    Returns the statistics of the cache as a CacheInfo named tuple (hits,
+    misses, evictions, entries, nbytes, max_bytes), max_bytes being None while
+    the cache is disabled.
+    """
+
+    with _lock:
+        return CacheInfo(_hits, _misses, _evictions, len(_entries), _nbytes, _max_bytes)
+
+
+#%%
+
+def enabled():
+    """
+    Whether the cache is on.
+    """
+
+    return _max_bytes is not None
+
+
+
+def content_key(matrix, *options):
+    """
+    The key of a decomposition: a blake2b hash of the bytes of the matrix in
+    row major order, with its shape and dtype and the options the 
+    decomposition depends on. The same matrix has the same key whatever its
+    memory layout.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        The input matrix. A C contiguous one is hashed without a copy, any 
+        other a block of rows at a time, copied to C order, so that no copy 
+        of the whole matrix is made.
+    *options
+        Hashable values, such as the mode and method.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Cache import content_key
+    >>> A = np.random.rand(4,3)
+    >>> content_key(A, 'complete') == content_key(np.asfortranarray(A), 'complete')
+    True
+
+    """
+
+    # blake2b is fed incrementally, so the blocks of rows hash to the same
+    # digest as the whole matrix in C order
+    digest = hashlib.blake2b(digest_size=16)
+    if matrix.flags.c_contiguous:
+        digest.update(matrix)
+    else:
+        rows = max(1,hash_chunk_bytes//max(1,matrix[:1].nbytes))
+        for start in range(0,matrix.shape[0],rows):
+            digest.update(np.ascontiguousarray(matrix[start:start+rows]))
+
+    return (digest.hexdigest(), matrix.shape, matrix.dtype.str) + options
+
+
+
+def lookup(key):
+    """
+    Returns the state stored under key and marks it as the most recently used,
+    or None, counting a hit or a miss.
+    """
+
+    global _hits, _misses
+
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            _hits += 1
+            return _entries[key][0]
+
+        _misses += 1
+
+
+
+def store(key, state):
+    """
+    Stores a dictionary of the state of a decomposition under key, replacing
+    what was there, and evicts the least recently used entries if the budget
+    is exceeded. Its arrays are made read-only.
+    """
+
+    global _nbytes
+
+    size = nbytes(state)
+
+    with _lock:
+        if _max_bytes is None:
+            return
+
+        if key in _entries:
+            _nbytes -= _entries.pop(key)[1]
+
+        if size <= _max_bytes:
+            for value in state.values():
+                if isinstance(value, np.ndarray):
+                    value.flags.writeable = False
+
+            _entries[key] = (state, size)
+            _nbytes += size
+            _evict()
+
+
+#%%
+
+def nbytes(obj, seen=None):
+    """
+    The memory taken by the arrays in obj, which can be an array, a list,
+    tuple or dictionary, or an object with arrays as attributes, such as the
+    Householder transforms in factored form. An array viewed several times is
+    counted once.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Cache import nbytes
+    >>> A = np.ones((10,10))
+    >>> nbytes({'A': A, 'view': A[:5]})
+    800
+
+    """
+
+    if seen is None:
+        seen = set()
+
+    if isinstance(obj, np.ndarray):
+        base = obj
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        if id(base) in seen:
+            return 0
+        seen.add(id(base))
+        return base.nbytes
+
+    if isinstance(obj, dict):
+        return sum(nbytes(value, seen) for value in obj.values())
+
+    if isinstance(obj, (list, tuple)):
+        return sum(nbytes(value, seen) for value in obj)
+
+    if hasattr(obj, '__dict__'):
+        return nbytes(vars(obj), seen)
+
+    return 0
+
+
+
+def _evict():
+    """
+    Drops the least recently used entries until the budget is met, with the
+    lock held.
+    """
+
+    global _nbytes, _evictions
+
+    while _entries and _nbytes > _max_bytes:
+        _nbytes -= _entries.popitem(last=False)[1][1]
+        _evictions += 1
+
+
+
+def _drop():
+    """
+    Drops all the entries, with the lock held.
+    """
+
+    global _nbytes
+
+    _entries.clear()
+    _nbytes = 0
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the CholeskyQR2 decomposition of tall skinny matrices, made of matrix products and Cholesky factorizations of the small Gram matrices"""
+
+
+
+import numpy as np
+
+from .Householder import factor_blocked, Reflectors
+
+
+max_orthogonality_loss = 0.1    # beyond this, after the first pass, the input is too ill-conditioned
+                                # for the second pass to restore the orthogonality of Q
+
+
+#%%
+
+def solve_right(matrix, R, block_size=32, chunk_rows=4096):
+    """
+    Returns matrix.R^-1 for R square upper triangular with no zero on its 
+    diagonal, by forward substitution on the transposed system R^T.X^T = 
+    matrix^T, without forming the inverse of R. The matrix is transposed
+    chunk_rows rows at a time, small enough to stay in cache, and the rows 
+    of each X^T are solved block_size at a time: the rows already solved are
+    taken out of a block with a matrix product, then its rows are substituted
+    one at a time as in QRdecomp.main.back_substitution.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.CholQR import solve_right
+    >>> solve_right(np.array([[2.,5.],[4.,6.]]), np.array([[2.,1.],[0.,4.]]))
+    array([[1., 1.],
+           [2., 1.]])
+
+    """
+
+    out = np.empty(matrix.shape,dtype=R.dtype)
+    for rows in range(0,matrix.shape[0],chunk_rows):
+        Xt = np.array(matrix[rows:rows+chunk_rows].T,dtype=R.dtype,order='C')
+        for start in range(0,R.shape[0],block_size):
+            end = min(start+block_size,R.shape[0])
+            Xt[start:end] -= R[:start,start:end].T@Xt[:start]
+            for i in range(start,end):
+                Xt[i] -= R[start:i,i]@Xt[start:i]
+                Xt[i] /= R[i,i]
+
+        out[rows:rows+chunk_rows] = Xt.T
+
+    return out
+
+
+
+def cholqr(matrix):
+    """
+    One pass of CholeskyQR: the Cholesky factor R of the Gram matrix
+    matrix^T.matrix, and Q = matrix.R^-1 by a triangular solve.
+
+    Raises
+    ------
+    numpy.linalg.LinAlgError
+        If the Gram matrix isn't numerically positive definite.
+
+    """
+
+    R = np.linalg.cholesky(matrix.T@matrix).T
+
+    return solve_right(matrix, R), R
+
+
+
+def cholqr2(matrix):
+    """
+    CholeskyQR2: CholeskyQR twice, the second pass restoring the orthogonality
+    of the Q of the first to the level of the Householder transforms, as long
+    as the input is well conditioned (a condition number up to about the
+    inverse square root of the machine epsilon). Nearly all the work is in the
+    matrix products with the input and with Q, and the triangular solves
+    giving Q, and the input is not copied.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats with at least as many rows as
+        columns. It is not modified.
+
+    Returns
+    -------
+    out : tuple or None
+        Q, of the shape of the input, the square upper triangular R, and the
+        largest departure of the columns of Q from unit norm. None if the input
+        is too ill-conditioned: when the Cholesky factorization of either Gram
+        matrix fails, or when the Q of the first pass is further than
+        max_orthogonality_loss from orthonormal.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.CholQR import cholqr2
+    >>> M = np.random.rand(100000,32)
+    >>> Q, R, err = cholqr2(M)
+    >>> np.allclose(Q@R, M), np.allclose(Q.T@Q, np.eye(32))
+    (True, True)
+    >>> cholqr2(np.ones((1000,2))) is None
+    True
+
+    """
+
+    r, c = matrix.shape
+    if r < c:
+        return None
+
+    try:
+        Q, R1 = cholqr(matrix)
+
+        # the Gram matrix of the second pass tells how far Q is from orthonormal
+        gram = Q.T@Q
+        if np.linalg.norm(gram-np.eye(c),2) > max_orthogonality_loss:
+            return None
+
+        R2 = np.linalg.cholesky(gram).T
+        Q = solve_right(Q, R2)
+
+    except np.linalg.LinAlgError:
+        return None
+
+    return Q, R2@R1, np.amax(np.abs(np.einsum('ij,ij->j',Q,Q)-1.),initial=0.)
+
+
+#%%
+
+class CholeskyQ:
+    """
+    The Q of a CholeskyQR2 decomposition, kept as the explicit r x c matrix of
+    its first c columns, with the same methods as QRdecomp.Householder.Reflectors.
+
+    If complete=False, that's all there is: the matrices Q is applied to are
+    zero after their first c rows, and Q^T.matrix is only computed in its first
+    c rows, the others being set to zero, which is all a reduced decomposition
+    needs. If complete=True, the r-c other columns are those of the Householder
+    transforms of the c columns, computed the first time they're needed.
+
+    Parameters
+    ----------
+    Q : numpy.ndarray
+        A two dimensional array of floats with orthonormal columns.
+    complete : bool, optional
+        Whether Q stands for the complete square Q. False by default.
+
+    """
+
+    def __init__(self, Q, complete=False):
+        self.Q = Q
+        self.complete = complete
+        self.reflectors = None
+        self.signs = None
+
+
+    def householder(self):
+        """
+        Computes once the Householder transforms of Q, Q = H.[D; 0] with D
+        diagonal of +-1, so that the complete Q is H.diag(D, I).
+        """
+
+        if self.reflectors is None:
+            V = np.array(self.Q,order='F')
+            tau, T, max_lower_triangle = factor_blocked(V, 32)
+            self.signs = np.sign(V.diagonal()).reshape(-1,1)
+            self.reflectors = Reflectors(V, tau, 32, T, unit=True)
+
+
+    def apply(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with r rows, with Q.matrix
+        and returns it.
+        """
+
+        c = self.Q.shape[1]
+        if not self.complete or not np.any(matrix[c:]):
+            matrix[...] = self.Q@matrix[:c]
+            return matrix
+
+        self.householder()
+        matrix[:c] *= self.signs
+
+        return self.reflectors.apply(matrix)
+
+
+    def form(self, ncols, order='C'):
+        """
+        Returns the first ncols columns of Q, in C or Fortran order.
+        """
+
+        c = self.Q.shape[1]
+        if ncols <= c:
+            return self.Q[:,:ncols].copy(order=order)
+
+        self.householder()
+        out = self.reflectors.form(ncols, order)
+        out[:,:c] = self.Q
+
+        return out
+
+
+    def apply_transpose(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with r rows, with
+        Q^T.matrix and returns it.
+        """
+
+        c = self.Q.shape[1]
+        if not self.complete:
+            matrix[:c] = self.Q.T@matrix
+            matrix[c:] = 0.
+            return matrix
+
+        self.householder()
+        self.reflectors.apply_transpose(matrix)
+        matrix[:c] *= self.signs
+
+        return matrix
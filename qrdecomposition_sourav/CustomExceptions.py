@@ -21,4 +21,78 @@ class CallQR(Exception):
     """to throw when the method QR() needs to be called first"""
     pass
 
+class MethodUnrecognized(Exception):
+    """to throw when the method is not recognized"""
+    pass
+
+class BlockSizeInvalid(Exception):
+    """to throw when the block size is not a positive integer"""
+    pass
+
+class ShapeMismatch(Exception):
+    """to throw when the shape of an input doesn't match the factorization"""
+    pass
+
+class NotSquare(Exception):
+    """to throw when a square matrix is needed"""
+    pass
+
+class Underdetermined(Exception):
+    """to throw when the input matrix has more columns than rows"""
+    pass
+
+class Singular(Exception):
+    """to throw when R has a zero on its diagonal"""
+    pass
+
+class WorkersInvalid(Exception):
+    """to throw when the number of workers is not a positive integer"""
+    pass
+
+class NoRHS(Exception):
+    """to throw when solving without a right hand side"""
+    pass
+
+class IndexOutOfRange(Exception):
+    """to throw when a row or column index is out of range"""
+    pass
+
+class PivotingUnsupported(Exception):
+    """to throw when a feature is not available with column pivoting"""
+    pass
+
+class StorageUnrecognized(Exception):
+    """to throw when the storage format is not in the list"""
+    pass
+
+class BandInvalid(Exception):
+    """to throw when the band storage doesn't match the bandwidths"""
+    pass
+
+class DtypeUnsupported(Exception):
+    """to throw when the working precision is neither float32 nor float64"""
+    pass
+
+class InputOverwritten(Exception):
+    """to throw when the input matrix is needed after overwrite_a=True destroyed it"""
+    pass
 
+class OrderUnrecognized(Exception):
+    """to throw when the memory layout is neither 'C' nor 'F'"""
+    pass
+
+class FormatUnsupported(Exception):
+    """to throw when a saved decomposition is of an unknown format version"""
+    pass
+
+class InputUnavailable(Exception):
+    """to throw when a loaded decomposition is asked for its input matrix"""
+    pass
+
+class RankInvalid(Exception):
+    """to throw when the rank of a low rank approximation is out of range"""
+    pass
+
+class SketchInvalid(Exception):
+    """to throw when the oversampling, power iterations or sketch of a randomized decomposition are invalid"""
+    pass
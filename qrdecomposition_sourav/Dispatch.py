@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for method='auto', the rules picking the fastest backend for a matrix from its size, dtype and structure, and their calibration on the host"""
+
+
+
+import copy
+import time
+
+import numpy as np
+
+
+backends = ['householder', 'blocked', 'lapack']
+banded_backends = ['givens', 'lapack']
+
+# dtype -> structure -> [max_elements, backend] in increasing order, the last
+# one with max_elements None. Timed on a single core with OpenBLAS, where
+# LAPACK's geqrf is the fastest on all the dense matrices, and the Givens
+# rotations catch up with it on Hessenberg matrices once they're large 
+# enough for the O(n^2) to beat the O(n^3).
+rules = {'float64': {'dense': [[None, 'lapack']],
+                     'banded': [[256**2, 'lapack'], [None, 'givens']]},
+         'float32': {'dense': [[None, 'lapack']],
+                     'banded': [[256**2, 'lapack'], [None, 'givens']]}}
+
+
+#%%
+
+def select(shape, dtype, banded=False, pivoting=False):
+    """
+    Returns the backend the rules pick for a matrix of the given shape and
+    dtype, banded (or upper Hessenberg) or not: 'householder', 'blocked', 
+    'givens' or 'lapack'. Column pivoting is only done by 'householder'.
+    """
+
+    if pivoting:
+        return 'householder'
+
+    size = shape[0]*shape[1]
+    for max_size, backend in rules[np.dtype(dtype).name]['banded' if banded else 'dense']:
+        if max_size is None or size <= max_size:
+            return backend
+
+
+
+def set_backend_rules(new_rules):
+    """
+    Replaces the rules of method='auto' for the whole process, for instance
+    with those returned by an earlier calibrate_backends(), saved as JSON.
+
+    Parameters
+    ----------
+    new_rules : dict
+        For each of 'float64' and 'float32', for each of 'dense' and 'banded',
+        a list of pairs [max_elements, backend] in increasing order of
+        max_elements, the last one None: a matrix of r*c elements is factored
+        by the backend of the first pair with r*c <= max_elements.
+
+    """
+
+    rules.clear()
+    rules.update(copy.deepcopy(new_rules))
+
+
+
+def calibrate_backends(sizes=(8, 32, 128, 512), repeats=3, dtypes=('float64', 'float32')):
+    """
+    Times the backends of method='auto' on this host, on square matrices of
+    each of the given dimensions, dense ones and upper Hessenberg ones, and
+    makes the fastest at each dimension the rule up to it, for the whole
+    process. The fastest at the largest dimension is kept for all the larger
+    matrices. The decompositions include forming Q.
+
+    Parameters
+    ----------
+    sizes : sequence of int, optional
+        The dimensions of the matrices timed, in increasing order.
+    repeats : int, optional
+        The number of times each decomposition is timed, the best time counts.
+    dtypes : sequence of str, optional
+        The dtypes calibrated, the others keep their rules.
+
+    Returns
+    -------
+    out : dict
+        The new rules, as taken by set_backend_rules.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import QRdecomposition, calibrate_backends
+    >>> rules = calibrate_backends(sizes=(8, 64, 256))
+    >>> rules['float64']['dense']
+    [[None, 'lapack']]
+    >>> QRdecomposition(np.random.rand(100,100), method='auto').backend()
+    'lapack'
+
+    """
+
+    from .main import QRdecomposition      # main picks its backends from here
+
+    rng = np.random.default_rng(0)
+    new_rules = copy.deepcopy(rules)
+    for dtype in dtypes:
+        new_rules[dtype] = {}
+        for structure, candidates in [('dense', backends), ('banded', banded_backends)]:
+            table = []
+            for n in sizes:
+                A = rng.random((n,n)).astype(dtype)
+                if structure=='banded':
+                    A = np.triu(A,-1)
+
+                def best(method):
+                    times = []
+                    for _ in range(repeats):
+                        # a fresh copy each time, factored in place so the cache never answers
+                        B = np.array(A,order='F')
+                        start = time.perf_counter()
+                        QRdecomposition(B, method=method, dtype=dtype, overwrite_a=True).QR()
+                        times.append(time.perf_counter()-start)
+                    return min(times)
+
+                fastest = min(candidates, key=best)
+                if table and table[-1][1]==fastest:
+                    table[-1][0] = n*n
+                else:
+                    table.append([n*n, fastest])
+
+            table[-1][0] = None
+            new_rules[dtype][structure] = table
+
+    set_backend_rules(new_rules)
+
+    return copy.deepcopy(new_rules)
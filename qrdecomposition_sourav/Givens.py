@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the Givens rotations, which zero one element at a time by mixing two rows"""
+
+
+
+import numpy as np
+
+
+max_band_fraction = 0.125       # inputs whose lower bandwidth is at most this fraction of min(r,c)
+                                # (or 1, ie upper Hessenberg) follow the banded rules of method='auto'
+
+#%%
+
+def givens(a, b):
+    """
+    Returns the cosine and sine of the Givens rotation taking (a,b) to (r,0).
+
+    Parameters
+    ----------
+    a : float
+        The element that is kept.
+    b : float
+        The element to be zeroed.
+
+    Returns
+    -------
+    c, s : float
+        Such that [[c, s],[-s, c]].[a, b] = [r, 0] with r = sqrt(a^2 + b^2).
+        If b is already 0. the rotation is the identity.
+
+    Examples
+    --------
+    >>> from QRdecomp.Givens import givens
+    >>> givens(3., 4.)
+    (0.6, 0.8)
+    >>> givens(3., 0.)
+    (1.0, 0.0)
+
+    """
+
+    if b == 0.:
+        return 1., 0.
+
+    r = np.hypot(a,b)
+
+    return a/r, b/r
+
+
+#%%
+
+def rotate_rows(matrix, i, j, c, s):
+    """
+    Applies the Givens rotation [[c, s],[-s, c]] to the rows i and j of a matrix,
+    in place.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one).
+    i, j : int
+        The rows that are mixed.
+    c, s : float
+        The cosine and sine returned by givens.
+
+    Returns
+    -------
+    matrix : numpy.ndarray
+        The input matrix with its rows i and j rotated.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Givens import givens, rotate_rows
+    >>> M = np.array([[3.,1.],[4.,2.]])
+    >>> rotate_rows(M, 0, 1, *givens(3., 4.))
+    array([[ 5. ,  2.2],
+           [ 0. ,  0.4]])
+
+    """
+
+    row_i = matrix[i].copy()
+    matrix[i] = c*row_i + s*matrix[j]
+    matrix[j] = c*matrix[j] - s*row_i
+
+    return matrix
+
+
+#%%
+
+def rotate_cols(matrix, i, j, c, s):
+    """
+    Multiplies a matrix from the right by the transpose of the Givens rotation
+    [[c, s],[-s, c]] acting on the columns i and j, in place. If the rows i and
+    j of R are rotated with rotate_rows, rotating the columns i and j of Q with
+    the same c, s leaves the product Q.R unchanged.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one).
+    i, j : int
+        The columns that are mixed.
+    c, s : float
+        The cosine and sine returned by givens.
+
+    Returns
+    -------
+    matrix : numpy.ndarray
+        The input matrix with its columns i and j rotated.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Givens import rotate_cols
+    >>> rotate_cols(np.eye(2), 0, 1, 0.6, 0.8)
+    array([[ 0.6, -0.8],
+           [ 0.8,  0.6]])
+
+    """
+
+    col_i = matrix[:,i].copy()
+    matrix[:,i] = c*col_i + s*matrix[:,j]
+    matrix[:,j] = c*matrix[:,j] - s*col_i
+
+    return matrix
+
+
+#%%
+
+def bandwidths(matrix):
+    """
+    Returns the lower and upper bandwidths of a matrix, ie the number of its 
+    nonzero diagonals below and above the main diagonal.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats.
+
+    Returns
+    -------
+    lower, upper : int
+        The largest i-j and j-i over the nonzero elements matrix[i,j], 0 for a
+        matrix of zeros. The lower bandwidth is 0 for an upper triangular 
+        matrix and 1 for an upper Hessenberg one.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Givens import bandwidths
+    >>> bandwidths(np.triu(np.ones((5,5)),-1))
+    (1, 4)
+    >>> bandwidths(np.eye(4) + np.eye(4,k=-2))
+    (2, 0)
+
+    """
+
+    nonzero = matrix != 0.
+    occupied = np.any(nonzero,axis=0)
+    if not np.any(occupied):
+        return 0, 0
+
+    # the first and last nonzero rows in every column
+    r, c = matrix.shape
+    columns = np.arange(c)[occupied]
+    first = np.argmax(nonzero,axis=0)[occupied]
+    last = r-1 - np.argmax(nonzero[::-1],axis=0)[occupied]
+
+    return int(max(np.amax(last-columns),0)), int(max(np.amax(columns-first),0))
+
+
+#%%
+
+class Rotations:
+    """
+    The factored form Q = G_1^T.G_2^T...G_m^T of an orthonormal matrix, where 
+    G_k is the Givens rotation of the rows first[k] and second[k]. Only the row 
+    indices, cosines and sines are stored, 4 numbers per rotation. It has the 
+    same methods as QRdecomp.Householder.Reflectors.
+
+    Parameters
+    ----------
+    first, second : numpy.ndarray
+        One dimensional arrays of the indices of the rows mixed by each rotation.
+    cos, sin : numpy.ndarray
+        One dimensional arrays of the cosines and sines returned by givens.
+    nrows : int
+        The number of rows of Q.
+
+    """
+
+    def __init__(self, first, second, cos, sin, nrows):
+        self.first = first
+        self.second = second
+        self.cos = cos
+        self.sin = sin
+        self.nrows = nrows
+
+
+    def apply(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with nrows rows, with
+        Q.matrix and returns it.
+        """
+
+        for k in reversed(range(len(self.cos))):
+            rotate_rows(matrix, self.first[k], self.second[k], self.cos[k], -self.sin[k])
+
+        return matrix
+
+
+    def form(self, ncols, order='C'):
+        """
+        Returns the first ncols columns of Q, in C or Fortran order.
+        """
+
+        return self.apply(np.eye(self.nrows,ncols,dtype=self.cos.dtype,order=order))
+
+
+    def apply_transpose(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with nrows rows, with
+        Q^T.matrix and returns it.
+        """
+
+        for k in range(len(self.cos)):
+            rotate_rows(matrix, self.first[k], self.second[k], self.cos[k], self.sin[k])
+
+        return matrix
+
+
+#%%
+
+def factor_banded(matrix, lower, upper):
+    """
+    QR decomposition of a banded (or upper Hessenberg) matrix with Givens 
+    rotations of adjacent rows, performed in place. Only the lower nonzero 
+    subdiagonals are zeroed and only the band, which widens to lower+upper 
+    diagonals above the main one in R, is touched, so this takes 
+    O(c.lower.(lower+upper)) operations: O(n^2) for an upper Hessenberg matrix.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats, overwritten with R.
+    lower, upper : int
+        The bandwidths of matrix, as returned by bandwidths.
+
+    Returns
+    -------
+    rotations : Rotations
+        Q in factored form, such that Q^T.matrix is R.
+    max_lower_triangle : float
+        The largest floating point error in the elements zeroed by the rotations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Givens import factor_banded
+    >>> M = np.array([[3.,1.,0.],[4.,2.,1.],[0.,5.,1.]])
+    >>> R = M.copy()
+    >>> rotations, err = factor_banded(R, 1, 1)
+    >>> R
+    array([[ 5.        ,  2.2       ,  0.8       ],
+           [ 0.        ,  5.01597448,  1.04466241],
+           [ 0.        ,  0.        , -0.51834394]])
+    >>> np.allclose(rotations.apply(R.copy()), M)
+    True
+
+    """
+
+    r, c = matrix.shape
+    first = []
+    cosines = []
+    sines = []
+
+    max_lower_triangle = 0.
+    for j in range(min(r-1,c)):
+        end = min(c,j+lower+upper+1)
+        for i in reversed(range(j+1,min(j+lower,r-1)+1)):
+            if matrix[i,j] == 0.:
+                continue
+
+            cos, sin = givens(matrix[i-1,j], matrix[i,j])
+            rotate_rows(matrix[:,j:end], i-1, i, cos, sin)
+            max_lower_triangle = max(max_lower_triangle, abs(matrix[i,j]))
+            matrix[i,j] = 0.
+
+            first.append(i-1)
+            cosines.append(cos)
+            sines.append(sin)
+
+    first = np.array(first,dtype=int)
+
+    return Rotations(first, first+1, np.array(cosines,dtype=matrix.dtype), np.array(sines,dtype=matrix.dtype), r), max_lower_triangle
+
+
+
+def factor_band_storage(band, lower, upper):
+    """
+    The QR decomposition of factor_banded, for a square matrix given in LAPACK
+    style band storage (see QRdecomp.Storage.from_band), which is never 
+    expanded: the rotations work on a band storage of lower subdiagonals and 
+    lower+upper superdiagonals, the bandwidths of R, so the memory taken is 
+    O(n.(2*lower+upper)) rather than O(n^2).
+
+    Parameters
+    ----------
+    band : numpy.ndarray
+        A two dimensional array of floats, of shape (lower+upper+1, n), where 
+        band[upper+i-j,j] holds the element (i,j). It is not modified.
+    lower, upper : int
+        The numbers of subdiagonals and superdiagonals.
+
+    Returns
+    -------
+    R : numpy.ndarray
+        R in band storage, with lower+upper superdiagonals and no subdiagonal,
+        of shape (lower+upper+1, n).
+    rotations : Rotations
+        Q in factored form, the same rotations as those of factor_banded.
+    max_lower_triangle : float
+        The largest floating point error in the elements zeroed by the rotations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Givens import factor_band_storage
+    >>> from QRdecomp.Storage import from_band
+    >>> band = np.array([[0.,1.,1.],[3.,2.,1.],[4.,5.,0.]])
+    >>> R, rotations, err = factor_band_storage(band, 1, 1)
+    >>> from_band(R, 0, 2)
+    array([[ 5.        ,  2.2       ,  0.8       ],
+           [ 0.        ,  5.01597448,  1.04466241],
+           [ 0.        ,  0.        , -0.51834394]])
+
+    """
+
+    n = band.shape[1]
+    width = lower+upper
+    
+    # the element (i,j) in work[width+i-j,j], the rows above those of the band
+    # are the superdiagonals the rotations fill in
+    work = np.zeros((width+lower+1,n),dtype=band.dtype)
+    work[lower:] = band
+    
+    first = []
+    cosines = []
+    sines = []
+
+    max_lower_triangle = 0.
+    for j in range(n-1):
+        cols = np.arange(j,min(n,j+width+1))
+        for i in reversed(range(j+1,min(j+lower,n-1)+1)):
+            if work[width+i-j,j] == 0.:
+                continue
+
+            cos, sin = givens(work[width+i-1-j,j], work[width+i-j,j])
+            row_above = work[width+i-1-cols,cols]
+            row = work[width+i-cols,cols]
+            work[width+i-1-cols,cols] = cos*row_above + sin*row
+            work[width+i-cols,cols] = cos*row - sin*row_above
+            max_lower_triangle = max(max_lower_triangle, abs(work[width+i-j,j]))
+            work[width+i-j,j] = 0.
+
+            first.append(i-1)
+            cosines.append(cos)
+            sines.append(sin)
+
+    first = np.array(first,dtype=int)
+    rotations = Rotations(first, first+1, np.array(cosines,dtype=band.dtype), np.array(sines,dtype=band.dtype), n)
+
+    return work[:width+1], rotations, max_lower_triangle
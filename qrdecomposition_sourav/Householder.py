@@ -28,7 +28,9 @@ def mod_vec_signed(v):
     -------
     out : float
         The Euclidean (Frobenius) norm of the input array times the sign of the
-        first element.
+        first element. A first element equal to 0. counts as positive, with 
+        np.sign it would wipe out the norm and the Householder transform of 
+        (0,x2,x3,...) would just flip its sign.
         
     Examples
     --------
@@ -40,12 +42,15 @@ def mod_vec_signed(v):
     >>> b = np.array([-1,1,4,5])
     >>> mod_vec_signed(b)
     -6.557438524302   
+    >>> c = np.array([0,3,4])
+    >>> mod_vec_signed(c)
+    5.0
           
         
         
     """
     
-    return np.sign(v[0])*np.linalg.norm(v)
+    return np.copysign(np.linalg.norm(v),v[0])
 
 
 #%%
@@ -70,6 +75,8 @@ def find_u(matrix, size):
         Say M is the input matrix. Let v be the first column vector in M. 
         Let v = (x1,x2,x3,...). This function should return the vector 
         u = (x1 + s*sign(x1)*||v||, x2, x3, ...)
+        With s=-1 the first element cancels when v is close to (x1,0,0,...), 
+        so it's computed as -(x2^2 + x3^2 + ...)/(x1 + sign(x1)*||v||) instead.
         
     Examples
     --------
@@ -83,10 +90,737 @@ def find_u(matrix, size):
     """
         
     u = matrix[:,0]
-    u_res = u + s*mod_vec_signed(u)*np.hstack(([1],np.zeros(size-1)))
+    u_res = u.astype(np.result_type(u.dtype,float))      # in the precision of the matrix, floats for integers
+    norm = mod_vec_signed(u_res)
+    if s == -1 and norm != 0.:
+        u_res[0] = -(u_res[1:]@u_res[1:])/(u_res[0]+norm)
+    else:
+        u_res[0] += s*norm
     
     return u_res
 
+
+#%%
+
+def find_tau(u):
+    """
+    Returns the scalar tau such that I - tau*u*u^T is the Householder transform
+    built from the u vector.
+
+    Parameters
+    ----------
+    u : numpy.ndarray
+        A one dimensional array of floats, typically the output of find_u.
+
+    Returns
+    -------
+    tau : float
+        2/<u,u>, or 0. when u vanishes, in which case the Householder transform
+        is the identity.
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import find_tau
+    >>> find_tau(np.array([-1.,  2.,  1.]))
+    0.3333333333333333
+    >>> find_tau(np.zeros(3))
+    0.0
+        
+    """
+    
+    inner = np.inner(u,u)
+    if inner != 0:
+        return 2./inner
+    
+    return 0.
+
+
+#%%
+
+def apply_Householder(u, tau, matrix):
+    """
+    Applies the Householder transform I - tau*u*u^T to a matrix from the left, 
+    in place, as a rank one update. The transform itself is never formed.
+
+    Parameters
+    ----------
+    u : numpy.ndarray
+        A one dimensional array of floats, of length equal to the number of rows
+        in matrix.
+    tau : float
+        The scalar returned by find_tau(u).
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one), overwritten 
+        with the result.
+
+    Returns
+    -------
+    matrix : numpy.ndarray
+        The input matrix, now holding (I - tau*u*u^T).matrix
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import find_u, find_tau, apply_Householder
+    >>> M = np.array([[2.,-2.,18.],[2.,1.,0],[1.,2.,0]])
+    >>> u = find_u(M, 3)
+    >>> apply_Householder(u, find_tau(u), M)
+    array([[ 3.,  0., 12.],
+           [ 0., -3., 12.],
+           [ 0.,  0.,  6.]])
+        
+    """
+    
+    if tau != 0.:
+        matrix -= tau*np.outer(u, u@matrix)
+        
+    return matrix
+
+
+#%%
+
+def apply_Householder_right(matrix, u, tau):
+    """
+    Applies the Householder transform I - tau*u*u^T to a matrix from the right, 
+    in place, as a rank one update. The transform itself is never formed.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one), overwritten 
+        with the result.
+    u : numpy.ndarray
+        A one dimensional array of floats, of length equal to the number of 
+        columns in matrix.
+    tau : float
+        The scalar returned by find_tau(u).
+
+    Returns
+    -------
+    matrix : numpy.ndarray
+        The input matrix, now holding matrix.(I - tau*u*u^T)
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import find_u, find_tau, apply_Householder_right
+    >>> M = np.array([[2.,-2.,18.],[2.,1.,0],[1.,2.,0]])
+    >>> u = find_u(M, 3)
+    >>> apply_Householder_right(np.eye(3), u, find_tau(u))
+    array([[ 0.66666667,  0.66666667,  0.33333333],
+           [ 0.66666667, -0.33333333, -0.66666667],
+           [ 0.33333333, -0.66666667,  0.66666667]])
+        
+    """
+    
+    if tau != 0.:
+        matrix -= tau*np.outer(matrix@u, u)
+        
+    return matrix
+
+
+
+#%%
+
+def factor_panel(matrix):
+    """
+    Unblocked Householder QR of a matrix (typically a panel of a few columns),
+    performed in place with rank one updates.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one). It is 
+        overwritten with R, up to floating point errors in its lower triangle.
+
+    Returns
+    -------
+    V : numpy.ndarray
+        A two dimensional array of floats with as many rows as matrix and 
+        k = min(matrix.shape) columns. Column j holds the u vector of the j-th
+        Householder transform in rows j onwards and zeros above.
+    tau : numpy.ndarray
+        A one dimensional array of the k scalars returned by find_tau.
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_panel
+    >>> M = np.array([[2.,-2.,18.],[2.,1.,0],[1.,2.,0]])
+    >>> V, tau = factor_panel(M[:,:2])
+    >>> V
+    array([[-1.,  0.],
+           [ 2.,  0.],
+           [ 1.,  0.]])
+    >>> M
+    array([[ 3.,  0., 18.],
+           [ 0., -3.,  0.],
+           [ 0.,  0.,  0.]])
+        
+    """
+    
+    r = matrix.shape[0]
+    k = min(matrix.shape)
+    V = np.zeros((r,k),dtype=matrix.dtype)
+    tau = np.zeros(k,dtype=matrix.dtype)
+    
+    for step in range(k):
+        u = find_u(matrix[step:,step:],r-step)
+        tau[step] = find_tau(u)
+        apply_Householder(u, tau[step], matrix[step:,step:])
+        V[step:,step] = u
+        
+    return V, tau
+
+
+#%%
+
+def factor_in_place(matrix):
+    """
+    Unblocked Householder QR of a matrix, performed in place with rank one 
+    updates, that keeps the u vectors in the lower triangle of the matrix as 
+    LAPACK does, so nothing the size of the matrix is allocated. Each u is 
+    scaled to have 1. as its first element, which is not stored, and tau is 
+    scaled to match.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one). It is 
+        overwritten with R in its upper triangle, and below the diagonal of 
+        column j with the elements after the first of the scaled u_j.
+
+    Returns
+    -------
+    tau : numpy.ndarray
+        A one dimensional array of the k = min(matrix.shape) scaled scalars tau.
+    max_lower_triangle : float
+        The largest floating point error left below the diagonal by the 
+        Householder transforms, before the u vectors are written over it.
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_in_place
+    >>> M = np.array([[2.,-2.,18.],[2.,1.,0],[1.,2.,0]])
+    >>> tau, err = factor_in_place(M)
+    >>> M
+    array([[ 3.,  0., 12.],
+           [-2., -3., 12.],
+           [-1.,  0.,  6.]])
+    >>> tau
+    array([0.33333333, 0.        , 0.        ])
+        
+    """
+    
+    r = matrix.shape[0]
+    k = min(matrix.shape)
+    tau = np.zeros(k,dtype=matrix.dtype)
+    
+    max_lower_triangle = 0.
+    for step in range(k):
+        u = find_u(matrix[step:,step:],r-step)
+        tau[step] = find_tau(u)
+        apply_Householder(u, tau[step], matrix[step:,step:])
+        max_lower_triangle = max(max_lower_triangle, np.amax(np.abs(matrix[step+1:,step]),initial=0.))
+        
+        # u[0] only vanishes along with the whole of u, when tau is 0.
+        if tau[step] != 0.:
+            matrix[step+1:,step] = u[1:]/u[0]
+            tau[step] *= u[0]**2
+        else:
+            matrix[step+1:,step] = 0.
+        
+    return tau, max_lower_triangle
+
+
+#%%
+
+def unit_panel(matrix):
+    """
+    Returns the u vectors stored by factor_in_place in the lower triangle of a
+    matrix (or a panel of its columns), as the columns of a new two dimensional
+    array with the implicit 1. on the diagonal and zeros above.
+    
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import unit_panel
+    >>> unit_panel(np.array([[ 3.,  0.],[-2., -3.],[-1.,  0.]]))
+    array([[ 1.,  0.],
+           [-2.,  1.],
+           [-1.,  0.]])
+        
+    """
+    
+    panel = np.tril(matrix,-1)
+    k = min(matrix.shape)
+    panel[np.arange(k),np.arange(k)] = 1.
+    
+    return panel
+
+
+#%%
+
+def factor_pivoted(matrix, tol=None):
+    """
+    Householder QR with column pivoting, performed in place with rank one 
+    updates. At each step the column with the largest remaining norm is moved
+    to the front, and the factorization stops as soon as all the remaining 
+    norms are below tol, so its cost scales with the numerical rank.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats. It is overwritten with the R of its
+        permuted columns, up to floating point errors in its lower triangle, 
+        and the negligible remainder in the rows after the numerical rank.
+    tol : float or None, optional
+        The norm below which a remaining column counts as zero. If None 
+        (default), eps*max(r,c) times the largest column norm.
+
+    Returns
+    -------
+    V : numpy.ndarray
+        A two dimensional array of floats with as many rows as matrix and k 
+        columns, k being the numerical rank, as returned by factor_panel.
+    tau : numpy.ndarray
+        A one dimensional array of the k scalars returned by find_tau.
+    perm : numpy.ndarray
+        The column permutation, such that matrix[:,perm] = Q.R with Q the 
+        product of the k Householder transforms.
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_pivoted
+    >>> M = np.array([[1.,2.,3.],[1.,2.,3.],[1.,2.,3.]])
+    >>> V, tau, perm = factor_pivoted(M)
+    >>> V.shape, perm
+    ((3, 1), array([2, 1, 0]))
+        
+    """
+    
+    r, c = matrix.shape
+    size = min(r,c)
+    V = np.zeros((r,size),dtype=matrix.dtype)
+    tau = np.zeros(size,dtype=matrix.dtype)
+    perm = np.arange(c)
+    
+    # the partial column norms are downdated after every step, and only 
+    # recomputed when too much cancellation has built up (as in LAPACK's geqp3)
+    norms = np.linalg.norm(matrix,axis=0)
+    original = norms.copy()
+    if tol is None:
+        tol = np.finfo(matrix.dtype).eps*max(r,c)*np.amax(norms,initial=0.)
+    threshold = np.sqrt(np.finfo(matrix.dtype).eps)
+    
+    k = 0
+    for step in range(size):
+        p = step + np.argmax(norms[step:])
+        if norms[p] <= tol:
+            break
+        
+        if p != step:
+            swap = [p,step]
+            matrix[:,[step,p]] = matrix[:,swap]
+            perm[[step,p]] = perm[swap]
+            norms[[step,p]] = norms[swap]
+            original[[step,p]] = original[swap]
+            
+        u = find_u(matrix[step:,step:],r-step)
+        tau[step] = find_tau(u)
+        apply_Householder(u, tau[step], matrix[step:,step:])
+        V[step:,step] = u
+        k = step+1
+        
+        rest = norms[step+1:]
+        nonzero = rest > 0.
+        ratio = np.zeros_like(rest)
+        ratio[nonzero] = np.abs(matrix[step,step+1:][nonzero])/rest[nonzero]
+        shrink = np.maximum(0.,1.-ratio**2)
+        
+        drift = np.zeros_like(rest)
+        drift[nonzero] = shrink[nonzero]*(rest[nonzero]/original[step+1:][nonzero])**2
+        recompute = step+1 + np.flatnonzero(nonzero & (drift <= threshold))
+        
+        rest *= np.sqrt(shrink)
+        norms[recompute] = np.linalg.norm(matrix[step+1:,recompute],axis=0)
+        original[recompute] = norms[recompute]
+        
+    return V[:,:k], tau[:k], perm
+
+
+#%%
+
+def block_T(V, tau):
+    """
+    Returns the upper triangular T of the compact WY representation 
+    H_1.H_2...H_k = I - V.T.V^T of a product of Householder transforms.
+
+    Parameters
+    ----------
+    V : numpy.ndarray
+        A two dimensional array of floats whose columns are the u vectors, as
+        returned by factor_panel.
+    tau : numpy.ndarray
+        A one dimensional array of the corresponding scalars.
+
+    Returns
+    -------
+    T : numpy.ndarray
+        An upper triangular kxk array of floats, k being the number of columns
+        of V.
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_panel, block_T
+    >>> M = np.array([[2.,-2.,18.],[2.,1.,0],[1.,2.,0]])
+    >>> V, tau = factor_panel(M[:,:2])
+    >>> block_T(V, tau)
+    array([[0.33333333, 0.        ],
+           [0.        , 0.        ]])
+        
+    """
+    
+    k = V.shape[1]
+    T = np.zeros((k,k),dtype=V.dtype)
+    
+    for i in range(k):
+        T[i,i] = tau[i]
+        if i > 0 and tau[i] != 0.:
+            T[:i,i] = -tau[i]*(T[:i,:i]@(V[:,:i].T@V[:,i]))
+            
+    return T
+
+
+#%%
+
+def apply_block_transpose(V, T, matrix):
+    """
+    Applies (I - V.T.V^T)^T = H_k...H_2.H_1 to a matrix from the left, in place,
+    using matrix products only.
+
+    Parameters
+    ----------
+    V : numpy.ndarray
+        A two dimensional array of floats, as returned by factor_panel.
+    T : numpy.ndarray
+        The corresponding triangular factor, as returned by block_T.
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one) with as many rows
+        as V, overwritten with the result.
+
+    Returns
+    -------
+    matrix : numpy.ndarray
+        The input matrix, now holding (I - V.T.V^T)^T.matrix
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_panel, block_T, apply_block_transpose
+    >>> M = np.array([[2.,-2.,18.],[2.,1.,0],[1.,2.,0]])
+    >>> V, tau = factor_panel(M[:,:2])
+    >>> apply_block_transpose(V, block_T(V, tau), M[:,2:])
+    array([[12.],
+           [12.],
+           [ 6.]])
+        
+    """
+    
+    matrix -= V@(T.T@(V.T@matrix))
+    
+    return matrix
+
+
+#%%
+
+def apply_block_right(matrix, V, T):
+    """
+    Applies I - V.T.V^T = H_1.H_2...H_k to a matrix from the right, in place,
+    using matrix products only.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one) with as many 
+        columns as V has rows, overwritten with the result.
+    V : numpy.ndarray
+        A two dimensional array of floats, as returned by factor_panel.
+    T : numpy.ndarray
+        The corresponding triangular factor, as returned by block_T.
+
+    Returns
+    -------
+    matrix : numpy.ndarray
+        The input matrix, now holding matrix.(I - V.T.V^T)
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_panel, block_T, apply_block_right
+    >>> M = np.array([[2.,-2.,18.],[2.,1.,0],[1.,2.,0]])
+    >>> V, tau = factor_panel(M[:,:2])
+    >>> apply_block_right(np.eye(3), V, block_T(V, tau))
+    array([[ 0.66666667,  0.66666667,  0.33333333],
+           [ 0.66666667, -0.33333333, -0.66666667],
+           [ 0.33333333, -0.66666667,  0.66666667]])
+        
+    """
+    
+    matrix -= ((matrix@V)@T)@V.T
+    
+    return matrix
+
+
+
+#%%
+
+def apply_block(V, T, matrix):
+    """
+    Applies I - V.T.V^T = H_1.H_2...H_k to a matrix from the left, in place,
+    using matrix products only.
+
+    Parameters
+    ----------
+    V : numpy.ndarray
+        A two dimensional array of floats, as returned by factor_panel.
+    T : numpy.ndarray
+        The corresponding triangular factor, as returned by block_T.
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one) with as many rows
+        as V, overwritten with the result.
+
+    Returns
+    -------
+    matrix : numpy.ndarray
+        The input matrix, now holding (I - V.T.V^T).matrix
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_panel, block_T, apply_block
+    >>> M = np.array([[2.,-2.,18.],[2.,1.,0],[1.,2.,0]])
+    >>> V, tau = factor_panel(M[:,:2])
+    >>> apply_block(V, block_T(V, tau), np.eye(3))
+    array([[ 0.66666667,  0.66666667,  0.33333333],
+           [ 0.66666667, -0.33333333, -0.66666667],
+           [ 0.33333333, -0.66666667,  0.66666667]])
+        
+    """
+    
+    matrix -= V@(T@(V.T@matrix))
+    
+    return matrix
+
+
+#%%
+
+def factor_blocked(matrix, block_size):
+    """
+    Blocked Householder QR of a matrix, performed in place: each panel of 
+    block_size columns is factored by factor_in_place, with rank one updates 
+    within the panel only, and its transforms are then applied to the columns
+    on its right in the compact WY form, with matrix products.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats (or a view into one), overwritten as
+        by factor_in_place.
+    block_size : int
+        The number of columns in a panel.
+
+    Returns
+    -------
+    tau : numpy.ndarray
+        A one dimensional array of the k = min(matrix.shape) scaled scalars tau.
+    T : list of numpy.ndarray
+        The triangular factors of the panels, as returned by block_T.
+    max_lower_triangle : float
+        The largest floating point error left below the diagonal.
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_blocked, Reflectors
+    >>> M = np.random.rand(100,60)
+    >>> R = M.copy()
+    >>> tau, T, err = factor_blocked(R, 16)
+    >>> np.allclose(Reflectors(R, tau, 16, T, unit=True).apply(np.triu(R)), M)
+    True
+        
+    """
+    
+    size = min(matrix.shape)
+    tau = np.zeros(size,dtype=matrix.dtype)
+    T = []
+    
+    max_lower_triangle = 0.
+    for step in range(0,size,block_size):
+        end = min(step+block_size,size)
+        
+        # rank one updates within the panel only, the trailing columns are 
+        # then updated with matrix products
+        tau[step:end], panel_max = factor_in_place(matrix[step:,step:end])
+        V = unit_panel(matrix[step:,step:end])
+        T.append(block_T(V, tau[step:end]))
+        apply_block_transpose(V, T[-1], matrix[step:,end:])
+        max_lower_triangle = max(max_lower_triangle, panel_max)
+        
+    return tau, T, max_lower_triangle
+
+
+#%%
+
+class Reflectors:
+    """
+    The factored form Q = H_1.H_2...H_k of an orthonormal matrix, where 
+    H_j = I - tau_j*u_j*u_j^T is the j-th Householder transform. Only the u 
+    vectors and the scalars tau are stored, Q is never formed.
+    
+    Parameters
+    ----------
+    V : numpy.ndarray
+        A two dimensional array of floats, as returned by factor_panel. Column j
+        holds u_j in rows j onwards and zeros above. If unit=True, the matrix
+        factored by factor_in_place instead, with the u_j below its diagonal.
+    tau : numpy.ndarray
+        A one dimensional array of the scalars tau_j.
+    block_size : int or None, optional
+        If None (default), the transforms are applied one at a time as rank one
+        updates. Otherwise they are applied block_size at a time in the compact
+        WY form, with matrix products.
+    T : list of numpy.ndarray or None, optional
+        The triangular factors of the blocks, as returned by block_T, if they 
+        are already known. They are computed when block_size is given and T is 
+        None (default).
+    unit : bool, optional
+        Whether V is as returned by factor_panel (False, default) or holds the
+        scaled u vectors of factor_in_place in its lower triangle (True).
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Householder import factor_panel, factor_in_place, Reflectors
+    >>> M = np.random.rand(5,3)
+    >>> R = M.copy()
+    >>> Q = Reflectors(*factor_panel(R))
+    >>> np.allclose(Q.apply(np.triu(R)), M)
+    True
+    >>> np.allclose(Q.apply_transpose(M.copy()), R)
+    True
+    >>> np.allclose(Q.form(3)@np.triu(R[:3]), M)
+    True
+    >>> R = M.copy()
+    >>> Q = Reflectors(R, factor_in_place(R)[0], unit=True)
+    >>> np.allclose(Q.apply(np.triu(R)), M)
+    True
+    
+    """
+    
+    def __init__(self, V, tau, block_size=None, T=None, unit=False):
+        self.V = V
+        self.tau = tau
+        self.block_size = block_size
+        self.unit = unit
+        
+        self.T = [] if T is None else T
+        if block_size is not None and T is None:
+            for step in range(0,len(tau),block_size):
+                end = min(step+block_size,len(tau))
+                self.T.append(block_T(self.panel(step,end), tau[step:end]))
+                
+                
+    def vector(self, step):
+        """
+        Returns u_step, from the row step onwards.
+        """
+        
+        if self.unit:
+            return np.concatenate((np.ones(1,dtype=self.V.dtype),self.V[step+1:,step]))
+        return self.V[step:,step]
+    
+    
+    def panel(self, step, end):
+        """
+        Returns the u vectors step to end-1 as columns, from the row step onwards.
+        """
+        
+        if self.unit:
+            return unit_panel(self.V[step:,step:end])
+        return self.V[step:,step:end]
+                
+                
+    def apply(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with as many rows as V, 
+        with Q.matrix and returns it.
+        """
+        
+        if self.block_size is None:
+            for step in reversed(range(len(self.tau))):
+                apply_Householder(self.vector(step), self.tau[step], matrix[step:])
+        else:
+            for i in reversed(range(len(self.T))):
+                step = i*self.block_size
+                end = step+self.T[i].shape[0]
+                apply_block(self.panel(step,end), self.T[i], matrix[step:])
+                
+        return matrix
+    
+    
+    def form(self, ncols, order='C'):
+        """
+        Returns the first ncols columns of Q, in C or Fortran order, formed by
+        applying the transforms in reverse order to the first ncols columns of
+        the identity. Only an array of that size is allocated, and H_j leaves 
+        the first j columns untouched so they are skipped.
+        """
+        
+        r = self.V.shape[0]
+        k = min(len(self.tau),ncols)
+        out = np.eye(r,ncols,dtype=self.V.dtype,order=order)
+        Q = out[:,:k]
+        
+        if self.block_size is None:
+            for step in reversed(range(k)):
+                apply_Householder(self.vector(step), self.tau[step], Q[step:,step:])
+        else:
+            for i in reversed(range(len(self.T))):
+                step = i*self.block_size
+                end = step+self.T[i].shape[0]
+                if step < k:
+                    apply_block(self.panel(step,end), self.T[i], Q[step:,step:])
+                    
+        # the columns after the k-th are touched by every transform, they are 
+        # formed apart so that the first k columns don't depend on ncols
+        if ncols > k:
+            self.apply(out[:,k:])
+                
+        return out
+    
+    
+    def apply_transpose(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with as many rows as V, 
+        with Q^T.matrix and returns it.
+        """
+        
+        if self.block_size is None:
+            for step in range(len(self.tau)):
+                apply_Householder(self.vector(step), self.tau[step], matrix[step:])
+        else:
+            for i in range(len(self.T)):
+                step = i*self.block_size
+                end = step+self.T[i].shape[0]
+                apply_block_transpose(self.panel(step,end), self.T[i], matrix[step:])
+                
+        return matrix
+
     
 #%%
 
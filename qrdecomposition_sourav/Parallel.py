@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the QR decompositions of many independent matrices in a pool of processes, with the inputs and outputs in shared memory"""
+
+
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import CustomExceptions
+from .Result import QRResult, qr
+
+
+#%%
+
+class SharedArray:
+    """
+    Exposes a float64 array in a shared memory block, made with numpy.ndarray
+    on the buffer of the block, through the numpy array interface, so that the
+    arrays made from it hold both the array and the block for as long as they
+    live. The block is only closed, and unmapped, after the last of them is 
+    gone: an array on its buffer alone doesn't stop its close().
+
+    Parameters
+    ----------
+    block : multiprocessing.shared_memory.SharedMemory
+        The block, already unlinked or still named.
+    offset : int
+        The offset of the array in the block, in bytes.
+    shape : tuple
+        The shape of the array, in C order.
+
+    """
+
+    def __init__(self, block, offset, shape):
+        self.block = block
+        self.array = np.ndarray(shape,dtype='float64',buffer=block.buf,offset=offset)
+        self.__array_interface__ = self.array.__array_interface__
+
+
+
+def sizes(shape, mode):
+    """
+    The shapes of Q and R for a matrix of the given shape.
+    """
+
+    r, c = shape
+    if mode=='reduced':
+        return (r,min(r,c)), (min(r,c),c)
+    return (r,r), (r,c)
+
+
+
+def factor_shared(jobs, inputs, outputs, mode):
+    """
+    Decomposes matrices in the input shared memory block and writes their Q and
+    R to the output one, run in the worker processes.
+
+    Parameters
+    ----------
+    jobs : list
+        Tuples (i, shape, input_offset, output_offset), one per matrix, the
+        offsets being in bytes, with R right after Q in the output block.
+    inputs, outputs : str
+        The names of the shared memory blocks.
+    mode : {'complete','reduced'}
+        As for QRdecomposition.
+
+    Returns
+    -------
+    out : list
+        Tuples (i, fperror), as fperror in QRResult.
+
+    """
+
+    input_block = shared_memory.SharedMemory(inputs)
+    output_block = shared_memory.SharedMemory(outputs)
+    done = []
+
+    for i, shape, input_offset, output_offset in jobs:
+        Qshape, Rshape = sizes(shape, mode)
+        res = qr(np.ndarray(shape,buffer=input_block.buf,offset=input_offset), mode)
+
+        np.ndarray(Qshape,buffer=output_block.buf,offset=output_offset)[:] = res.Q
+        np.ndarray(Rshape,buffer=output_block.buf,offset=output_offset+8*Qshape[0]*Qshape[1])[:] = res.R
+        done.append((i, res.fperror))
+
+    # the views were all temporary, nothing holds the blocks any more
+    input_block.close()
+    output_block.close()
+
+    return done
+
+
+#%%
+
+def factor_many(matrices, workers=None, mode='complete', ordered=True, chunksize=None):
+    """
+    Computes the QR decompositions of many independent matrices, of any shapes,
+    in a pool of processes. The matrices are copied once into a shared memory
+    block, which the workers read, and they write Q and R into another one, so
+    only offsets and shapes go through the pipes. Each decomposition is that of
+    QRdecomp.qr(), by Householder transforms.
+
+    Parameters
+    ----------
+    matrices : iterable
+        Two dimensional arrays (or anything converted to one by numpy.array) of
+        integers or floats.
+    workers : int or None, optional
+        The number of processes, os.cpu_count() by default. With workers=1 the
+        matrices are decomposed in this process, one at a time as they're asked
+        for.
+    mode : {'complete','reduced'} optional
+        As for QRdecomposition.
+    ordered : bool, optional
+        If True (default), the results come in the order of the matrices,
+        otherwise as soon as they are computed.
+    chunksize : int or None, optional
+        The number of matrices sent to a worker at a time. By default the
+        matrices are split in about four chunks per worker, for many small
+        matrices a larger chunksize saves on the messages, a smaller one brings
+        the first results sooner.
+
+    Raises
+    ------
+    'The mode is unrecognized, please choose a valid mode.'
+        If mode not in {'complete','reduced'}.
+
+    'Sorry, we can only work with two dimensional matrices!'
+        If one of the matrices is not two dimensional.
+
+    'The number of workers has to be a positive integer.'
+        If workers is neither None nor a positive integer.
+
+    Yields
+    ------
+    i : int
+        The index of the matrix.
+    out : QRResult
+        Its Q, R and the order of the floating point error. Q and R are views
+        of the shared output block, which is freed once no result refers to it.
+
+    See Also
+    --------
+    QRdecomp.batched_QR: for many matrices of the same small shape, in one
+        vectorized sweep in this process.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import factor_many
+    >>> matrices = [np.random.rand(200,100) for i in range(1000)]
+    >>> for i, (Q, R) in factor_many(matrices, workers=4):
+    ...     assert np.allclose(Q@R, matrices[i])
+    >>> results = dict(factor_many(matrices, ordered=False))
+
+    """
+
+    try:
+        if mode not in ['complete','reduced']:
+            raise CustomExceptions.ModeUnrecognized
+
+        if not (workers is None or (isinstance(workers, (int, np.integer)) and workers > 0)):
+            raise CustomExceptions.WorkersInvalid
+
+        # converted to float64 only as they're copied to shared memory, the 
+        # arrays are only referenced here
+        matrices = [np.asarray(matrix) for matrix in matrices]
+        if any(matrix.ndim != 2 for matrix in matrices):
+            raise CustomExceptions.DimensionError
+
+    except CustomExceptions.ModeUnrecognized:
+        print('The mode is unrecognized, please choose a valid mode.')
+        print()
+        return
+
+    except CustomExceptions.WorkersInvalid:
+        print('The number of workers has to be a positive integer.')
+        print()
+        return
+
+    except CustomExceptions.DimensionError:
+        print('Sorry, we can only work with two dimensional matrices!')
+        print()
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(matrices) <= 1:
+        return ((i, qr(matrix, mode)) for i, matrix in enumerate(matrices))
+
+    if chunksize is None:
+        chunksize = max(1,-(-len(matrices)//(4*workers)))
+
+    return pooled(matrices, workers, mode, ordered, chunksize)
+
+
+
+def pooled(matrices, workers, mode, ordered, chunksize):
+    """
+    The generator of factor_many for a pool of processes. The shared memory
+    blocks are only created when the first result is asked for, and the input
+    one is freed, with the pool shut down, when the last result has been
+    yielded or the generator is closed.
+    """
+
+    jobs = []
+    input_size = output_size = 0
+    for i, matrix in enumerate(matrices):
+        Qshape, Rshape = sizes(matrix.shape, mode)
+        jobs.append((i, matrix.shape, input_size, output_size))
+        input_size += 8*matrix.size
+        output_size += 8*(Qshape[0]*Qshape[1]+Rshape[0]*Rshape[1])
+
+    input_block = shared_memory.SharedMemory(create=True, size=max(1,input_size))
+    output_block = shared_memory.SharedMemory(create=True, size=max(1,output_size))
+    pool = None
+    futures = []
+    try:
+        # cast straight into the block, there's no float64 copy of the batch
+        for (i, shape, offset, _), matrix in zip(jobs, matrices):
+            np.ndarray(shape,dtype='float64',buffer=input_block.buf,offset=offset)[...] = matrix
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+        futures = [pool.submit(factor_shared, jobs[start:start+chunksize], input_block.name, output_block.name, mode)
+                   for start in range(0,len(jobs),chunksize)]
+
+        for future in (futures if ordered else as_completed(futures)):
+            for i, fperror in future.result():
+                Qshape, Rshape = sizes(jobs[i][1], mode)
+                offset = jobs[i][3]
+                Q = np.asarray(SharedArray(output_block, offset, Qshape))
+                R = np.asarray(SharedArray(output_block, offset+8*Qshape[0]*Qshape[1], Rshape))
+                yield i, QRResult(Q, R, fperror)
+
+    finally:
+        # the chunks not started yet are cancelled one by one, shutdown() 
+        # only takes cancel_futures from Python 3.9 on
+        for future in futures:
+            future.cancel()
+        if pool is not None:
+            pool.shutdown()
+
+        # the names go now, the output block itself stays mapped as long as a
+        # result views it
+        input_block.close()
+        input_block.unlink()
+        output_block.unlink()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the on-disk format of a decomposition, a directory of .npy files described by a versioned meta.json, loaded memory-mapped"""
+
+
+
+import json
+import os
+
+import numpy as np
+
+from . import CustomExceptions
+from .Householder import Reflectors
+from .Givens import Rotations
+from .TSQR import TreeReflectors
+from .Tiled import TiledReflectors
+from .Updates import ExplicitQ
+from .CholQR import CholeskyQ
+from .Storage import PackedR
+
+
+format_version = 1      # bumped whenever the layout of meta.json changes
+
+# the classes whose instances can be part of the state, rebuilt from their attributes
+classes = {cls.__name__: cls for cls in [Reflectors, Rotations, TreeReflectors, TiledReflectors, ExplicitQ, CholeskyQ, PackedR]}
+
+
+#%%
+
+def save_state(path, options, state):
+    """
+    Writes the state of a decomposition to the directory path, created if need
+    be: every array to its own .npy file, and the options with the rest of the
+    state to meta.json, which is written last.
+
+    Parameters
+    ----------
+    path : str
+        The directory.
+    options : dict
+        The options of the decomposition, such as its mode, as JSON values.
+    state : dict
+        The attributes of the decomposition: arrays, numbers, None, dtypes,
+        slices, and lists, tuples, dictionaries or instances of the classes 
+        above holding them.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Persistence import save_state, load_state
+    >>> save_state('qr_dir', {'mode': 'complete'}, {'R': np.eye(3), 'rank': None})
+    >>> options, state = load_state('qr_dir')
+    >>> state['R']
+    memmap([[1., 0., 0.],
+            [0., 1., 0.],
+            [0., 0., 1.]])
+
+    """
+
+    os.makedirs(path, exist_ok=True)
+    arrays = []
+
+    def encode(obj):
+        if isinstance(obj, np.ndarray):
+            name = 'array%d.npy' %len(arrays)
+            arrays.append(name)
+            np.save(os.path.join(path, name), obj)
+            return {'array': name}
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.dtype):
+            return {'dtype': obj.str}
+        if isinstance(obj, slice):
+            return {'slice': [obj.start, obj.stop, obj.step]}
+        if isinstance(obj, dict):
+            return {'dict': {key: encode(value) for key, value in obj.items()}}
+        if isinstance(obj, list):
+            return {'list': [encode(value) for value in obj]}
+        if isinstance(obj, tuple):
+            return {'tuple': [encode(value) for value in obj]}
+        if type(obj).__name__ in classes:
+            return {'class': type(obj).__name__, 'attributes': encode(vars(obj))}
+        return obj
+
+    meta = {'format_version': format_version, 'options': options, 'state': encode(state), 'arrays': arrays}
+    with open(os.path.join(path, 'meta.json'), 'w') as file:
+        json.dump(meta, file)
+
+
+
+def load_state(path, mmap_mode='r'):
+    """
+    Reads back what save_state wrote to the directory path.
+
+    Parameters
+    ----------
+    path : str
+        The directory.
+    mmap_mode : {'r','c',None} optional
+        As for numpy.load: by default the arrays are memory-mapped read-only, so
+        nothing is read from disk until it's used and the processes loading the
+        same files share their pages. 'c' maps them copy on write and None
+        reads them into memory.
+
+    Raises
+    ------
+    CustomExceptions.FormatUnsupported
+        If meta.json is of a format version this module doesn't know.
+
+    Returns
+    -------
+    options : dict
+        The options as saved.
+    state : dict
+        The state, its arrays being numpy.memmap unless mmap_mode=None.
+
+    """
+
+    with open(os.path.join(path, 'meta.json')) as file:
+        meta = json.load(file)
+
+    if meta.get('format_version') != format_version:
+        raise CustomExceptions.FormatUnsupported
+
+    def decode(obj):
+        if not isinstance(obj, dict):
+            return obj
+        if 'array' in obj:
+            return np.load(os.path.join(path, obj['array']), mmap_mode=mmap_mode)
+        if 'dtype' in obj:
+            return np.dtype(obj['dtype'])
+        if 'slice' in obj:
+            return slice(*obj['slice'])
+        if 'dict' in obj:
+            return {key: decode(value) for key, value in obj['dict'].items()}
+        if 'list' in obj:
+            return [decode(value) for value in obj['list']]
+        if 'tuple' in obj:
+            return tuple(decode(value) for value in obj['tuple'])
+
+        # the constructors would compute again what is already saved
+        out = classes[obj['class']].__new__(classes[obj['class']])
+        vars(out).update(decode(obj['attributes']))
+        return out
+
+    return meta['options'], decode(meta['state'])
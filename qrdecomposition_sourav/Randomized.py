@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the randomized QR decomposition, a rank k approximation from the QR decomposition of a random sketch of the range, read a block of rows at a time"""
+
+
+
+import numpy as np
+
+from . import CustomExceptions
+from .Result import QRResult, qr
+from .Streaming import row_blocks
+
+
+#%%
+
+def sketcher(ncols, nsketch, sketch, rng):
+    """
+    Returns the function multiplying a block of rows, with ncols columns, by
+    the random test matrix with nsketch columns.
+
+    With sketch='gaussian' the test matrix has independent standard normal
+    entries. With sketch='srft' it's a subsampled randomized Fourier transform:
+    random signs, a real FFT of each row and the real and imaginary parts of
+    random frequencies, O(ncols log ncols) per row instead of O(ncols.nsketch).
+    Frequencies 0 and ncols/2 have no imaginary part, and with too few columns
+    for the others the Gaussian test matrix is used instead.
+    """
+
+    nfreqs = -(-nsketch//2)
+    if sketch=='srft' and nfreqs <= (ncols-1)//2:
+        signs = rng.choice([-1.,1.],ncols)
+        freqs = 1 + rng.choice((ncols-1)//2,nfreqs,replace=False)
+
+        def apply(block):
+            spectrum = np.fft.rfft(block*signs,axis=1)[:,freqs]
+            return np.hstack((spectrum.real,spectrum.imag))[:,:nsketch]
+        return apply
+
+    omega = rng.standard_normal((ncols,nsketch))
+    return lambda block: block@omega
+
+
+
+def randomized_qr(matrix, k, oversample=10, power_iters=0, chunk_rows=None, sketch='gaussian', seed=None):
+    """
+    A rank k approximation A ~ Q_k.R_k, Q_k with k orthonormal columns and R_k
+    upper trapezoidal, for when only the leading k dimensional range of a large
+    matrix is needed, in O(rck) operations rather than the O(rc^2) of a full
+    QRdecomposition. The range is found by the QR decomposition Q of a sketch
+    Y = A.Omega of l = k+oversample random combinations of the columns, so
+    that A ~ Q.B with B = Q^T.A. The leading k left singular vectors U_k of
+    the small l x c matrix B then give the best rank k truncation
+    Q.U_k.U_k^T.B, and the QR decomposition Q_C.R_C of U_k^T.B gives
+    Q_k = Q.U_k.Q_C and R_k = R_C. Both QR decompositions are by Householder
+    transforms, as in QRdecomp.qr().
+
+    The matrix is only read a block of chunk_rows rows at a time, 2+2*power_iters
+    times in all, so a memory-mapped matrix is never loaded whole: the memory
+    used is O((r+c)l) plus a block.
+
+    Parameters
+    ----------
+    matrix : array_like or str
+        A two dimensional array of integers or floats, used as it is if it's
+        a numpy.ndarray or numpy.memmap, or the path of a .npy file which is
+        then memory-mapped. It is never modified.
+    k : int
+        The rank of the approximation, at most min(r,c).
+    oversample : int, optional
+        The number of columns of the sketch beyond k, 10 by default, which
+        makes the range found much closer to the best one. l is capped at
+        min(r,c).
+    power_iters : int, optional
+        The number of power iterations, 0 by default: the sketch is of
+        (A.A^T)^q.A instead, whose singular values decay faster, for matrices
+        whose singular values decay slowly. Each one reads the matrix twice,
+        and the sketch is orthonormalized in between.
+    chunk_rows : int or None, optional
+        The number of rows in a block, by default as many as hold about 64MB
+        of float64.
+    sketch : {'gaussian','srft'} optional
+        The random test matrix Omega, Gaussian by default, or a subsampled
+        randomized Fourier transform, cheaper to apply to wide matrices.
+    seed : int or None, optional
+        The seed of the numpy.random.Generator drawing Omega.
+
+    Raises
+    ------
+    'Sorry, we can only work with a two dimensional matrix!'
+        If the input matrix is not two dimensional.
+
+    'The rank k has to be a positive integer no larger than min(r,c).'
+        If k is out of range.
+
+    'The oversampling and power iterations have to be non-negative integers, the sketch gaussian or srft and chunk_rows positive.'
+        If any of the other parameters is invalid.
+
+    Returns
+    -------
+    out : QRResult
+        Q_k, r x k, R_k, k x c, and the order of the floating point error of
+        the two QR decompositions, not of the approximation.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import randomized_qr
+    >>> A = np.random.rand(100000,40) @ np.random.rand(40,2000)
+    >>> np.save('A.npy', A)
+    >>> Qk, Rk = randomized_qr('A.npy', 40, seed=0)
+    >>> Qk.shape, Rk.shape
+    ((100000, 40), (40, 2000))
+    >>> np.allclose(Qk@Rk, A)
+    True
+    >>> res = randomized_qr(np.random.rand(2000,1000), 20, power_iters=2, sketch='srft')
+
+    """
+
+    try:
+        if isinstance(matrix, str):
+            matrix = np.load(matrix, mmap_mode='r')
+        elif not isinstance(matrix, np.ndarray):
+            matrix = np.asarray(matrix, dtype='float64')
+
+        if matrix.ndim != 2:
+            raise CustomExceptions.DimensionError
+
+        r, c = matrix.shape
+        if not (isinstance(k, (int, np.integer)) and 0 < k <= min(r,c)):
+            raise CustomExceptions.RankInvalid
+
+        if not (isinstance(oversample, (int, np.integer)) and oversample >= 0
+                and isinstance(power_iters, (int, np.integer)) and power_iters >= 0
+                and sketch in ['gaussian','srft']
+                and (chunk_rows is None or (isinstance(chunk_rows, (int, np.integer)) and chunk_rows > 0))):
+            raise CustomExceptions.SketchInvalid
+
+    except CustomExceptions.DimensionError:
+        print('Sorry, we can only work with a two dimensional matrix!')
+        print()
+        return
+
+    except CustomExceptions.RankInvalid:
+        print('The rank k has to be a positive integer no larger than min(r,c).')
+        print()
+        return
+
+    except CustomExceptions.SketchInvalid:
+        print('The oversampling and power iterations have to be non-negative integers, the sketch gaussian or srft and chunk_rows positive.')
+        print()
+        return
+
+    if chunk_rows is None:
+        chunk_rows = max(1,2**23//c)
+
+    l = min(k+oversample,r,c)
+    apply_omega = sketcher(c, l, sketch, np.random.default_rng(seed))
+
+    # each block is converted to float64 on its own, the matrix never is whole
+    def blocks():
+        for start, block in zip(range(0,r,chunk_rows), row_blocks(matrix, chunk_rows)):
+            yield slice(start,start+block.shape[0]), np.asarray(block,dtype='float64')
+
+    Y = np.empty((r,l))
+    for rows, block in blocks():
+        Y[rows] = apply_omega(block)
+
+    for _ in range(power_iters):
+        # orthonormalized in between, or the powers would round away all but
+        # the leading singular vectors
+        Q = qr(Y,'reduced').Q
+        Z = np.zeros((c,l))
+        for rows, block in blocks():
+            Z += block.T@Q[rows]
+
+        Z = qr(Z,'reduced').Q
+        for rows, block in blocks():
+            Y[rows] = block@Z
+
+    sketched = qr(Y,'reduced')
+    Q = sketched.Q
+    B = np.zeros((l,c))
+    for rows, block in blocks():
+        B += Q[rows].T@block
+
+    # truncating a QR decomposition of B would keep the range of its first k
+    # columns, the singular vectors keep the leading one
+    U = np.linalg.svd(B,full_matrices=False)[0][:,:k]
+    small = qr(U.T@B,'reduced')
+    fperror = float(np.fmax(sketched.fperror, small.fperror))
+
+    return QRResult(Q@(U@small.Q), small.R, fperror)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the immutable result of a QR decomposition, and the lightweight path that returns it"""
+
+
+
+import numpy as np
+
+from . import CustomExceptions
+from .Householder import factor_in_place, Reflectors
+
+
+#%%
+
+class QRResult:
+    """
+    The immutable result of a QR decomposition, with a fixed set of slots and
+    no __dict__, so it takes little more memory than its arrays. It unpacks as
+    the pair Q, R.
+
+    Attributes
+    ----------
+    Q : numpy.ndarray
+        The orthonormal Q matrix.
+    R : numpy.ndarray
+        The upper triangular R matrix.
+    fperror : float
+        The order in base 10 of the floating point error in the lower
+        triangular elements of R, as in QRdecomposition.FloatingPointErrorOrder(),
+        nan when there is no floating point error up to the max precision at 0.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import qr
+    >>> res = qr(np.array([[2,-2,18],[2,1,0],[1,2,0]]))
+    >>> Q, R = res
+    >>> res.fperror
+    nan
+    >>> res.R = R
+    AttributeError: QRResult is immutable
+
+    """
+
+    __slots__ = ('Q', 'R', 'fperror')
+
+    def __init__(self, Q, R, fperror):
+        object.__setattr__(self, 'Q', Q)
+        object.__setattr__(self, 'R', R)
+        object.__setattr__(self, 'fperror', fperror)
+
+
+    def __setattr__(self, name, value):
+        raise AttributeError('QRResult is immutable')
+
+
+    def __delattr__(self, name):
+        raise AttributeError('QRResult is immutable')
+
+
+    def __reduce__(self):
+        # pickled through the constructor, as __setattr__ is closed
+        return QRResult, (self.Q, self.R, self.fperror)
+
+
+    def __iter__(self):
+        yield self.Q
+        yield self.R
+
+
+    def __repr__(self):
+        return 'QRResult(Q=%r, R=%r, fperror=%r)' %(self.Q, self.R, self.fperror)
+
+
+#%%
+
+def qr(matrix, mode='complete'):
+    """
+    The QR decomposition of a single matrix by Householder transforms, with
+    none of the checks, messages and options of QRdecomposition: it's meant for
+    the many small decompositions where those cost more than the arithmetic.
+    An upper triangular input is decomposed like any other, and what numpy
+    can't convert to a two dimensional array of floats raises its own error.
+
+    Parameters
+    ----------
+    matrix : array_like
+        A two dimensional array (or anything converted to one by numpy.array)
+        of integers or floats. It is copied, never overwritten.
+    mode : {'complete','reduced'} optional
+        As for QRdecomposition.
+
+    Raises
+    ------
+    CustomExceptions.ModeUnrecognized
+        If mode not in {'complete','reduced'}, raised rather than printed.
+
+    Returns
+    -------
+    out : QRResult
+        Q, R and the order of the floating point error.
+
+    See Also
+    --------
+    QRdecomp.QRdecomposition: the class with all the options, and the
+        solvers and updates.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import qr
+    >>> Q, R = qr(np.array([[2,-2,18],[2,1,0],[1,2,0]]))
+    >>> R
+    array([[ 3.,  0., 12.],
+           [ 0., -3., 12.],
+           [ 0.,  0.,  6.]])
+    >>> qr(np.random.rand(6,4), 'reduced').Q.shape
+    (6, 4)
+
+    """
+
+    if mode not in ('complete','reduced'):
+        raise CustomExceptions.ModeUnrecognized
+
+    # the Householder transforms read and update columns, hence Fortran order
+    R = np.array(matrix,dtype='float64',order='F')
+    r, c = R.shape
+    size = min(r,c)
+
+    tau, max_lower_triangle = factor_in_place(R)
+    reflectors = Reflectors(R, tau, unit=True)
+    fperror = float(np.floor(np.log10(max_lower_triangle))) if max_lower_triangle > 0. else np.nan
+
+    if mode=='reduced':
+        return QRResult(reflectors.form(size), np.triu(R[:size,:]), fperror)
+
+    return QRResult(reflectors.form(r), np.triu(R), fperror)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the compact storage formats, packed upper triangular R and LAPACK style band storage of the input"""
+
+
+
+import numpy as np
+
+
+#%%
+
+class PackedR:
+    """
+    An upper triangular (or trapezoidal) R in packed storage: the elements on
+    and above the diagonal are stored column after column in a one dimensional
+    array, as in LAPACK's 'U' packed format, so a square R of dimension n takes
+    n(n+1)/2 floats instead of n^2. The rows after min(r,c), all zero, are not
+    stored at all.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The one dimensional array of the packed elements, column j holding the
+        rows 0 to min(j,k-1) with k = min(r,c).
+    shape : tuple
+        The shape (r,c) of the dense R.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Storage import pack_triu
+    >>> P = pack_triu(np.array([[1.,2.,3.],[0.,4.,5.],[0.,0.,6.]]))
+    >>> P.data
+    array([1., 2., 4., 3., 5., 6.])
+    >>> P.diagonal()
+    array([1., 4., 6.])
+
+    """
+
+    def __init__(self, data, shape):
+        self.data = data
+        self.shape = shape
+        self.k = min(shape)
+
+        counts = np.minimum(np.arange(1,shape[1]+1),self.k)
+        self.start = np.concatenate(([0],np.cumsum(counts)))
+
+
+    def column(self, j):
+        """
+        Returns a view of the stored elements of the column j, ie its rows 0 to
+        min(j,k-1).
+        """
+
+        return self.data[self.start[j]:self.start[j+1]]
+
+
+    def diagonal(self):
+        """
+        Returns the k elements on the diagonal.
+        """
+
+        return self.data[self.start[:self.k]+np.arange(self.k)]
+
+
+    def toarray(self, order='C'):
+        """
+        Returns R as a dense two dimensional array of floats, in C or Fortran
+        order.
+        """
+
+        out = np.zeros(self.shape,dtype=self.data.dtype,order=order)
+        for j in range(self.shape[1]):
+            column = self.column(j)
+            out[:len(column),j] = column
+
+        return out
+
+
+    @property
+    def nbytes(self):
+        """
+        The memory taken by the packed elements, in bytes.
+        """
+
+        return self.data.nbytes
+
+
+#%%
+
+def pack_triu(matrix):
+    """
+    Packs the upper triangle of a matrix, whatever is below its diagonal is
+    never read.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats.
+
+    Returns
+    -------
+    out : PackedR
+        Its upper triangle in packed storage.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Storage import pack_triu
+    >>> M = np.random.rand(6,4)
+    >>> np.all(pack_triu(M).toarray() == np.triu(M))
+    True
+
+    """
+
+    r, c = matrix.shape
+    k = min(r,c)
+    data = np.empty(sum(min(j+1,k) for j in range(c)),dtype=matrix.dtype)
+
+    out = PackedR(data, (r,c))
+    for j in range(c):
+        out.column(j)[:] = matrix[:min(j+1,k),j]
+
+    return out
+
+
+
+def pack_band(band, upper):
+    """
+    The packed storage of an upper triangular square matrix given in band 
+    storage with upper superdiagonals and no subdiagonal, as R comes out of 
+    QRdecomp.Givens.factor_band_storage, without expanding it.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Storage import pack_band
+    >>> pack_band(np.array([[0.,2.,3.],[1.,4.,6.]]), 1).toarray()
+    array([[1., 2., 0.],
+           [0., 4., 3.],
+           [0., 0., 6.]])
+
+    """
+
+    n = band.shape[1]
+    out = PackedR(np.zeros(n*(n+1)//2,dtype=band.dtype), (n,n))
+    for j in range(n):
+        top = max(0,j-upper)
+        out.column(j)[top:] = band[upper+np.arange(top,j+1)-j,j]
+
+    return out
+
+
+#%%
+
+def packed_back_substitution(packed, B):
+    """
+    Solves R.X = B by back substitution directly on a packed R, one column of
+    R at a time, for all the columns of B at once.
+
+    Parameters
+    ----------
+    packed : PackedR
+        R in packed storage. Only its top left block of dimension n is used,
+        n being the number of rows of B (at most min(r,c)), and has to have no
+        zero on its diagonal.
+    B : numpy.ndarray
+        A one or two dimensional array of floats. Each column is a right hand
+        side.
+
+    Returns
+    -------
+    X : numpy.ndarray
+        An array of floats with the same shape as B.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Storage import pack_triu, packed_back_substitution
+    >>> P = pack_triu(np.array([[2.,1.],[0.,4.]]))
+    >>> packed_back_substitution(P, np.array([3.,4.]))
+    array([1., 1.])
+
+    """
+
+    X = np.array(B,dtype=packed.data.dtype)
+
+    for j in reversed(range(X.shape[0])):
+        column = packed.column(j)
+        X[j] /= column[j]
+        X[:j] -= np.multiply.outer(column[:j],X[j])
+
+    return X
+
+
+#%%
+
+def from_band(band, lower, upper):
+    """
+    Expands a square matrix given in LAPACK style band storage, where
+    band[upper+i-j,j] holds the element (i,j) for -upper <= i-j <= lower.
+
+    Parameters
+    ----------
+    band : numpy.ndarray
+        A two dimensional array of floats, of shape (lower+upper+1, n). The
+        elements outside the matrix, in the top left and bottom right corners,
+        are never read.
+    lower, upper : int
+        The numbers of subdiagonals and superdiagonals.
+
+    Returns
+    -------
+    out : numpy.ndarray
+        The dense square matrix of dimension n.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Storage import from_band
+    >>> from_band(np.array([[0.,1.,1.],[2.,2.,2.],[3.,3.,0.]]), 1, 1)
+    array([[2., 1., 0.],
+           [3., 2., 1.],
+           [0., 3., 2.]])
+
+    """
+
+    n = band.shape[1]
+    out = np.zeros((n,n),dtype=band.dtype)
+
+    for d in range(-upper,lower+1):
+        j = np.arange(max(0,-d),min(n,n-d))
+        out[j+d,j] = band[upper+d,j]
+
+    return out
+
+
+#%%
+
+def to_band(matrix, lower, upper):
+    """
+    The LAPACK style band storage of a square matrix, the inverse of from_band.
+    The elements outside the band are dropped.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Storage import to_band
+    >>> to_band(np.array([[2.,1.,0.],[3.,2.,1.],[0.,3.,2.]]), 1, 1)
+    array([[0., 1., 1.],
+           [2., 2., 2.],
+           [3., 3., 0.]])
+
+    """
+
+    n = matrix.shape[1]
+    out = np.zeros((lower+upper+1,n),dtype=matrix.dtype)
+
+    for d in range(-upper,lower+1):
+        j = np.arange(max(0,-d),min(n,n-d))
+        out[upper+d,j] = matrix[j+d,j]
+
+    return out
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the QR decomposition of a matrix streamed in blocks of rows, never held in memory as a whole"""
+
+
+
+from itertools import zip_longest
+
+import numpy as np
+
+from . import CustomExceptions
+from .Householder import find_u, find_tau
+from .main import order10, back_substitution
+
+
+#%%
+
+def row_blocks(matrix, block_rows=4096):
+    """
+    Iterates over a matrix in blocks of rows.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray or str
+        A two dimensional array, or the path of a .npy file which is then
+        memory-mapped with numpy.load(matrix, mmap_mode='r') so that only one
+        block at a time is read from disk.
+    block_rows : int, optional
+        The number of rows per block, 4096 by default.
+
+    Yields
+    ------
+    block : numpy.ndarray
+        The next block_rows rows of the matrix (fewer for the last block).
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Streaming import row_blocks
+    >>> [block.shape for block in row_blocks(np.ones((10,3)), 4)]
+    [(4, 3), (4, 3), (2, 3)]
+
+    """
+
+    if isinstance(matrix, str):
+        matrix = np.load(matrix, mmap_mode='r')
+
+    for start in range(0,matrix.shape[0],block_rows):
+        yield matrix[start:start+block_rows]
+
+
+#%%
+
+class StreamingQR:
+    """
+    Instantiates a class for the QR decomposition of a matrix fed in blocks of
+    rows. Only the square R, and optionally Q^T.b for a right hand side b, are
+    kept: each update performs the Householder transforms on R stacked over the
+    new block, so memory stays O(c^2 + block size*c) however many rows there are.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import StreamingQR
+    >>> A = np.random.rand(100000,4)
+    >>> b = A@np.arange(4.)
+    >>> stream = StreamingQR()
+    >>> for start in range(0,100000,1000):
+    ...     stream.update(A[start:start+1000], b[start:start+1000])
+    >>> stream.lstsq()
+    array([0., 1., 2., 3.])
+    >>> stream.Rmatrix().shape
+    (4, 4)
+
+    """
+
+    def __init__(self):
+        self.__nrows = 0
+        self.__max_lower_triangle = 0.
+        self.__residual = 0.
+
+
+
+    def update(self, block, b=None):
+        """
+        A StreamingQR class method to take in the next block of rows.
+
+        Parameters
+        ----------
+        block : array_like
+            A two dimensional array of integers or floats, with the same number
+            of columns for every block. Only a copy of the block is modified.
+        b : array_like, optional
+            The corresponding rows of the right hand side(s), a one or two
+            dimensional array with as many rows as block. Has to be given for
+            every block or for none.
+
+        Raises
+        ------
+        'The shapes of the block and R are not aligned.'
+            If the block doesn't have the same number of columns as the previous
+            ones, or b doesn't match the block or the previous right hand sides.
+
+        """
+
+        try:
+            B = np.array(block,dtype='float64')
+            if B.ndim != 2:
+                raise CustomExceptions.ShapeMismatch
+
+            if self.__nrows == 0:
+                c = B.shape[1]
+                self.__R = np.zeros((c,c))       # R of zero rows, ie no rows yet
+                self.__Qtb = None if b is None else np.zeros((c,)+np.shape(b)[1:])
+
+            c = self.__R.shape[0]
+            if B.shape[1] != c or (b is None) != (self.__Qtb is None):
+                raise CustomExceptions.ShapeMismatch
+
+            if b is not None:
+                Bb = np.array(b,dtype='float64')
+                if Bb.shape != (B.shape[0],)+self.__Qtb.shape[1:]:
+                    raise CustomExceptions.ShapeMismatch
+
+        except CustomExceptions.ShapeMismatch:
+            print('The shapes of the block and R are not aligned.')
+            print()
+            return
+
+        R = self.__R
+        for step in range(c):
+            # the Householder transform of the column (R[step,step], B[:,step]),
+            # the rows of R below step are already zero in this column and
+            # are left out entirely
+            u = find_u(np.concatenate(([R[step,step]],B[:,step]))[:,np.newaxis],B.shape[0]+1)
+            tau = find_tau(u)
+            if tau != 0.:
+                w = tau*(u[0]*R[step,step:] + u[1:]@B[:,step:])
+                R[step,step:] -= u[0]*w
+                B[:,step:] -= np.outer(u[1:],w)
+
+                if b is not None:
+                    w = tau*(u[0]*self.__Qtb[step] + np.tensordot(u[1:],Bb,axes=1))
+                    self.__Qtb[step] -= u[0]*w
+                    Bb -= np.multiply.outer(u[1:],w)
+
+            if B.shape[0] > 0:
+                self.__max_lower_triangle = max(self.__max_lower_triangle, np.amax(np.abs(B[:,step])))
+            B[:,step] = 0.
+
+        # whatever is left of b is orthogonal to the range of the rows seen so far
+        if b is not None:
+            self.__residual += np.sum(Bb**2, axis=0)
+
+        self.__nrows += B.shape[0]
+
+
+
+    def nrows(self):
+        """
+        A StreamingQR class method returning the number of rows taken in so far.
+        """
+
+        return self.__nrows
+
+
+
+    def Rmatrix(self):
+        """
+        A StreamingQR class method returning the square upper triangular R of
+        all the rows taken in so far, or None if there were none.
+        """
+
+        if self.__nrows > 0:
+            return self.__R
+
+
+
+    def Qtb(self):
+        """
+        A StreamingQR class method returning the first c rows of Q^T.b for the
+        rows taken in so far, or None if no right hand side was given.
+        """
+
+        if self.__nrows > 0:
+            return self.__Qtb
+
+
+
+    def residual_norm(self):
+        """
+        A StreamingQR class method returning ||A.x - b|| for the least squares
+        solution x, one value per right hand side, or None if no right hand
+        side was given.
+        """
+
+        if self.__nrows > 0 and self.__Qtb is not None:
+            return np.sqrt(self.__residual)
+
+
+
+    def lstsq(self):
+        """
+        A StreamingQR class method to find the least squares solution x,
+        minimizing ||A.x - b||, for all the rows taken in so far, by back
+        substitution against R.
+
+        Raises
+        ------
+        'There is no right hand side to solve for.'
+            If no right hand side was given with the blocks.
+
+        'The matrix is singular.'
+            If R has a zero on its diagonal, up to floating point errors, ie A
+            is not of full column rank (in particular if there are fewer rows
+            than columns).
+
+        Returns
+        -------
+        x : numpy.ndarray
+            The least squares solution, one column per right hand side.
+
+        """
+
+        try:
+            if self.__nrows == 0 or self.__Qtb is None:
+                raise CustomExceptions.NoRHS
+
+            diagonal = np.abs(np.diagonal(self.__R))
+            if np.any(diagonal <= np.finfo(self.__R.dtype).eps*self.__nrows*np.amax(diagonal)):
+                raise CustomExceptions.Singular
+
+            return back_substitution(self.__R, self.__Qtb)
+
+        except CustomExceptions.NoRHS:
+            print('There is no right hand side to solve for.')
+            print()
+
+        except CustomExceptions.Singular:
+            print('The matrix is singular.')
+            print()
+
+
+
+    def FloatingPointErrorOrder(self):
+        """
+        Gives an estimate of the floating point error involved in the updates,
+        as in QRdecomposition.FloatingPointErrorOrder().
+        """
+
+        if self.__max_lower_triangle > 0.:
+            return 'The floating point error is at best of the order of 10^%d' %order10(self.__max_lower_triangle)
+        else:
+            return 'There are no floating point errors in the lower triangular elements of R up to the max precision at 0.'
+
+
+#%%
+
+def streaming_QR(blocks, rhs=None):
+    """
+    Consumes an iterator of blocks of rows, for example a generator or
+    row_blocks() over a memory-mapped .npy file, and returns the resulting
+    StreamingQR.
+
+    Parameters
+    ----------
+    blocks : iterable
+        The blocks of rows, two dimensional arrays with the same number of
+        columns.
+    rhs : iterable, optional
+        The corresponding blocks of the right hand side(s), consumed alongside.
+        There has to be one for each block of rows.
+
+    Raises
+    ------
+    'The blocks of the matrix and of the right hand side are not aligned.'
+        If one of blocks and rhs runs out before the other.
+
+    Returns
+    -------
+    out : StreamingQR
+        The decomposition of all the rows, None if the blocks and those of the
+        right hand side weren't aligned.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp import streaming_QR
+    >>> from QRdecomp.Streaming import row_blocks
+    >>> A = np.random.rand(100000,4)
+    >>> np.save('A.npy', A)
+    >>> stream = streaming_QR(row_blocks('A.npy', 10000), row_blocks(A@np.ones(4), 10000))
+    >>> stream.lstsq()
+    array([1., 1., 1., 1.])
+
+    """
+
+    stream = StreamingQR()
+
+    if rhs is None:
+        for block in blocks:
+            stream.update(block)
+    else:
+        missing = object()
+        try:
+            # a shorter iterator would otherwise cut the stream short silently
+            for block, b in zip_longest(blocks, rhs, fillvalue=missing):
+                if block is missing or b is missing:
+                    raise CustomExceptions.ShapeMismatch
+                stream.update(block, b)
+
+        except CustomExceptions.ShapeMismatch:
+            print('The blocks of the matrix and of the right hand side are not aligned.')
+            print()
+            return
+
+    return stream
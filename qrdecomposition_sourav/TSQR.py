@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the tall skinny QR decomposition (TSQR), with the blocks of rows factored in parallel"""
+
+
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from .Householder import factor_panel, Reflectors
+
+
+min_parallel_size = 2**18       # below this many entries the blocks are factored serially,
+                                # starting processes costs more than it saves
+
+
+#%%
+
+def factor_block(block):
+    """
+    Householder QR of a block of rows, run in the worker processes.
+
+    Parameters
+    ----------
+    block : numpy.ndarray
+        A two dimensional array of floats with at least as many rows as columns,
+        factored in its own precision (integers in float64).
+
+    Returns
+    -------
+    R : numpy.ndarray
+        The square upper triangular R of the block.
+    reflectors : QRdecomp.Householder.Reflectors
+        The Householder transforms of the block in factored form.
+    max_lower_triangle : float
+        The largest floating point error left in the lower triangle.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.TSQR import factor_block
+    >>> R, reflectors, err = factor_block(np.array([[3.,1.],[4.,2.],[0.,5.]]))
+    >>> R
+    array([[ 5.        ,  2.2       ],
+           [ 0.        , -5.01597448]])
+
+    """
+
+    R = np.array(block,dtype=np.result_type(block,'float32'))
+    V, tau = factor_panel(R)
+    k = min(R.shape)
+
+    return np.triu(R[:k]), Reflectors(V, tau), np.amax(np.abs(np.tril(R,-1)))
+
+
+#%%
+
+class TreeReflectors:
+    """
+    The factored form of the Q of a TSQR decomposition, Q = diag(Q_1,...,Q_p).Q_tree,
+    where the Q_i are those of the blocks of rows and Q_tree is the product of
+    the Householder transforms of the reduction tree. It has the same methods as
+    QRdecomp.Householder.Reflectors.
+
+    Parameters
+    ----------
+    leaves : list
+        Tuples (start, stop, reflectors) for the blocks of rows start:stop.
+    levels : list
+        For each level of the reduction tree, a list of tuples (rows, reflectors)
+        where rows is the integer array of the rows combined at that node.
+    nrows : int
+        The number of rows of Q.
+
+    """
+
+    def __init__(self, leaves, levels, nrows):
+        self.leaves = leaves
+        self.levels = levels
+        self.nrows = nrows
+
+
+    def apply(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with nrows rows, with
+        Q.matrix and returns it.
+        """
+
+        for level in reversed(self.levels):
+            for rows, reflectors in level:
+                matrix[rows] = reflectors.apply(matrix[rows])
+
+        for start, stop, reflectors in self.leaves:
+            reflectors.apply(matrix[start:stop])
+
+        return matrix
+
+
+    def form(self, ncols, order='C'):
+        """
+        Returns the first ncols columns of Q, in C or Fortran order.
+        """
+
+        return self.apply(np.eye(self.nrows,ncols,dtype=self.leaves[0][2].V.dtype,order=order))
+
+
+    def apply_transpose(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with nrows rows, with
+        Q^T.matrix and returns it.
+        """
+
+        for start, stop, reflectors in self.leaves:
+            reflectors.apply_transpose(matrix[start:stop])
+
+        for level in self.levels:
+            for rows, reflectors in level:
+                matrix[rows] = reflectors.apply_transpose(matrix[rows])
+
+        return matrix
+
+
+#%%
+
+def tsqr(matrix, workers=None):
+    """
+    Tall skinny QR decomposition. The rows of the input are split into blocks
+    that are factored independently in a pool of processes, the R's of the
+    blocks are then combined pairwise in a binary reduction tree.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats, ideally with many more rows than
+        columns. It is not modified.
+    workers : int or None, optional
+        The number of processes, os.cpu_count() by default. There are as many
+        blocks as workers, as long as each block has at least as many rows as
+        there are columns. Small inputs, or workers=1, are factored serially
+        with the same blocks.
+
+    Returns
+    -------
+    R : numpy.ndarray
+        The upper triangular R, with min(r,c) rows.
+    reflectors : TreeReflectors
+        Q in factored form, such that Q^T.matrix has R in its first rows and
+        zeros below.
+    max_lower_triangle : float
+        The largest floating point error left in the lower triangles over all
+        the blocks and nodes.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.TSQR import tsqr
+    >>> M = np.random.rand(1000000,8)
+    >>> R, reflectors, err = tsqr(M, workers=4)
+    >>> np.allclose(reflectors.form(8)@R, M)
+    True
+
+    """
+
+    r, c = matrix.shape
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    nblocks = max(1,min(workers,r//max(c,1)))
+    bounds = [r*i//nblocks for i in range(nblocks+1)]
+    blocks = [matrix[bounds[i]:bounds[i+1]] for i in range(nblocks)]
+
+    if nblocks == 1 or r*c < min_parallel_size:
+        factored = list(map(factor_block, blocks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers,nblocks)) as pool:
+            factored = list(pool.map(factor_block, blocks))
+
+    leaves = []
+    nodes = []
+    max_lower_triangle = 0.
+    for i, (R, reflectors, err) in enumerate(factored):
+        leaves.append((bounds[i], bounds[i+1], reflectors))
+        nodes.append((np.arange(bounds[i],bounds[i]+R.shape[0]), R))
+        max_lower_triangle = max(max_lower_triangle, err)
+
+    # every block has at least c rows, so the rows of the final R are the first c
+    # rows of the matrix
+    levels = []
+    while len(nodes) > 1:
+        level = []
+        combined = []
+        for i in range(0,len(nodes)-1,2):
+            rows = np.concatenate((nodes[i][0],nodes[i+1][0]))
+            R, reflectors, err = factor_block(np.vstack((nodes[i][1],nodes[i+1][1])))
+            level.append((rows, reflectors))
+            combined.append((rows[:R.shape[0]], R))
+            max_lower_triangle = max(max_lower_triangle, err)
+
+        if len(nodes) % 2 == 1:
+            combined.append(nodes[-1])
+
+        levels.append(level)
+        nodes = combined
+
+    return nodes[0][1], TreeReflectors(leaves, levels, r), max_lower_triangle
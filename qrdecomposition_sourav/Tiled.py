@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for the tiled QR decomposition, its kernels run by a pool of threads in the order of their dependencies"""
+
+
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from .Householder import factor_blocked, unit_panel, block_T, apply_block, apply_block_transpose
+
+
+default_tile_size = 256     # large enough for the matrix products to dominate the Python overhead
+inner_block_size = 32       # the panels within a tile, as with method='blocked'
+
+
+#%%
+
+class Scheduler:
+    """
+    A dependency graph of tasks, inserted in the order a sequential program
+    would run them, and run by a pool of threads as soon as the tasks they
+    depend on are done. The dependencies are inferred from the data each task
+    reads and writes, named by any hashable: a task waits for the last task
+    that wrote what it reads or writes, and for the tasks that read what it
+    writes since it was last written.
+
+    Examples
+    --------
+    >>> from QRdecomp.Tiled import Scheduler
+    >>> out = []
+    >>> graph = Scheduler()
+    >>> graph.insert(lambda: out.append('a'), writes=['x'])
+    >>> graph.insert(lambda: out.append('b'), writes=['y'])
+    >>> graph.insert(lambda: out.append('c'), reads=['x','y'])
+    >>> graph.run(workers=2)
+    >>> out[-1]
+    'c'
+
+    """
+
+    def __init__(self):
+        self.tasks = []
+        self.successors = []
+        self.ndependencies = []
+        self.writer = {}
+        self.readers = {}
+
+
+    def insert(self, task, reads=(), writes=()):
+        """
+        Adds the function task, called with no arguments, which reads and
+        writes the data named in reads and writes.
+        """
+
+        index = len(self.tasks)
+        dependencies = set()
+        for name in reads:
+            if name in self.writer:
+                dependencies.add(self.writer[name])
+
+        for name in writes:
+            if name in self.writer:
+                dependencies.add(self.writer[name])
+            dependencies.update(self.readers.get(name, ()))
+
+        for name in reads:
+            self.readers.setdefault(name, []).append(index)
+
+        for name in writes:
+            self.writer[name] = index
+            self.readers[name] = []
+
+        dependencies.discard(index)
+        self.tasks.append(task)
+        self.successors.append([])
+        self.ndependencies.append(len(dependencies))
+        for dependency in dependencies:
+            self.successors[dependency].append(index)
+
+
+    def run(self, workers=None):
+        """
+        Runs all the tasks in a pool of workers threads, os.cpu_count() by
+        default, and returns when they are done. Of the tasks ready at the same
+        time, those inserted first are started first. An exception raised by a
+        task is raised again here once the running tasks are done.
+        """
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        remaining = list(self.ndependencies)
+        ready = [index for index, count in enumerate(remaining) if count == 0]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while ready or running:
+                ready.sort(reverse=True)
+                while ready:
+                    index = ready.pop()
+                    running[pool.submit(self.tasks[index])] = index
+
+                done, pending = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    future.result()
+                    for successor in self.successors[index]:
+                        remaining[successor] -= 1
+                        if remaining[successor] == 0:
+                            ready.append(successor)
+
+
+#%%
+
+def geqrt(tile):
+    """
+    Factors a diagonal tile in place, leaving R in its upper triangle and zeros
+    below, and returns the u vectors, the T of their compact WY form and the
+    floating point error.
+    """
+
+    tau, T, max_lower_triangle = factor_blocked(tile, inner_block_size)
+    V = unit_panel(tile)[:,:len(tau)]       # a tile of the last row can be wider than tall
+    tile[:] = np.triu(tile)
+
+    return V, block_T(V, tau), max_lower_triangle
+
+
+
+def tsqrt(top, bottom):
+    """
+    Factors the triangle of the diagonal tile top stacked over the tile bottom,
+    leaving the R of the two in top and zeros in bottom. As the triangle has
+    zeros below its diagonal, the u vectors are those of the identity over the
+    rows of top, and only their rows in bottom are returned, with the T of 
+    their compact WY form and the floating point error.
+    """
+
+    stacked = np.asfortranarray(np.vstack((np.triu(top),bottom)))
+    tau, T, max_lower_triangle = factor_blocked(stacked, inner_block_size)
+    V = unit_panel(stacked)
+
+    top[:] = np.triu(stacked[:top.shape[0]])
+    bottom[:] = 0.
+
+    return V[top.shape[0]:], block_T(V, tau), max_lower_triangle
+
+
+
+def tsmqr(V, T, top, bottom):
+    """
+    Applies the transpose of the transforms of tsqrt, whose u vectors are the
+    identity over V, to the tiles top and bottom stacked, in place. The 
+    identity is never multiplied.
+    """
+
+    W = T.T@(top[:V.shape[1]] + V.T@bottom)
+    top[:V.shape[1]] -= W
+    bottom -= V@W
+
+
+
+def tsmqr_forward(V, T, top, bottom):
+    """
+    Applies the transforms of tsqrt themselves, as tsmqr applies their transpose.
+    """
+
+    W = T@(top[:V.shape[1]] + V.T@bottom)
+    top[:V.shape[1]] -= W
+    bottom -= V@W
+
+
+#%%
+
+class TiledReflectors:
+    """
+    The factored form of the Q of a tiled QR decomposition: for each step k in
+    turn, the compact WY transforms of the diagonal tile, acting on the rows of
+    the k-th row of tiles, then those of each tile below it, acting on the rows
+    of the two tiles stacked. It has the same methods as
+    QRdecomp.Householder.Reflectors.
+
+    Parameters
+    ----------
+    steps : list
+        Tuples (top, bottom, V, T), in the order the transforms were computed.
+        top is the slice of the rows of the diagonal tile, bottom that of the 
+        tile below for the transforms of tsqrt, whose V only holds the rows in
+        bottom, and None for those of geqrt.
+    nrows : int
+        The number of rows of Q.
+    dtype : numpy.dtype
+        The dtype of Q.
+
+    """
+
+    def __init__(self, steps, nrows, dtype):
+        self.steps = steps
+        self.nrows = nrows
+        self.dtype = dtype
+
+
+    def apply(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with nrows rows, with
+        Q.matrix and returns it.
+        """
+
+        for top, bottom, V, T in reversed(self.steps):
+            if bottom is None:
+                apply_block(V, T, matrix[top])
+            else:
+                tsmqr_forward(V, T, matrix[top], matrix[bottom])
+
+        return matrix
+
+
+    def form(self, ncols, order='C'):
+        """
+        Returns the first ncols columns of Q, in C or Fortran order.
+        """
+
+        return self.apply(np.eye(self.nrows,ncols,dtype=self.dtype,order=order))
+
+
+    def apply_transpose(self, matrix):
+        """
+        Overwrites a two dimensional array of floats, with nrows rows, with
+        Q^T.matrix and returns it.
+        """
+
+        for top, bottom, V, T in self.steps:
+            if bottom is None:
+                apply_block_transpose(V, T, matrix[top])
+            else:
+                tsmqr(V, T, matrix[top], matrix[bottom])
+
+        return matrix
+
+
+#%%
+
+def tiled_qr(matrix, tile_size=default_tile_size, workers=None):
+    """
+    Tiled QR decomposition, as in PLASMA. The matrix is cut into square tiles
+    of dimension tile_size (smaller on the last row and column of tiles), and
+    for each diagonal tile in turn:
+        geqrt factors it,
+        unmqr applies its transforms to the tiles on its right,
+        tsqrt factors its triangle stacked over each tile below it in turn,
+        tsmqr applies those transforms to the pairs of tiles on their right.
+    Each kernel works on one or two tiles, and a Scheduler runs them on a pool
+    of threads as soon as the kernels they depend on are done, so the updates
+    of one step overlap the factorization of the next. numpy releases the GIL
+    in the matrix products the updates are made of.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array of floats, overwritten with R (zeros below its
+        diagonal).
+    tile_size : int, optional
+        The dimension of the tiles, default_tile_size by default.
+    workers : int or None, optional
+        The number of threads, os.cpu_count() by default.
+
+    Returns
+    -------
+    reflectors : TiledReflectors
+        Q in factored form.
+    max_lower_triangle : float
+        The largest floating point error left in the lower triangles of the
+        tiles.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Tiled import tiled_qr
+    >>> M = np.random.rand(4000,4000)
+    >>> R = M.copy(order='F')
+    >>> reflectors, err = tiled_qr(R, 500, workers=8)
+    >>> np.allclose(reflectors.apply(R.copy()), M)
+    True
+
+    """
+
+    r, c = matrix.shape
+    rows = [slice(start,min(start+tile_size,r)) for start in range(0,r,tile_size)]
+    cols = [slice(start,min(start+tile_size,c)) for start in range(0,c,tile_size)]
+    tile = lambda i, j: matrix[rows[i],cols[j]]
+
+    # filled by the kernels, each key by a single one: (i,k) -> (top, bottom, V, T)
+    factors = {}
+    errors = []
+    lock = threading.Lock()
+
+    def record(i, k, factored):
+        V, T, max_lower_triangle = factored
+        with lock:
+            factors[(i,k)] = (rows[k], rows[i] if i != k else None, V, T)
+            errors.append(max_lower_triangle)
+
+    graph = Scheduler()
+    steps = min(len(rows),len(cols))
+    for k in range(steps):
+        graph.insert(lambda k=k: record(k, k, geqrt(tile(k,k))),
+                     writes=[('A',k,k), ('V',k,k)])
+
+        for j in range(k+1,len(cols)):
+            graph.insert(lambda k=k, j=j: apply_block_transpose(*factors[(k,k)][2:], tile(k,j)),
+                         reads=[('V',k,k)], writes=[('A',k,j)])
+
+        for i in range(k+1,len(rows)):
+            graph.insert(lambda i=i, k=k: record(i, k, tsqrt(tile(k,k), tile(i,k))),
+                         writes=[('A',k,k), ('A',i,k), ('V',i,k)])
+
+            for j in range(k+1,len(cols)):
+                graph.insert(lambda i=i, j=j, k=k: tsmqr(*factors[(i,k)][2:], tile(k,j), tile(i,j)),
+                             reads=[('V',i,k)], writes=[('A',k,j), ('A',i,j)])
+
+    graph.run(workers)
+
+    # the transforms in the order of a sequential run, to apply them in that order
+    order = [(i,k) for k in range(steps) for i in range(k,len(rows))]
+
+    return TiledReflectors([factors[key] for key in order], r, matrix.dtype), max(errors, default=0.)
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: sourav
+"""
+
+"""Module for updating a complete or reduced QR decomposition when rows or columns are inserted or deleted, or a rank one term is added"""
+
+
+
+import numpy as np
+
+from .Givens import givens, rotate_rows, rotate_cols
+
+
+#%%
+
+class ExplicitQ:
+    """
+    An explicitly formed Q, with the same methods as QRdecomp.Householder.Reflectors.
+    An updated decomposition has no Householder transforms to go back to.
+
+    As for a reduced QRdecomp.CholQR.CholeskyQ, if Q only has its first n 
+    columns, the matrices it's applied to are zero after their first n rows,
+    and Q^T.matrix is only computed in its first n rows, the others being set
+    to zero.
+
+    Parameters
+    ----------
+    Q : numpy.ndarray
+        A two dimensional array of floats with orthonormal columns, square 
+        for a complete decomposition.
+
+    """
+
+    def __init__(self, Q):
+        self.Q = Q
+
+
+    def apply(self, matrix):
+        """
+        Overwrites a two dimensional array of floats with Q.matrix and returns it.
+        """
+
+        matrix[...] = self.Q@matrix[:self.Q.shape[1]]
+
+        return matrix
+
+
+    def form(self, ncols, order='C'):
+        """
+        Returns the first ncols columns of Q, in C or Fortran order.
+        """
+
+        return self.Q[:,:ncols].copy(order=order)
+
+
+    def apply_transpose(self, matrix):
+        """
+        Overwrites a two dimensional array of floats with Q^T.matrix and returns it.
+        """
+
+        n = self.Q.shape[1]
+        matrix[:n] = self.Q.T@matrix
+        matrix[n:] = 0.
+
+        return matrix
+
+
+#%%
+
+def orthonormal_extension(Q, x):
+    """
+    Returns a unit vector orthogonal to the n < r orthonormal columns of the 
+    r x n matrix Q, along the part of x orthogonal to them, by classical 
+    Gram-Schmidt with one reorthogonalization. If that part is negligible, 
+    x being in the range of Q, the unit vector of the row of smallest norm of
+    Q is used instead, which has at least sqrt(1-n/r) of its norm left.
+    """
+
+    r, n = Q.shape
+    for candidate in [x, np.eye(r,dtype=Q.dtype)[np.argmin(np.einsum('ij,ij->i',Q,Q))]]:
+        w = candidate - Q@(Q.T@candidate)
+        w -= Q@(Q.T@w)
+        norm = np.linalg.norm(w)
+        if norm > np.sqrt(np.finfo(Q.dtype).eps)*np.linalg.norm(candidate):
+            break
+
+    return w/norm
+
+
+#%%
+
+def insert_rows(Q, R, k, rows):
+    """
+    Updates the QR decomposition A = Q.R when rows are inserted into A, in 
+    O(rc) operations per row once Q has been copied, with the new rows in 
+    place, into a matrix of p more rows and columns.
+
+    Parameters
+    ----------
+    Q : numpy.ndarray
+        The first n columns of Q, all r of them for a complete decomposition.
+    R : numpy.ndarray
+        The upper triangular R, of shape (n,c).
+    k : int
+        The new rows are inserted before the k-th row of A.
+    rows : numpy.ndarray
+        A two dimensional array of floats of shape (p,c).
+
+    Returns
+    -------
+    Q, R : numpy.ndarray
+        The decomposition of the matrix with r+p rows, Q with n+p columns, the
+        rows of R after the c-th being zero.
+    max_lower_triangle : float
+        The largest floating point error in the elements zeroed by the rotations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Updates import insert_rows
+    >>> A = np.random.rand(5,3)
+    >>> Q, R = np.linalg.qr(A, 'complete')
+    >>> Q, R, err = insert_rows(Q, R, 2, np.ones((1,3)))
+    >>> np.allclose(Q@R, np.insert(A, 2, 1., axis=0))
+    True
+
+    """
+
+    n, c = R.shape
+    p = rows.shape[0]
+
+    # [[Q, 0],[0, I]].[R; rows], with the rows of Q and I where the rows are
+    # inserted, is the new A, and the rotations only mix columns of Q
+    Qn = np.zeros((Q.shape[0]+p,n+p),dtype=Q.dtype)
+    Qn[:k,:n] = Q[:k]
+    Qn[k+p:,:n] = Q[k:]
+    Qn[k:k+p,n:] = np.eye(p)
+    Rn = np.vstack((R,rows))
+
+    max_lower_triangle = 0.
+    for i in range(n,n+p):
+        for j in range(min(i,c)):
+            cos, sin = givens(Rn[j,j], Rn[i,j])
+            rotate_rows(Rn[:,j:], j, i, cos, sin)
+            rotate_cols(Qn, j, i, cos, sin)
+            max_lower_triangle = max(max_lower_triangle, abs(Rn[i,j]))
+            Rn[i,j] = 0.
+
+    return Qn, Rn, max_lower_triangle
+
+
+#%%
+
+def delete_rows(Q, R, k, p=1):
+    """
+    Updates the QR decomposition A = Q.R when the rows k to k+p-1 are
+    deleted from A, in O(rn) operations per row. If Q isn't square, it's 
+    first given the column of orthonormal_extension(Q, e_k), for e_k to be
+    in its range.
+
+    Parameters
+    ----------
+    Q : numpy.ndarray
+        The first n columns of Q, all r of them for a complete decomposition.
+    R : numpy.ndarray
+        The upper triangular R, of shape (n,c).
+    k : int
+        The first row deleted.
+    p : int, optional
+        The number of rows deleted, 1 by default.
+
+    Returns
+    -------
+    Q, R : numpy.ndarray
+        The decomposition of the matrix with r-p rows, Q with min(n,r-p) 
+        columns.
+    max_lower_triangle : float
+        The largest floating point error in the elements of Q that the rotations
+        zero.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Updates import delete_rows
+    >>> A = np.random.rand(5,3)
+    >>> Q, R = np.linalg.qr(A, 'complete')
+    >>> Q, R, err = delete_rows(Q, R, 1, 2)
+    >>> np.allclose(Q@R, np.delete(A, [1,2], axis=0))
+    True
+
+    """
+
+    Q = Q.copy()
+    R = R.copy()
+
+    max_lower_triangle = 0.
+    for _ in range(p):
+        if Q.shape[1] < Q.shape[0]:
+            e = np.zeros(Q.shape[0],dtype=Q.dtype)
+            e[k] = 1.
+            Q = np.hstack((Q,orthonormal_extension(Q, e)[:,np.newaxis]))
+            R = np.vstack((R,np.zeros((1,R.shape[1]),dtype=R.dtype)))
+            
+        # the rotations reduce the row k of Q to (+-1,0,0,...), R becomes upper
+        # Hessenberg with its first row belonging to the deleted row alone
+        for j in reversed(range(1,Q.shape[1])):
+            cos, sin = givens(Q[k,j-1], Q[k,j])
+            rotate_cols(Q, j-1, j, cos, sin)
+            rotate_rows(R[:,j-1:], j-1, j, cos, sin)
+
+        others = np.arange(Q.shape[0]) != k
+        max_lower_triangle = max(max_lower_triangle, np.amax(np.abs(Q[others,0]),initial=0.))
+        Q = Q[others,1:]
+        R = R[1:]
+
+    return Q, R, max_lower_triangle
+
+
+#%%
+
+def insert_cols(Q, R, k, cols):
+    """
+    Updates the QR decomposition A = Q.R when columns are inserted into A, in
+    O(rn) operations per column. If Q isn't square, it's first given the 
+    columns of orthonormal_extension for the new columns, up to r of them.
+
+    Parameters
+    ----------
+    Q : numpy.ndarray
+        The first n columns of Q, all r of them for a complete decomposition.
+    R : numpy.ndarray
+        The upper triangular R, of shape (n,c).
+    k : int
+        The new columns are inserted before the k-th column of A.
+    cols : numpy.ndarray
+        A two dimensional array of floats of shape (r,p).
+
+    Returns
+    -------
+    Q, R : numpy.ndarray
+        The decomposition of the matrix with c+p columns, Q with min(n+p,r) 
+        columns.
+    max_lower_triangle : float
+        The largest floating point error in the elements zeroed by the rotations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Updates import insert_cols
+    >>> A = np.random.rand(5,3)
+    >>> Q, R = np.linalg.qr(A, 'complete')
+    >>> Q, R, err = insert_cols(Q, R, 0, np.ones((5,1)))
+    >>> np.allclose(Q@R, np.insert(A, 0, 1., axis=1))
+    True
+
+    """
+
+    p = cols.shape[1]
+    extensions = [Q]
+    for i in range(min(p,Q.shape[0]-Q.shape[1])):
+        extensions.append(orthonormal_extension(np.hstack(extensions), cols[:,i])[:,np.newaxis])
+    Q = np.hstack(extensions)       # a copy, even with no extension
+    
+    r = Q.shape[1]
+    R = np.vstack((R,np.zeros((r-R.shape[0],R.shape[1]),dtype=R.dtype)))
+    Rn = np.hstack((R[:,:k],Q.T@cols,R[:,k:]))
+
+    max_lower_triangle = 0.
+    for kk in range(k,min(k+p,r)):
+        # zeroing the new column from the bottom up, with rotations of adjacent
+        # rows, keeps the columns to its right upper triangular
+        for j in reversed(range(kk+1,r)):
+            cos, sin = givens(Rn[j-1,kk], Rn[j,kk])
+            rotate_rows(Rn[:,kk:], j-1, j, cos, sin)
+            rotate_cols(Q, j-1, j, cos, sin)
+            max_lower_triangle = max(max_lower_triangle, abs(Rn[j,kk]))
+            Rn[j,kk] = 0.
+
+    return Q, Rn, max_lower_triangle
+
+
+#%%
+
+def delete_cols(Q, R, k, p=1):
+    """
+    Updates the QR decomposition A = Q.R when the columns k to k+p-1
+    are deleted from A, in O(p(r+c)) operations per remaining column.
+
+    Parameters
+    ----------
+    Q : numpy.ndarray
+        The first n columns of Q, all r of them for a complete decomposition.
+    R : numpy.ndarray
+        The upper triangular R, of shape (n,c).
+    k : int
+        The first column deleted.
+    p : int, optional
+        The number of columns deleted, 1 by default.
+
+    Returns
+    -------
+    Q, R : numpy.ndarray
+        The decomposition of the matrix with c-p columns, the rows of R after
+        the (c-p)-th being zero.
+    max_lower_triangle : float
+        The largest floating point error in the elements zeroed by the rotations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Updates import delete_cols
+    >>> A = np.random.rand(5,3)
+    >>> Q, R = np.linalg.qr(A, 'complete')
+    >>> Q, R, err = delete_cols(Q, R, 0)
+    >>> np.allclose(Q@R, A[:,1:])
+    True
+
+    """
+
+    Q = Q.copy()
+    Rn = np.delete(R, np.arange(k,k+p), axis=1)
+    r, c = Rn.shape
+
+    max_lower_triangle = 0.
+    for kk in range(k,min(c,r-1)):
+        # the columns after the deleted ones have p nonzero subdiagonals
+        for j in reversed(range(kk+1,min(kk+p,r-1)+1)):
+            cos, sin = givens(Rn[j-1,kk], Rn[j,kk])
+            rotate_rows(Rn[:,kk:], j-1, j, cos, sin)
+            rotate_cols(Q, j-1, j, cos, sin)
+            max_lower_triangle = max(max_lower_triangle, abs(Rn[j,kk]))
+            Rn[j,kk] = 0.
+
+    return Q, Rn, max_lower_triangle
+
+
+#%%
+
+def rank1_update(Q, R, u, v):
+    """
+    Updates the QR decomposition A = Q.R to that of A + u.v^T with Givens
+    rotations, in O(rn + nc) operations. If Q isn't square, it's first given
+    the column of orthonormal_extension(Q, u), for u to be in its range.
+
+    Parameters
+    ----------
+    Q : numpy.ndarray
+        The first n columns of Q, all r of them for a complete decomposition.
+    R : numpy.ndarray
+        The upper triangular R, of shape (n,c).
+    u : numpy.ndarray
+        A one dimensional array of r floats.
+    v : numpy.ndarray
+        A one dimensional array of c floats.
+
+    Returns
+    -------
+    Q, R : numpy.ndarray
+        The decomposition of A + u.v^T, Q with min(n+1,r) columns, the rows of
+        R after the c-th being zero.
+    max_lower_triangle : float
+        The largest floating point error in the elements zeroed by the rotations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.Updates import rank1_update
+    >>> A = np.random.rand(5,3)
+    >>> Q, R = np.linalg.qr(A, 'complete')
+    >>> Q, R, err = rank1_update(Q, R, np.ones(5), np.arange(3.))
+    >>> np.allclose(Q@R, A + np.outer(np.ones(5), np.arange(3.)))
+    True
+
+    """
+
+    if Q.shape[1] < Q.shape[0]:
+        Q = np.hstack((Q,orthonormal_extension(Q, u)[:,np.newaxis]))
+        R = np.vstack((R,np.zeros((1,R.shape[1]),dtype=R.dtype)))
+    else:
+        Q = Q.copy()
+        R = R.copy()
+    r, c = R.shape
+    w = Q.T@u
+
+    # w is rotated to a multiple of e_1 from the bottom up, which leaves R upper
+    # Hessenberg, and the rank one term then only changes the first row of R
+    for j in reversed(range(1,r)):
+        cos, sin = givens(w[j-1], w[j])
+        w[j-1] = cos*w[j-1] + sin*w[j]
+        w[j] = 0.
+        rotate_rows(R[:,max(j-1,0):], j-1, j, cos, sin)
+        rotate_cols(Q, j-1, j, cos, sin)
+
+    R[0] += w[0]*v
+
+    # and the Hessenberg R is brought back to upper triangular
+    max_lower_triangle = 0.
+    for j in range(min(r-1,c)):
+        cos, sin = givens(R[j,j], R[j+1,j])
+        rotate_rows(R[:,j:], j, j+1, cos, sin)
+        rotate_cols(Q, j, j+1, cos, sin)
+        max_lower_triangle = max(max_lower_triangle, abs(R[j+1,j]))
+        R[j+1,j] = 0.
+
+    return Q, R, max_lower_triangle
@@ -2,3 +2,35 @@ from .main import QRdecomposition
 
 # that's the only class in the main module, and the only thing we want from this package pretty much
 # we can now use it like QRdecomp.QRdecomposition() without having to refer to the module main
+
+from .Batched import batched_QR
+
+# for stacks of matrices, QRdecomp.batched_QR() decomposes all of them in one go
+
+from .Streaming import StreamingQR, streaming_QR
+
+# for matrices too large for memory, fed a block of rows at a time
+
+from .Cache import enable_cache, disable_cache, clear_cache, cache_info
+
+# an opt-in process wide cache, so the same matrix isn't decomposed twice
+
+from .Result import QRResult, qr
+
+# the lightweight path for many small matrices, with no checks or messages
+
+from .Parallel import factor_many
+
+# many independent matrices in a pool of processes, through shared memory
+
+from .Async import qr_async
+
+# to await a decomposition in an asyncio event loop without blocking it
+
+from .Dispatch import calibrate_backends, set_backend_rules
+
+# the rules of method='auto', tuned on the host by timing the backends
+
+from .Randomized import randomized_qr
+
+# a rank k approximation from a random sketch, for when only the leading range is needed
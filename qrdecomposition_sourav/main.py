@@ -6,10 +6,18 @@
 
      
 import numpy as np
-import copy
 
 from . import CustomExceptions
-from .Householder import Householder
+from .Householder import factor_in_place, factor_blocked, factor_pivoted, Reflectors
+from .TSQR import tsqr
+from .Tiled import tiled_qr, default_tile_size
+from .CholQR import cholqr2, CholeskyQ
+from . import Dispatch
+from . import Givens
+from . import Cache
+from .Persistence import save_state, load_state
+from .Storage import pack_triu, packed_back_substitution, from_band, pack_band
+from .Updates import ExplicitQ, insert_rows, delete_rows, insert_cols, delete_cols, rank1_update
 
 
 #%%
@@ -105,6 +113,113 @@ def order10(flo):
 
 
 
+#%%
+
+def back_substitution(R, B):
+    """
+    Solves the upper triangular system R.X = B by back substitution, for all
+    the columns of B at once.
+
+    Parameters
+    ----------
+    R : numpy.ndarray
+        A square, upper triangular two dimensional array of floats with no zero
+        on its diagonal. Its lower triangle is never read.
+    B : numpy.ndarray
+        A one or two dimensional array of floats with as many rows as R. Each 
+        column is a right hand side.
+
+    Returns
+    -------
+    X : numpy.ndarray
+        An array of floats with the same shape as B. Solving for k right hand
+        sides costs O(n^2 k) for R of dimension n.
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.main import back_substitution
+    >>> R = np.array([[2.,1.],[0.,4.]])
+    >>> back_substitution(R, np.array([3.,4.]))
+    array([1., 1.])
+    >>> back_substitution(R, np.array([[3.,1.],[4.,8.]]))
+    array([[ 1. , -0.5],
+           [ 1. ,  2. ]])
+    """
+    
+    X = np.array(B,dtype=R.dtype)
+    
+    for i in reversed(range(R.shape[0])):
+        X[i] -= R[i,i+1:]@X[i+1:]
+        X[i] /= R[i,i]
+        
+    return X
+
+
+
+#%%
+
+def placeholder(shape, dtype):
+    """
+    A read-only array of zeros of the given shape and dtype that takes no 
+    memory, all its elements being the same one, for a decomposition whose 
+    input isn't available.
+    
+    Examples
+    --------
+    >>> from QRdecomp.main import placeholder
+    >>> A = placeholder((1000,1000), 'float64')
+    >>> A.shape, A.strides
+    ((1000, 1000), (0, 0))
+    
+    """
+    
+    return np.broadcast_to(np.zeros((),dtype=dtype), shape)
+
+
+
+#%%
+
+def triu(matrix, order='C'):
+    """
+    Returns a copy of the upper triangle of a matrix in the given memory 
+    layout. Unlike numpy.triu no mask the size of the matrix is built, the 
+    elements below the diagonal are zeroed column by column.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        A two dimensional array.
+    order : {'C','F'} optional
+        Row major (C, default) or column major (Fortran) order for the copy.
+
+    Returns
+    -------
+    out : numpy.ndarray
+        The upper triangle of matrix, with zeros below the diagonal.
+        
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from QRdecomp.main import triu
+    >>> R = triu(np.ones((3,2)), 'F')
+    >>> R
+    array([[1., 1.],
+           [0., 1.],
+           [0., 0.]])
+    >>> R.flags.f_contiguous
+    True
+    """
+    
+    out = np.array(matrix,order=order)
+    
+    for j in range(min(out.shape[0]-1,out.shape[1])):
+        out[j+1:,j] = 0.
+        
+    return out
+
+
+
 #%%
 
 class QRdecomposition:
@@ -115,18 +230,155 @@ class QRdecomposition:
     ----------
     matrix : array_like
         An array (a numpy.ndarray or a list or any other object that's converted 
-        to a numpy.ndarray by numpy.array) of integers or floats. 
+        to a numpy.ndarray by numpy.array) of integers or floats. A numpy.ndarray
+        of the dtype below, or a memoryview or any other object with the buffer
+        protocol holding such floats, is used as it is without being copied, 
+        and shouldn't be modified while the instance is in use.
     mode : {'complete','reduced'} optional
         If mode='complete' (default), a complete QR decomposition is obtained.
         If mode='reduced', we obtain a reduced QR decomposition which is distinct
         from the complete QR decomposition when the number of rows > number of 
         columns in the input matrix.
+    method : {'householder','blocked','tsqr','tiled','cholqr2','givens','lapack','auto'} optional
+        If method='householder' (default), the Householder transforms are 
+        applied one column at a time as rank one updates, whatever the 
+        structure of a dense input. An input in band storage is factored with
+        Givens rotations instead, as with method='givens'.
+        If method='blocked', the Householder transforms of each panel of 
+        block_size columns are gathered into the compact WY form I - V.T.V^T 
+        and the rest of the matrix is updated with matrix products, which is 
+        much faster for large matrices.
+        If method='tsqr', for matrices with many more rows than columns, the 
+        rows are split into blocks factored in parallel by a pool of worker
+        processes and the R's of the blocks are combined in a reduction tree.
+        Q is kept implicitly as the Householder transforms of the blocks and 
+        of the tree. Small inputs are factored serially.
+        If method='tiled', for large matrices, the matrix is cut into square
+        tiles of dimension block_size, and the Householder transforms of each
+        diagonal tile, then of its triangle stacked over each tile below it, 
+        are applied to the tiles on their right as soon as those are ready, by
+        a pool of threads (see QRdecomp.Tiled), so all the cores are used.
+        If method='cholqr2', for well-conditioned matrices with many more rows
+        than columns, Q and R come from the Cholesky factors of the Gram
+        matrix A^T.A, twice over (see QRdecomp.CholQR), which is almost all
+        matrix products and doesn't copy the input. Q is kept explicitly, its
+        r-c last columns only computed if they're needed in complete mode. An
+        input too ill-conditioned for it, or with fewer rows than columns, is
+        factored as with method='householder'.
+        If method='givens', the input is factored with Givens rotations 
+        touching the band only, whatever its bandwidth, which takes O(n^2) 
+        operations for an upper Hessenberg matrix. Q is kept as the rotations,
+        4 numbers each. Q and R may differ from those of method='householder'
+        by the signs of the columns of Q and rows of R.
+        If method='lapack', the Householder transforms are those of LAPACK's 
+        geqrf, through numpy.linalg.qr, kept in the same factored form. Q and
+        R may differ from those of method='householder' by the signs of the 
+        columns of Q and rows of R.
+        If method='auto', one of 'householder', 'blocked', 'givens' and 
+        'lapack' is picked for the shape, dtype and structure of the input by 
+        the rules of QRdecomp.Dispatch, which calibrate_backends() tunes on 
+        the host. Upper Hessenberg and banded inputs, whose lower bandwidth is
+        at most QRdecomp.Givens.max_band_fraction of min(r,c), have rules of 
+        their own.
+        backend() tells which one factored the input.
+    block_size : int optional
+        The number of columns in a panel when method='blocked' (and of the
+        transforms applied together when method='lapack'), 32 by default,
+        and the dimension of the tiles when method='tiled', 
+        QRdecomp.Tiled.default_tile_size (256) by default.
+    workers : int optional
+        The number of processes when method='tsqr', and of threads when 
+        method='tiled', os.cpu_count() by default.
+    pivoting : bool optional
+        If pivoting=True, with method='householder' (or 'auto') only, the 
+        column with the largest remaining norm is moved to the front at each 
+        step, the norms being downdated rather than recomputed. The decomposition is then of the
+        permuted matrix, A[:,perm] = Q.R, and it stops once all the remaining 
+        norms are below tol, so its cost scales with the numerical rank. False 
+        by default.
+    tol : float optional
+        The norm below which a remaining column counts as zero when 
+        pivoting=True, eps*max(r,c) times the largest column norm by default.
+    storage : {'dense','packed'} optional
+        If storage='dense' (default), R is kept as a two dimensional array. 
+        If storage='packed', only its upper triangle is kept, column after 
+        column, in n(n+1)/2 floats for a square R (see QRdecomp.Storage.PackedR).
+        Rmatrix() then expands it only when called, and lstsq() and solve() 
+        back substitute on the packed form directly.
+    band : tuple optional
+        If band=(lower,upper) is given, the input is a square matrix in LAPACK
+        style band storage, of shape (lower+upper+1, n), where matrix[upper+i-j,j]
+        holds the element (i,j). None by default. The band is kept as it is,
+        never expanded to the n x n matrix, and the Givens rotations factor it
+        in band storage (see QRdecomp.Givens.factor_band_storage), in 
+        O(n.(2*lower+upper)) memory. R is then stored as the storage option
+        says, packed straight from the band with storage='packed'. Only
+        method='cholqr2', the other Householder methods and the updates work 
+        on the expanded matrix, and overwrite_a doesn't apply.
+    dtype : {'float64','float32'} optional
+        The precision the input is stored and decomposed in, 'float64' by 
+        default. With 'float32' the memory is halved and the Householder 
+        transforms run twice as many elements per vector instruction; Q, R and
+        the solutions are float32, unless lstsq() is asked to refine.
+    order : {'C','F'} optional
+        The memory layout of the Q and R returned, row major (C, default) or 
+        column major (Fortran), to match what they are passed to next. The 
+        layout of the input doesn't matter: it is copied to Fortran order for
+        the Householder transforms, which then read and update contiguous 
+        columns and panels, and to C order for the Givens rotations, which mix 
+        rows. With overwrite_a=True there's no copy, and a Fortran ordered 
+        input is the fastest.
+    overwrite_a : bool optional
+        If overwrite_a=True, the decomposition is performed in place in the 
+        input matrix, so no working copy of its size is allocated (but for 
+        the one numpy.linalg.qr makes with method='lapack'). With 
+        method='householder', 'blocked' and 'lapack' (and 'auto') the input is 
+        left holding R in its upper triangle and the Householder transforms 
+        below its diagonal, and with method='givens' and 'tiled' holding R 
+        with zeros below its diagonal. method='tsqr' and 'cholqr2' never modify the input, 
+        which they only read, but it's treated as overwritten all the same:
+        it's not referenced for lstsq(b, refine). The decomposition is in 
+        place only if the input is a writeable numpy.ndarray (or buffer) of 
+        the dtype above, otherwise it's converted first and the conversion is
+        overwritten instead. False by default. A Fortran ordered input is the
+        fastest to decompose in place.
+        
+        The decompositions are cached while QRdecomp.enable_cache() is on: an
+        input whose content, shape and dtype, with the same options, have been
+        seen before is not decomposed again, and its R (and Q, once formed) is
+        shared, read-only, between the instances. Inputs decomposed with 
+        overwrite_a=True are never cached.
         
     Raises
     ------
     'The mode is unrecognized, please choose a valid mode.'
         If mode not in {'complete','reduced'}.
         
+    'The method is unrecognized, please choose a valid method.'
+        If method not in {'householder','blocked','tsqr','tiled','cholqr2','givens','lapack','auto'}.
+        
+    'The block size has to be a positive integer.'
+        If block_size is neither None nor a positive integer.
+        
+    'The number of workers has to be a positive integer.'
+        If workers is neither None nor a positive integer.
+        
+    'Column pivoting is only available with method='householder'.'
+        If pivoting=True with another method.
+        
+    'The storage is unrecognized, please choose a valid storage.'
+        If storage not in {'dense','packed'}.
+        
+    'The dtype has to be float32 or float64.'
+        If dtype is another type.
+        
+    'The order is unrecognized, please choose 'C' or 'F'.'
+        If order not in {'C','F'}.
+        
+    'The band storage doesn't match the bandwidths.'
+        If band isn't a pair of non-negative integers with lower+upper+1 equal
+        to the number of rows of matrix.
+        
     'Sorry, we can only work with a two dimensional matrix!'   
         If the input matrix is not two dimensional.
         
@@ -178,16 +430,82 @@ class QRdecomposition:
     Sorry, we can only work with a two dimensional matrix!
     """
     
-    def __init__(self, matrix, mode='complete'):
+    # a fixed set of attributes, without a __dict__ per instance, the ones computed
+    # on demand being None until then
+    __slots__ = ('__array', '__mode', '__method', '__block_size', '__workers', '__pivoting', '__tol', 
+                 '__storage', '__overwrite', '__order', '__source', '__key', '__Q', '__R', '__reflectors', 
+                 '__max_lower_triangle', '__perm', '__rank', '__fperror', '__loaded', '__backend', '__band')
+    
+    def __init__(self, matrix, mode='complete', method='householder', block_size=None, workers=None, pivoting=False, tol=None, storage='dense', band=None, dtype='float64', overwrite_a=False, order='C'):
+        self.__Q = None
+        self.__R = None
+        self.__rank = None
+        self.__key = None
+        self.__loaded = False
+        self.__backend = None
+        self.__band = None
+        
         try:
             if mode not in ['complete','reduced']:
                 raise CustomExceptions.ModeUnrecognized
                 
-            arrayQ = np.array(matrix,dtype='float64')   
+            if method not in ['householder','blocked','tsqr','tiled','cholqr2','givens','lapack','auto']:
+                raise CustomExceptions.MethodUnrecognized
+                
+            if not (block_size is None or (isinstance(block_size, (int, np.integer)) and block_size > 0)):
+                raise CustomExceptions.BlockSizeInvalid
+                
+            if not (workers is None or (isinstance(workers, (int, np.integer)) and workers > 0)):
+                raise CustomExceptions.WorkersInvalid
+                
+            if pivoting and method not in ['householder','auto']:
+                raise CustomExceptions.PivotingUnsupported
+                
+            if storage not in ['dense','packed']:
+                raise CustomExceptions.StorageUnrecognized
+                
+            # numpy raises a TypeError of its own for what isn't a dtype at all
+            try:
+                supported = np.dtype(dtype) in [np.float32, np.float64]
+            except TypeError:
+                supported = False
+            if not supported:
+                raise CustomExceptions.DtypeUnsupported
+                
+            if order not in ['C','F']:
+                raise CustomExceptions.OrderUnrecognized
+                
+            arrayQ = np.asarray(matrix,dtype=dtype)     # no copy if it's already an array of floats
+            if overwrite_a and not arrayQ.flags.writeable:
+                arrayQ = arrayQ.copy()
             
+            if band is not None and arrayQ.ndim == 2:
+                if not (len(band) == 2 and all(isinstance(b, (int, np.integer)) and b >= 0 for b in band) 
+                        and arrayQ.shape[0] == band[0]+band[1]+1):
+                    raise CustomExceptions.BandInvalid
+                
+                # the band is factored as it is, the input matrix only keeps 
+                # its shape and dtype as for a loaded decomposition
+                self.__band = (arrayQ, int(band[0]), int(band[1]))
+                arrayQ = placeholder((arrayQ.shape[1],)*2, arrayQ.dtype)
+                
             if arrayQ.ndim == 2:
                 self.__array = arrayQ
                 self.__mode = mode
+                self.__method = method
+                if block_size is None:
+                    block_size = default_tile_size if method=='tiled' else 32
+                self.__block_size = int(block_size)
+                self.__workers = workers
+                self.__pivoting = bool(pivoting)
+                self.__tol = tol
+                self.__storage = storage
+                self.__overwrite = bool(overwrite_a) and band is None
+                self.__order = order
+                
+                # only referenced, not copied, to compute the residuals of 
+                # lstsq(b, refine) in float64
+                self.__source = matrix if band is None else None
             else:
                 raise CustomExceptions.DimensionError
                 
@@ -195,6 +513,38 @@ class QRdecomposition:
             print('The mode is unrecognized, please choose a valid mode.')
             print()
             
+        except CustomExceptions.MethodUnrecognized:
+            print('The method is unrecognized, please choose a valid method.')
+            print()
+            
+        except CustomExceptions.BlockSizeInvalid:
+            print('The block size has to be a positive integer.')
+            print()
+            
+        except CustomExceptions.WorkersInvalid:
+            print('The number of workers has to be a positive integer.')
+            print()
+            
+        except CustomExceptions.PivotingUnsupported:
+            print("Column pivoting is only available with method='householder'.")
+            print()
+            
+        except CustomExceptions.StorageUnrecognized:
+            print('The storage is unrecognized, please choose a valid storage.')
+            print()
+            
+        except CustomExceptions.DtypeUnsupported:
+            print('The dtype has to be float32 or float64.')
+            print()
+            
+        except CustomExceptions.OrderUnrecognized:
+            print("The order is unrecognized, please choose 'C' or 'F'.")
+            print()
+            
+        except CustomExceptions.BandInvalid:
+            print("The band storage doesn't match the bandwidths.")
+            print()
+            
         except CustomExceptions.DimensionError:
             print('Sorry, we can only work with a two dimensional matrix!')
             print()
@@ -235,6 +585,12 @@ class QRdecomposition:
             If mode='complete', R has the same dimensions as the input matrix.
             
             If mode='reduced', and r>c, then R is a square matrix with dimension c.
+            
+            If pivoting=True, R is that of A[:,perm], truncated to zero below 
+            its first rank() rows.
+            
+        perm : numpy.ndarray
+            Only if pivoting=True, the column permutation, see permutation().
            
         See Also
         --------
@@ -252,12 +608,12 @@ class QRdecomposition:
                [4, 2, 0],
                [3, 2, 1]])
         >>> QRdecomposition(M1).QR()
-        (array([[ 1.        ,  0.        ,  0.        ],
-                [ 0.        , -0.70710678,  0.70710678],
-                [ 0.        , -0.70710678, -0.70710678]]),
-         array([[ 0.        ,  4.        ,  1.        ],
-                [ 0.        , -2.82842712, -0.70710678],
-                [ 0.        ,  0.        , -0.70710678]]))
+        (array([[ 0.        ,  0.99503719,  0.09950372],
+                [ 0.8       , -0.05970223,  0.59702231],
+                [ 0.6       ,  0.07960298, -0.79602975]]),
+         array([[ 5.        ,  2.8       ,  0.6       ],
+                [ 0.        ,  4.01995025,  1.07464017],
+                [ 0.        ,  0.        , -0.69652603]]))
         >>> M2=np.triu(np.random.rand(4,4))
         >>> M2
         array([[0.88852557, 0.26433006, 0.42867313, 0.15930436],
@@ -299,50 +655,168 @@ class QRdecomposition:
 
         """
         
-        if '_QRdecomposition__Q' in dir(self):
-            return self.__Q, self.__R                   # saves us computation if this method has been called already for the given instance
+        if self.__Q is not None:
+            if self.__pivoting:
+                return self.__Q, self.__dense_R(), self.__perm
+            return self.__Q, self.__dense_R()           # saves us computation if this method has been called already for the given instance
         else:
-            R = copy.deepcopy(self.__array) 
+            self.__factor()
+            if self.__R is not None:
+                if self.__pivoting:
+                    return self.Qmatrix(), self.__dense_R(), self.__perm
+                return self.Qmatrix(), self.__dense_R()
             
-            max_lower_triangle = np.amax(np.abs(np.tril(R,-1)))
-            try:
-                if max_lower_triangle == 0.:
-                    raise CustomExceptions.Pointless
-                else:
-                    step = 0
-                    size = min(R.shape)
-                    r = R.shape[0]
-                    c = R.shape[1]
-                    Q = np.eye(r)   
+            
+            
+    def __factor(self):
+        """
+        Computes R and the Householder transforms of the QR decomposition, the 
+        latter in factored form, unless this has already been done for the given
+        instance. Q itself is not formed here.
+        """
+        
+        if self.__R is not None:
+            return
+        
+        # the input is hashed before it's factored, and the input overwritten in
+        # place is never cached since its buffer stays the caller's to reuse
+        if Cache.enabled() and not self.__overwrite:
+            self.__key = Cache.content_key(self.__array if self.__band is None else self.__band[0], 
+                                           self.__mode, self.__method, self.__block_size, self.__workers, self.__pivoting, 
+                                           self.__tol, self.__storage, self.__order, self.__band is not None and self.__band[1:])
+            state = Cache.lookup(self.__key)
+            if state is not None:
+                self.__restore(state)
+                return
+        
+        # the bandwidths tell upper triangular, Hessenberg and banded inputs apart,
+        # in band storage the lower one is that of the last nonzero subdiagonal
+        if self.__band is None:
+            lower, upper = Givens.bandwidths(self.__array)
+        else:
+            band, lower, upper = self.__band
+            n = band.shape[1]
+            lower = max([d for d in range(1,lower+1) if np.any(band[upper+d,:n-d])], default=0)
+            
+        try:
+            if lower == 0:
+                raise CustomExceptions.Pointless
+            else:
+                r, c = self.__array.shape
+                size = min(r,c)
+                banded = lower <= max(1,Givens.max_band_fraction*size)
+                
+                # CholeskyQR2 only reads the input, and an input too ill-conditioned
+                # for it is factored as with method='householder' instead
+                method = self.__method
+                if method=='auto':
+                    method = Dispatch.select(self.__array.shape, self.__array.dtype, banded, self.__pivoting)
                     
-                    for step in range(size):
-                        Rredu = R[step:,step:,]
-                        Hredu = Householder(Rredu,r-step)
-                        
-                        np.matmul(Hredu,Rredu, out=Rredu)
-                        
-                        H = pad(Hredu,step)
-                        np.matmul(Q,H , out=Q)
-                                                
-                        step +=1
+                cholesky = None
+                if method=='cholqr2':
+                    cholesky = cholqr2(self.__input())
+                    if cholesky is None:
+                        method = 'householder'
                         
-                    if self.__mode=='complete':
-                        self.__Q = Q
-                        self.__R = np.triu(R)
-                        
-                       
-                    elif self.__mode=='reduced':
-                        self.__Q = Q[:,:c]
-                        self.__R = np.triu(R[:c,:])
-                        
-                    self.__Runchanged = R
-                        
-                                             
-                    return self.__Q, self.__R  
+                # a dense input keeps the Householder transforms it asked for, 
+                # signs included, only band storage is rotated by default
+                rotated = method=='givens' or (method=='householder' and self.__band is not None and not self.__pivoting)
+                self.__backend = 'givens' if rotated else method
                 
-            except CustomExceptions.Pointless:
-                print('Dummy! The matrix is already upper triangular.')
-                print()
+                # the Givens rotations mix rows and the Householder transforms 
+                # work on columns, the working copy is laid out to match, while
+                # with overwrite_a the input itself is factored, never copied,
+                # and the rotations work on band storage directly
+                in_band = rotated and self.__band is not None
+                if self.__overwrite:
+                    R = self.__array
+                    self.__source = None
+                elif self.__band is not None and not in_band and cholesky is None:
+                    R = np.asarray(self.__input(),order='F')
+                elif cholesky is None and not in_band:
+                    R = np.array(self.__array,order='C' if rotated else 'F')
+                
+                if cholesky is not None:
+                    # Q comes out explicitly, the error recorded is the departure
+                    # of its columns from unit norm as R has no lower triangle
+                    Q, R, self.__max_lower_triangle = cholesky
+                    self.__reflectors = CholeskyQ(Q, self.__mode=='complete')
+                    R = np.vstack((R, np.zeros((r-c,c),dtype=R.dtype)))
+                    
+                elif in_band:
+                    # R comes out in band storage, with the lower+upper 
+                    # superdiagonals the rotations fill in
+                    R, self.__reflectors, self.__max_lower_triangle = Givens.factor_band_storage(band, lower, upper)
+                    
+                elif rotated:
+                    # the rotations only ever touch the band of R, and the error
+                    # is recorded as the subdiagonal elements are zeroed
+                    self.__reflectors, self.__max_lower_triangle = Givens.factor_banded(R, lower, upper)
+                    
+                elif self.__pivoting:
+                    # the reflectors stop at the numerical rank k, and the rows
+                    # of R after it only hold what is below the tolerance
+                    V, tau, self.__perm = factor_pivoted(R, self.__tol)
+                    self.__reflectors = Reflectors(V, tau)
+                    self.__rank = len(tau)
+                    self.__max_lower_triangle = np.amax(np.abs(np.tril(R,-1)[:,:self.__rank]),initial=0.)
+                    R[self.__rank:,:] = 0.
+                    
+                elif method=='householder':
+                    # only the reflectors are kept, below the diagonal of R, the 
+                    # Householder matrices are never formed and every update is
+                    # rank one
+                    tau, self.__max_lower_triangle = factor_in_place(R)
+                    self.__reflectors = Reflectors(R, tau, unit=True)
+                    
+                elif method=='lapack':
+                    # LAPACK's geqrf through numpy, which stores the transforms
+                    # below the diagonal as factor_in_place does and zeroes the
+                    # subdiagonal exactly, so there's no error to record
+                    V, tau = np.linalg.qr(R, mode='raw')
+                    R[...] = V.T
+                    self.__reflectors = Reflectors(R, tau, self.__block_size, unit=True)
+                    self.__max_lower_triangle = 0.
+                    
+                elif method=='blocked':
+                    # rank one updates within each panel only, the trailing
+                    # columns are then updated with matrix products
+                    tau, T, self.__max_lower_triangle = factor_blocked(R, self.__block_size)
+                    self.__reflectors = Reflectors(R, tau, self.__block_size, T, unit=True)
+                    
+                elif method=='tsqr':
+                    # the blocks of rows are factored in parallel, R comes back 
+                    # with min(r,c) rows and the error is already recorded
+                    R, self.__reflectors, self.__max_lower_triangle = tsqr(R, self.__workers)
+                    R = np.vstack((R, np.zeros((r-R.shape[0],c),dtype=R.dtype)))
+                    
+                elif method=='tiled':
+                    # the kernels on the tiles run in a pool of threads as their
+                    # dependencies are met, R is left with zeros below its diagonal
+                    self.__reflectors, self.__max_lower_triangle = tiled_qr(R, self.__block_size, self.__workers)
+                    
+                if not self.__pivoting:
+                    self.__perm = np.arange(c)
+                    
+                # packing reads the upper triangle only, there's no dense copy
+                if self.__mode=='reduced':
+                    R = R[:c,:]
+                    
+                if self.__storage=='packed':
+                    self.__R = pack_band(R, lower+upper) if in_band else pack_triu(R)
+                    
+                elif in_band:
+                    self.__R = np.asarray(from_band(R, 0, lower+upper), order=self.__order)
+                    
+                else:
+                    self.__R = triu(R, self.__order)
+                    
+                if self.__key is not None:
+                    Cache.store(self.__key, self.__state())
+            
+        except CustomExceptions.Pointless:
+            print('Dummy! The matrix is already upper triangular.')
+            print()
             
             
             
@@ -350,7 +824,8 @@ class QRdecomposition:
     def Qmatrix(self):
         """
         A QRdecomposition class method to calculate Q from the input matrix.
-        Calls the QR() method if it hasn't already been called.
+        The decomposition is computed if it hasn't already been, and Q is formed
+        from the stored Householder transforms on the first call only.
         
         Raises
         ------
@@ -420,11 +895,30 @@ class QRdecomposition:
                [ 0.29172998, -0.3995801 , -0.66356114]])
 
         """
-        if '_QRdecomposition__Q' in dir(self):
+        if self.__Q is not None:
             return self.__Q
         else:
-            self.QR()
-            if '_QRdecomposition__Q' in dir(self):
+            self.__factor()
+            
+            # Q comes along with the rest from the cache if it has been formed
+            if self.__Q is not None:
+                return self.__Q
+            
+            if self.__R is not None:
+                r, c = self.__array.shape
+                
+                # Q is only formed when asked for, and in reduced mode only its 
+                # first c columns are ever allocated
+                if self.__mode=='complete':
+                    self.__Q = self.__reflectors.form(r, self.__order)
+                    
+                elif self.__mode=='reduced':
+                    self.__Q = self.__reflectors.form(min(r,c), self.__order)
+                    
+                # stored again, Q included, for the next instance with this key
+                if self.__key is not None:
+                    Cache.store(self.__key, self.__state())
+                    
                 return self.__Q
             
             
@@ -432,7 +926,8 @@ class QRdecomposition:
     def Rmatrix(self):
         """
         A QRdecomposition class method to calculate R from the input matrix.
-        Calls the QR() method if it hasn't already been called.
+        The decomposition is computed if it hasn't already been, without 
+        forming Q.
         
         Raises
         ------
@@ -498,71 +993,1042 @@ class QRdecomposition:
                [ 0.        ,  0.        ,  4.19532287]])
 
         """
-        if '_QRdecomposition__R' in dir(self):
-            return self.__R
-        else:
-            self.QR()
-            if '_QRdecomposition__R' in dir(self):
-                return self.__R
+        self.__factor()
+        if self.__R is not None:
+            return self.__dense_R()
             
-        
-    def FloatingPointErrorOrder(self):
+            
+            
+    def Rpacked(self):
         """
-        Gives an estimate of the floating point error involved in the QR decomposition.
-
+        A QRdecomposition class method returning R in packed storage, the 
+        elements on and above its diagonal column after column. With 
+        storage='packed' this is how R is kept, otherwise it's packed from the
+        dense R on every call.
+        
         Raises
         ------
-        'You need to call the method QR() first.'
-            If the QR decomposition of the input matrix hasn't been performed yet.
-
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular.
+            
         Returns
         -------
-        out : string 'The floating point error is at best of the order of 10^<error order>'
-              or string 'There are no floating point errors in the lower triangular elements of R up to the max precision at 0.'  
-              
-              The <error> in the first case is the order to which we neglect the
-              floating point error in producing an upper triangular R, ie the
-              lower triangular 0. elements of R are accurate upto <sign>x. 10^<error order>,
-              where x is single digit.
-              
-              The second case is self-explanatory.
-              
+        out : QRdecomp.Storage.PackedR
+            R in packed storage, out.toarray() expands it.
+            
         Examples
         --------
-        >>> M3 = np.random.randint(10,size=(5,3))
-        >>> M3
-        array([[4, 8, 4],
-               [5, 7, 5],
-               [1, 8, 5],
-               [1, 4, 5],
-               [2, 7, 1]])
-        >>> inst3 = QRdecomposition(M3)
-        >>> inst3.FloatingPointErrorOrder()
-        'The floating point error is at best of the order of 10^-16'            
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> inst = QRdecomposition(np.random.rand(2000,2000), method='blocked', storage='packed')
+        >>> inst.Rpacked().nbytes, inst.Rmatrix().nbytes
+        (16008000, 32000000)
 
         """
-        try:
-            if '_QRdecomposition__R' in dir(self):
-                max_lower_triangle = np.amax(np.abs(np.tril(self.__Runchanged,-1)))
-                if max_lower_triangle > 0.:
-                    self.__fperror = order10(max_lower_triangle)    
-                    return 'The floating point error is at best of the order of 10^%d' %self.__fperror
-                else:
-                    return 'There are no floating point errors in the lower triangular elements of R up to the max precision at 0.'
-            else:
-                raise CustomExceptions.CallQR
         
-        except CustomExceptions.CallQR:
-            print('You need to call the method QR() first.')
-            print()
+        self.__factor()
+        if self.__R is not None:
+            if self.__storage=='packed':
+                return self.__R
+            return pack_triu(self.__R)
+        
+        
+        
+    def __dense_R(self):
+        """
+        Returns R as a two dimensional array, expanding it if it's packed.
+        """
+        
+        if self.__storage=='packed':
+            return self.__R.toarray(self.__order)
+        return self.__R
+    
+    
+    
+    def __back_substitution(self, B):
+        """
+        Solves the top left block of R times X = B, on the packed R if it's 
+        packed, the block having as many rows as B.
+        """
+        
+        if self.__storage=='packed':
+            return packed_back_substitution(self.__R, B)
+        n = B.shape[0]
+        return back_substitution(self.__R[:n,:n], B)
+            
             
             
+    def permutation(self):
+        """
+        A QRdecomposition class method returning the column permutation perm, 
+        such that A[:,perm] = Q.R. The decomposition is computed if it hasn't 
+        already been. Without pivoting this is numpy.arange(c).
+        
+        Raises
+        ------
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular.
             
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.array([[1,2,3],[1,2,3],[1,2,4]])
+        >>> QRdecomposition(A, pivoting=True).permutation()
+        array([2, 1, 0])
+
+        """
+        
+        self.__factor()
+        if self.__R is not None:
+            return self.__perm
+        
+        
+        
+    def rank(self):
+        """
+        A QRdecomposition class method returning the numerical rank found by 
+        the column pivoted decomposition, ie the number of Householder 
+        transforms performed before all the remaining column norms fell below 
+        tol. Without pivoting R reveals no rank, and None is returned.
+        
+        Raises
+        ------
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular.
             
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.outer(np.arange(1,6), np.ones(4)) + np.outer(np.ones(5), np.arange(4))
+        >>> QRdecomposition(A, pivoting=True).rank()
+        2
+
+        """
+        
+        if self.__pivoting:
+            self.__factor()
+            if self.__R is not None:
+                return self.__rank
             
             
             
+    def backend(self):
+        """
+        A QRdecomposition class method returning the backend that factored the
+        input, for logging: 'householder', 'blocked', 'lapack', 'givens', 
+        'tsqr', 'tiled' or 'cholqr2'. This is the one method='auto' picked, 
+        'givens' for the band storage input method='householder' hands over 
+        to the Givens rotations, and 'householder' when method='cholqr2' fell
+        back. 
+        Once insert_rows(), delete_rows(), insert_cols(), delete_cols() or 
+        rank1_update() have updated Q and R with Givens rotations, leaving Q
+        explicit, it's 'updated'. The decomposition is computed if it hasn't
+        already been.
+        
+        Raises
+        ------
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular.
             
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> QRdecomposition(np.random.rand(500,400), method='auto').backend()
+        'lapack'
+        >>> QRdecomposition(np.triu(np.random.rand(2000,2000),-1), method='auto').backend()
+        'givens'
+
+        """
+        
+        self.__factor()
+        if self.__R is not None:
+            return self.__backend
+        
+        
+        
+    def apply_Q(self, X):
+        """
+        A QRdecomposition class method to calculate the product Q.X without 
+        forming Q, by applying the stored Householder transforms to X. This 
+        takes O(rck) operations for X with k columns and no extra memory.
+        
+        Parameters
+        ----------
+        X : array_like
+            A one or two dimensional array of integers or floats. Its number of 
+            rows has to equal the number of columns of Q, ie the number of rows
+            r of the input matrix if mode='complete', and min(r,c) if 
+            mode='reduced'.
+        
+        Raises
+        ------
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular.
             
+        'The shapes of Q and X are not aligned.'
+            If X doesn't have the right number of rows.
+
+        Returns
+        -------
+        out : numpy.ndarray
+            The product Q.X, with r rows and as many dimensions as X.
             
-            
\ No newline at end of file
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> M = np.random.rand(1000000,5)
+        >>> inst = QRdecomposition(M,'reduced')
+        >>> np.allclose(inst.apply_Q(inst.Rmatrix()), M)
+        True
+        >>> inst.apply_Q(np.ones(3))
+        The shapes of Q and X are not aligned.
+
+        """
+        
+        self.__factor()
+        if self.__R is not None:
+            try:
+                X = np.array(X,dtype=self.__array.dtype)
+                r, c = self.__array.shape
+                ncols = r if self.__mode=='complete' else min(r,c)
+                
+                if X.ndim not in [1,2] or X.shape[0] != ncols:
+                    raise CustomExceptions.ShapeMismatch
+                    
+                # in reduced mode Q.X is the complete Q times X padded with zeros
+                out = np.zeros((r,)+X.shape[1:],dtype=X.dtype)
+                out[:ncols] = X
+                
+                return self.__reflectors.apply(out.reshape(r,-1)).reshape(out.shape)
+            
+            except CustomExceptions.ShapeMismatch:
+                print('The shapes of Q and X are not aligned.')
+                print()
+                
+                
+                
+    def apply_Qt(self, X):
+        """
+        A QRdecomposition class method to calculate the product Q^T.X without 
+        forming Q, by applying the stored Householder transforms to X. This 
+        takes O(rck) operations for X with k columns and no extra memory.
+        
+        Parameters
+        ----------
+        X : array_like
+            A one or two dimensional array of integers or floats, with as many 
+            rows as the input matrix.
+        
+        Raises
+        ------
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular.
+            
+        'The shapes of Q and X are not aligned.'
+            If X doesn't have the right number of rows.
+
+        Returns
+        -------
+        out : numpy.ndarray
+            The product Q^T.X, with as many rows as Q has columns and as many 
+            dimensions as X.
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> M = np.random.rand(1000000,5)
+        >>> inst = QRdecomposition(M,'reduced')
+        >>> np.allclose(inst.apply_Qt(M), inst.Rmatrix())
+        True
+        >>> inst.apply_Qt(np.ones(3))
+        The shapes of Q and X are not aligned.
+
+        """
+        
+        self.__factor()
+        if self.__R is not None:
+            try:
+                X = np.array(X,dtype=self.__array.dtype)
+                r, c = self.__array.shape
+                ncols = r if self.__mode=='complete' else min(r,c)
+                
+                if X.ndim not in [1,2] or X.shape[0] != r:
+                    raise CustomExceptions.ShapeMismatch
+                    
+                out = self.__reflectors.apply_transpose(X.reshape(r,-1)).reshape(X.shape)
+                
+                return out[:ncols]
+            
+            except CustomExceptions.ShapeMismatch:
+                print('The shapes of Q and X are not aligned.')
+                print()
+            
+            
+            
+    def solve(self, b, refine=0):
+        """
+        A QRdecomposition class method to solve the linear system A.x = b for a
+        square input matrix A. Q^T.b is computed from the stored Householder 
+        transforms and then R.x = Q^T.b is solved by back substitution, so 
+        repeated solves cost O(n^2) per right hand side.
+        
+        Parameters
+        ----------
+        b : array_like
+            A one or two dimensional array of integers or floats with as many
+            rows as A. Each column of a two dimensional b is a right hand side.
+        refine : int, optional
+            The number of steps of iterative refinement, as for lstsq(). 0 by 
+            default.
+        
+        Raises
+        ------
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular.
+            
+        'solve() needs a square matrix, use lstsq() instead.'
+            If the input matrix is not square.
+            
+        'The shapes of Q and X are not aligned.'
+            If b doesn't have as many rows as A.
+            
+        'The matrix is singular.'
+            If R has a zero on its diagonal, up to floating point errors.
+
+        Returns
+        -------
+        x : numpy.ndarray
+            The solution, with the same shape as b.
+            
+        See Also
+        --------
+        numpy.linalg.solve: numpy provided inbuilt function for linear systems.
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.array([[2,-2,18],[2,1,0],[1,2,0]])
+        >>> QRdecomposition(A).solve([18,3,3])
+        array([1., 1., 1.])
+        >>> QRdecomposition(A[:,:2]).solve([0,3,3])
+        solve() needs a square matrix, use lstsq() instead.
+
+        """
+        
+        try:
+            if self.__array.shape[0] != self.__array.shape[1]:
+                raise CustomExceptions.NotSquare
+                
+            return self.lstsq(b, refine)
+        
+        except CustomExceptions.NotSquare:
+            print('solve() needs a square matrix, use lstsq() instead.')
+            print()
+            
+            
+            
+    def lstsq(self, b, refine=0):
+        """
+        A QRdecomposition class method to find the least squares solution x, 
+        minimizing ||A.x - b||, for an input matrix A with at least as many 
+        rows as columns and of full column rank. Q^T.b is computed from the 
+        stored Householder transforms and then the top square block of R is 
+        solved by back substitution, so repeated solves cost O(rc) per right 
+        hand side.
+        
+        With pivoting=True, A may be rank deficient or have more columns than 
+        rows: the basic solution is returned, with x zero at the columns of A 
+        after the numerical rank in the pivot order.
+        
+        With refine > 0, x is then corrected refine times by x += d, with the 
+        residual b - A.x computed in float64 from the input matrix as it was 
+        given, and d its least squares solution from the stored decomposition.
+        For a decomposition in float32 this gives a solution accurate to 
+        float64 in a few steps, as long as A is not too ill conditioned (about 
+        10^7 at most) and, for more rows than columns, the residual is small.
+        
+        Parameters
+        ----------
+        b : array_like
+            A one or two dimensional array of integers or floats with as many
+            rows as A. Each column of a two dimensional b is a right hand side.
+        refine : int, optional
+            The number of steps of iterative refinement, 0 by default. The 
+            input matrix mustn't have been modified since the decomposition,
+            and can't have been overwritten with overwrite_a=True.
+        
+        Raises
+        ------
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular.
+            
+        'lstsq() needs at least as many rows as columns.'
+            If the input matrix has more columns than rows, without pivoting.
+            
+        'The shapes of Q and X are not aligned.'
+            If b doesn't have as many rows as A.
+            
+        'The matrix is singular.'
+            If R has a zero on its diagonal, up to floating point errors, ie A 
+            is not of full column rank.
+            
+        'refine needs the input matrix, which overwrite_a=True has overwritten.'
+            If refine > 0 with overwrite_a=True.
+            
+        "refine needs the input matrix, which a loaded decomposition doesn't have."
+            If refine > 0 for a decomposition from QRdecomposition.load().
+
+        Returns
+        -------
+        x : numpy.ndarray
+            The least squares solution, with as many rows as A has columns and
+            as many dimensions as b, in float64 if refine > 0 and in the dtype
+            of the decomposition otherwise.
+            
+        See Also
+        --------
+        numpy.linalg.lstsq: numpy provided inbuilt function for least squares.
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.array([[1,0],[1,1],[1,2],[1,3]])
+        >>> inst = QRdecomposition(A,'reduced')
+        >>> inst.lstsq([1,3,5,7])
+        array([1., 2.])
+        >>> inst.lstsq(np.array([[1,0],[3,1],[5,3],[7,3]]))
+        array([[1. , 0.1],
+               [2. , 1.1]])
+        >>> B = np.array([[1,1,2],[1,2,3],[1,3,4],[1,4,5]])
+        >>> QRdecomposition(B, pivoting=True).lstsq([3,5,7,9])
+        array([0., 1., 1.])
+        >>> C = np.random.rand(1000,1000) + 1000*np.eye(1000)
+        >>> inst = QRdecomposition(C, method='blocked', dtype='float32')
+        >>> np.abs(inst.lstsq(C@np.ones(1000)) - 1).max()
+        1.21593475e-05
+        >>> np.abs(inst.lstsq(C@np.ones(1000), refine=2) - 1).max()
+        4.3298697960381105e-15
+
+        """
+        
+        try:
+            r, c = self.__array.shape
+            if r < c and not self.__pivoting:
+                raise CustomExceptions.Underdetermined
+                
+            Qtb = self.apply_Qt(b)
+            if Qtb is not None and self.__pivoting:
+                # the triangular system in the first rank() pivoted columns, 
+                # the others are left at zero
+                k = self.__rank
+                x = np.zeros((c,)+Qtb.shape[1:],dtype=Qtb.dtype)
+                x[self.__perm[:k]] = self.__back_substitution(Qtb[:k])
+                
+            elif Qtb is not None:
+                diagonal = np.abs(self.__R.diagonal()[:c])
+                if np.any(diagonal <= np.finfo(self.__array.dtype).eps*r*np.amax(diagonal)):
+                    raise CustomExceptions.Singular
+                    
+                x = self.__back_substitution(Qtb[:c])
+                
+            if Qtb is not None and refine > 0:
+                # the corrections can be in the working precision, only the 
+                # residuals need float64
+                A = self.__source64()
+                b = np.array(b,dtype='float64')
+                x = x.astype('float64')
+                for _ in range(refine):
+                    x += self.lstsq(b - A@x)
+                    
+            if Qtb is not None:
+                return x
+            
+        except CustomExceptions.Underdetermined:
+            print('lstsq() needs at least as many rows as columns.')
+            print()
+            
+        except CustomExceptions.InputOverwritten:
+            print('refine needs the input matrix, which overwrite_a=True has overwritten.')
+            print()
+            
+        except CustomExceptions.InputUnavailable:
+            print("refine needs the input matrix, which a loaded decomposition doesn't have.")
+            print()
+            
+        except CustomExceptions.Singular:
+            print('The matrix is singular.')
+            print()
+            
+            
+            
+    def __input(self):
+        """
+        Returns the input matrix, expanded if it's given in band storage.
+        """
+        
+        if self.__band is not None:
+            return from_band(*self.__band)
+        return self.__array
+    
+    
+    
+    def __source64(self):
+        """
+        Returns the input matrix in float64 for the residuals of lstsq(), read
+        again from the matrix as given if the decomposition is in float32 and 
+        it hasn't been replaced since.
+        """
+        
+        if self.__overwrite:
+            raise CustomExceptions.InputOverwritten
+            
+        if self.__loaded:
+            raise CustomExceptions.InputUnavailable
+        
+        if self.__source is not None and self.__array.dtype != np.float64:
+            return np.asarray(self.__source,dtype='float64')
+        return self.__input().astype('float64',copy=False)
+    
+    
+    
+    def __state(self):
+        """
+        The attributes of the decomposition, as stored in the cache.
+        """
+        
+        state = {'R': self.__R, 'reflectors': self.__reflectors, 'perm': self.__perm,
+                 'max_lower_triangle': self.__max_lower_triangle, 'rank': self.__rank, 'backend': self.__backend}
+        if self.__Q is not None:
+            state['Q'] = self.__Q
+            
+        return state
+    
+    
+    
+    def __restore(self, state):
+        """
+        Sets the attributes of the decomposition from the state found in the cache.
+        """
+        
+        self.__R = state['R']
+        self.__reflectors = state['reflectors']
+        self.__perm = state['perm']
+        self.__max_lower_triangle = state['max_lower_triangle']
+        self.__rank = state['rank']
+        self.__backend = state.get('backend')       # saved before backends were recorded
+        self.__Q = state.get('Q')
+    
+    
+    
+    def __update(self, update, args, array):
+        """
+        Updates Q and R with one of the functions of the Updates module, called
+        with the extra arguments args, if they have been computed already, and 
+        replaces the input matrix by array.
+        """
+        
+        if self.__pivoting:
+            raise CustomExceptions.PivotingUnsupported
+            
+        if self.__R is not None:
+            Q, R, max_lower_triangle = update(self.Qmatrix(), self.__dense_R(), *args)
+            
+            # a reduced Q may come back with the columns of its extension, 
+            # and R with as many rows, which are zero
+            if self.__mode=='reduced':
+                ncols = min(array.shape)
+                Q, R = Q[:,:ncols], R[:ncols]
+            
+            # there are no Householder transforms for the updated decomposition
+            self.__Q = np.asarray(Q,order=self.__order)
+            self.__R = pack_triu(R) if self.__storage=='packed' else np.asarray(R,order=self.__order)
+            self.__reflectors = ExplicitQ(self.__Q)
+            self.__max_lower_triangle = max(self.__max_lower_triangle, max_lower_triangle)
+            
+            # the columns may have changed in number, never in order
+            self.__perm = np.arange(array.shape[1])
+            self.__backend = 'updated'
+            
+        # a loaded decomposition keeps only the shape and dtype of its input
+        self.__array = placeholder(array.shape, array.dtype) if self.__loaded else array
+        self.__band = None
+        self.__source = None
+        self.__key = None
+        
+        
+        
+    def insert_rows(self, k, rows):
+        """
+        A QRdecomposition class method to insert rows into the input matrix and
+        update Q and R with Givens rotations, in O(rc) operations per row 
+        instead of decomposing again, once Q has been copied into one with p
+        more rows and columns. Both modes are updated, a reduced Q keeping its
+        min(r,c) columns. If the decomposition hasn't been computed yet, only
+        the input matrix is changed.
+        
+        Parameters
+        ----------
+        k : int
+            The rows are inserted before the k-th row, 0 <= k <= r.
+        rows : array_like
+            A one dimensional array (a single row) or a two dimensional array of
+            integers or floats with as many columns as the input matrix.
+        
+        Raises
+        ------
+        'Updating the decomposition needs pivoting=False.'
+            If pivoting=True, the updates don't keep the columns in pivot order.
+            
+        'The shapes of the update and the matrix are not aligned.'
+            If rows doesn't have as many columns as the input matrix.
+            
+        'The index is out of range.'
+            If k is not between 0 and r.
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.random.rand(5,3)
+        >>> inst = QRdecomposition(A)
+        >>> Q, R = inst.QR()
+        >>> inst.insert_rows(2, [1,1,1])
+        >>> np.allclose(inst.Qmatrix()@inst.Rmatrix(), np.insert(A, 2, 1., axis=0))
+        True
+
+        """
+        
+        try:
+            rows = np.array(rows,dtype=self.__array.dtype)
+            if rows.ndim == 1:
+                rows = rows[np.newaxis,:]
+                
+            r, c = self.__array.shape
+            if rows.ndim != 2 or rows.shape[1] != c:
+                raise CustomExceptions.ShapeMismatch
+            if not 0 <= k <= r:
+                raise CustomExceptions.IndexOutOfRange
+                
+            self.__update(insert_rows, (k, rows), np.insert(self.__input(), k, rows, axis=0))
+            
+        except CustomExceptions.PivotingUnsupported:
+            print("Updating the decomposition needs pivoting=False.")
+            print()
+            
+        except CustomExceptions.ShapeMismatch:
+            print('The shapes of the update and the matrix are not aligned.')
+            print()
+            
+        except CustomExceptions.IndexOutOfRange:
+            print('The index is out of range.')
+            print()
+            
+            
+            
+    def delete_rows(self, k, p=1):
+        """
+        A QRdecomposition class method to delete rows from the input matrix and
+        update Q and R with Givens rotations, in O(r^2) operations per row 
+        (O(rc) in reduced mode, Q being first extended by a column orthogonal
+        to it) instead of decomposing again. If the decomposition hasn't been
+        computed yet, only the input matrix is changed.
+        
+        Parameters
+        ----------
+        k : int
+            The first row deleted.
+        p : int, optional
+            The number of rows deleted, 1 by default. At least one row has to 
+            be left.
+        
+        Raises
+        ------
+        'Updating the decomposition needs pivoting=False.'
+            If pivoting=True, the updates don't keep the columns in pivot order.
+            
+        'The index is out of range.'
+            If the rows k to k+p-1 are not all in the matrix, or p is not 
+            positive or all rows would be deleted.
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.random.rand(5,3)
+        >>> inst = QRdecomposition(A)
+        >>> Q, R = inst.QR()
+        >>> inst.delete_rows(1, 2)
+        >>> np.allclose(inst.Qmatrix()@inst.Rmatrix(), np.delete(A, [1,2], axis=0))
+        True
+
+        """
+        
+        try:
+            r = self.__array.shape[0]
+            if not (0 <= k and 0 < p < r and k+p <= r):
+                raise CustomExceptions.IndexOutOfRange
+                
+            self.__update(delete_rows, (k, p), np.delete(self.__input(), np.arange(k,k+p), axis=0))
+            
+        except CustomExceptions.PivotingUnsupported:
+            print("Updating the decomposition needs pivoting=False.")
+            print()
+            
+        except CustomExceptions.IndexOutOfRange:
+            print('The index is out of range.')
+            print()
+            
+            
+            
+    def insert_cols(self, k, cols):
+        """
+        A QRdecomposition class method to insert columns into the input matrix
+        and update Q and R with Givens rotations, in O(r^2) operations per 
+        column (O(rc) in reduced mode, Q being first extended by the columns 
+        orthogonal to it) instead of decomposing again. If the decomposition 
+        hasn't been computed yet, only the input matrix is changed.
+        
+        Parameters
+        ----------
+        k : int
+            The columns are inserted before the k-th column, 0 <= k <= c.
+        cols : array_like
+            A one dimensional array (a single column) or a two dimensional array
+            of integers or floats with as many rows as the input matrix.
+        
+        Raises
+        ------
+        'Updating the decomposition needs pivoting=False.'
+            If pivoting=True, the updates don't keep the columns in pivot order.
+            
+        'The shapes of the update and the matrix are not aligned.'
+            If cols doesn't have as many rows as the input matrix.
+            
+        'The index is out of range.'
+            If k is not between 0 and c.
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.random.rand(5,3)
+        >>> inst = QRdecomposition(A)
+        >>> Q, R = inst.QR()
+        >>> inst.insert_cols(0, np.ones(5))
+        >>> np.allclose(inst.Qmatrix()@inst.Rmatrix(), np.insert(A, 0, 1., axis=1))
+        True
+
+        """
+        
+        try:
+            cols = np.array(cols,dtype=self.__array.dtype)
+            if cols.ndim == 1:
+                cols = cols[:,np.newaxis]
+                
+            r, c = self.__array.shape
+            if cols.ndim != 2 or cols.shape[0] != r:
+                raise CustomExceptions.ShapeMismatch
+            if not 0 <= k <= c:
+                raise CustomExceptions.IndexOutOfRange
+                
+            array = self.__input()
+            self.__update(insert_cols, (k, cols), np.hstack((array[:,:k], cols, array[:,k:])))
+            
+        except CustomExceptions.PivotingUnsupported:
+            print("Updating the decomposition needs pivoting=False.")
+            print()
+            
+        except CustomExceptions.ShapeMismatch:
+            print('The shapes of the update and the matrix are not aligned.')
+            print()
+            
+        except CustomExceptions.IndexOutOfRange:
+            print('The index is out of range.')
+            print()
+            
+            
+            
+    def delete_cols(self, k, p=1):
+        """
+        A QRdecomposition class method to delete columns from the input matrix 
+        and update Q and R with Givens rotations, instead of decomposing again.
+        If the decomposition hasn't been computed yet, only the input matrix is
+        changed.
+        
+        Parameters
+        ----------
+        k : int
+            The first column deleted.
+        p : int, optional
+            The number of columns deleted, 1 by default. At least one column 
+            has to be left.
+        
+        Raises
+        ------
+        'Updating the decomposition needs pivoting=False.'
+            If pivoting=True, the updates don't keep the columns in pivot order.
+            
+        'The index is out of range.'
+            If the columns k to k+p-1 are not all in the matrix, or p is not 
+            positive or all columns would be deleted.
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.random.rand(5,3)
+        >>> inst = QRdecomposition(A)
+        >>> Q, R = inst.QR()
+        >>> inst.delete_cols(0)
+        >>> np.allclose(inst.Qmatrix()@inst.Rmatrix(), A[:,1:])
+        True
+
+        """
+        
+        try:
+            c = self.__array.shape[1]
+            if not (0 <= k and 0 < p < c and k+p <= c):
+                raise CustomExceptions.IndexOutOfRange
+                
+            self.__update(delete_cols, (k, p), np.delete(self.__input(), np.arange(k,k+p), axis=1))
+            
+        except CustomExceptions.PivotingUnsupported:
+            print("Updating the decomposition needs pivoting=False.")
+            print()
+            
+        except CustomExceptions.IndexOutOfRange:
+            print('The index is out of range.')
+            print()
+            
+            
+            
+    def rank1_update(self, u, v):
+        """
+        A QRdecomposition class method to add the rank one term u.v^T to the 
+        input matrix and update Q and R with Givens rotations, in O(r^2 + rc)
+        operations (O(rc) in reduced mode, Q being first extended by a column
+        orthogonal to it) instead of decomposing again. The floating point error 
+        recorded for FloatingPointErrorOrder() takes in the elements zeroed by
+        the rotations. If the decomposition hasn't been computed yet, only the 
+        input matrix is changed.
+        
+        Parameters
+        ----------
+        u : array_like
+            A one dimensional array of integers or floats with as many elements
+            as the input matrix has rows.
+        v : array_like
+            A one dimensional array of integers or floats with as many elements
+            as the input matrix has columns.
+        
+        Raises
+        ------
+        'Updating the decomposition needs pivoting=False.'
+            If pivoting=True, the updates don't keep the columns in pivot order.
+            
+        'The shapes of the update and the matrix are not aligned.'
+            If u or v doesn't have the right length.
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.random.rand(5,3)
+        >>> inst = QRdecomposition(A)
+        >>> Q, R = inst.QR()
+        >>> inst.rank1_update(np.ones(5), [1,2,3])
+        >>> np.allclose(inst.Qmatrix()@inst.Rmatrix(), A + np.outer(np.ones(5), [1,2,3]))
+        True
+        >>> inst.FloatingPointErrorOrder()
+        'The floating point error is at best of the order of 10^-16'
+
+        """
+        
+        try:
+            u = np.array(u,dtype=self.__array.dtype)
+            v = np.array(v,dtype=self.__array.dtype)
+            
+            if u.shape != self.__array.shape[:1] or v.shape != self.__array.shape[1:]:
+                raise CustomExceptions.ShapeMismatch
+                
+            self.__update(rank1_update, (u, v), self.__input() + np.outer(u,v))
+            
+        except CustomExceptions.PivotingUnsupported:
+            print("Updating the decomposition needs pivoting=False.")
+            print()
+            
+        except CustomExceptions.ShapeMismatch:
+            print('The shapes of the update and the matrix are not aligned.')
+            print()
+            
+            
+            
+    def FloatingPointErrorOrder(self):
+        """
+        Gives an estimate of the floating point error involved in the QR decomposition.
+
+        Raises
+        ------
+        'You need to call the method QR() first.'
+            If the QR decomposition of the input matrix hasn't been performed yet.
+
+        Returns
+        -------
+        out : string 'The floating point error is at best of the order of 10^<error order>'
+              or string 'There are no floating point errors in the lower triangular elements of R up to the max precision at 0.'  
+              
+              The <error> in the first case is the order to which we neglect the
+              floating point error in producing an upper triangular R, ie the
+              lower triangular 0. elements of R are accurate upto <sign>x. 10^<error order>,
+              where x is single digit.
+              
+              The second case is self-explanatory.
+              
+              If dtype='float32', the first string goes on with ' in float32, 
+              whose machine epsilon is of the order of 10^-7', the error being 
+              relative to that precision.
+              
+        Examples
+        --------
+        >>> M3 = np.random.randint(10,size=(5,3))
+        >>> M3
+        array([[4, 8, 4],
+               [5, 7, 5],
+               [1, 8, 5],
+               [1, 4, 5],
+               [2, 7, 1]])
+        >>> inst3 = QRdecomposition(M3)
+        >>> inst3.FloatingPointErrorOrder()
+        'The floating point error is at best of the order of 10^-16'            
+
+        """
+        try:
+            if self.__R is not None:
+                if self.__max_lower_triangle > 0.:
+                    self.__fperror = order10(self.__max_lower_triangle)    
+                    if self.__array.dtype != np.float64:
+                        # the same error means much less in float32, its epsilon is given alongside
+                        return 'The floating point error is at best of the order of 10^%d in %s, whose machine epsilon is of the order of 10^%d' %(self.__fperror, self.__array.dtype.name, order10(np.finfo(self.__array.dtype).eps))
+                    return 'The floating point error is at best of the order of 10^%d' %self.__fperror
+                else:
+                    return 'There are no floating point errors in the lower triangular elements of R up to the max precision at 0.'
+            else:
+                raise CustomExceptions.CallQR
+        
+        except CustomExceptions.CallQR:
+            print('You need to call the method QR() first.')
+            print()
+            
+            
+            
+    def save(self, path):
+        """
+        A QRdecomposition class method to save the decomposition, computed first
+        if it hasn't been, to the directory path: R, the Householder transforms
+        (or rotations) in factored form, Q if it has been formed, the column 
+        permutation and the options, each array in its own .npy file and the 
+        rest in meta.json, with the version of the format. The input matrix is 
+        not saved.
+        
+        Raises
+        ------
+        'Dummy! The matrix is already upper triangular.'
+            If the input matrix is already upper triangular, nothing is saved.
+            
+        See Also
+        --------
+        QRdecomposition.load: to load it back.
+        
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> QRdecomposition(np.random.rand(2000,2000)).save('qr_dir')
+        
+        """
+        
+        self.__factor()
+        if self.__R is not None:
+            # numpy integers and floats given as options aren't serializable as they are
+            options = {'shape': list(self.__array.shape), 'dtype': self.__array.dtype.str, 'mode': self.__mode, 
+                       'method': self.__method, 'block_size': int(self.__block_size), 
+                       'workers': None if self.__workers is None else int(self.__workers), 'pivoting': self.__pivoting, 
+                       'tol': None if self.__tol is None else float(self.__tol), 'storage': self.__storage, 'order': self.__order}
+            save_state(path, options, self.__state())
+            
+            
+            
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Loads a decomposition saved by save(), without the input matrix and 
+        without computing anything. By default its arrays are memory-mapped 
+        read-only, so loading takes the same time whatever the size, pages are
+        only read from disk when used, and the processes loading the same 
+        directory share them.
+        
+        Everything works as for the decomposition saved, except lstsq(b, refine)
+        and solve(b, refine) with refine > 0, which need the input matrix.
+
+        Parameters
+        ----------
+        path : str
+            The directory the decomposition was saved to.
+        mmap_mode : {'r','c',None} optional
+            As for numpy.load: 'r' (default) maps the arrays read-only, 'c' 
+            copy on write, and None reads them into memory.
+            
+        Raises
+        ------
+        'The saved decomposition is of an unsupported format version.'
+            If it was saved by an incompatible version of the package.
+
+        Returns
+        -------
+        out : QRdecomposition
+            
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from QRdecomp import QRdecomposition
+        >>> A = np.random.rand(2000,2000)
+        >>> QRdecomposition(A).save('qr_dir')
+        >>> inst = QRdecomposition.load('qr_dir')
+        >>> np.allclose(inst.apply_Q(inst.Rmatrix()), A)
+        True
+        
+        """
+        
+        try:
+            options, state = load_state(path, mmap_mode)
+        
+        except CustomExceptions.FormatUnsupported:
+            print('The saved decomposition is of an unsupported format version.')
+            print()
+            return
+            
+        inst = cls.__new__(cls)
+        inst.__array = placeholder(tuple(options['shape']), options['dtype'])
+        inst.__mode = options['mode']
+        inst.__method = options['method']
+        inst.__block_size = options['block_size']
+        inst.__workers = options['workers']
+        inst.__pivoting = options['pivoting']
+        inst.__tol = options['tol']
+        inst.__storage = options['storage']
+        inst.__order = options['order']
+        inst.__overwrite = False
+        inst.__source = None
+        inst.__key = None
+        inst.__loaded = True
+        inst.__band = None
+        inst.__restore(state)
+        
+        return inst
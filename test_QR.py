@@ -8,9 +8,27 @@
 Some tests for the package qrdecomposition_sourav.
 """
 
+import asyncio
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import pytest
 
 from qrdecomposition_sourav import QRdecomposition as qrs
+from qrdecomposition_sourav import batched_QR
+from qrdecomposition_sourav import TSQR, Givens, Storage, Tiled, CholQR, Dispatch
+from qrdecomposition_sourav import calibrate_backends, set_backend_rules
+from qrdecomposition_sourav import StreamingQR, streaming_QR
+from qrdecomposition_sourav import enable_cache, disable_cache, clear_cache, cache_info
+from qrdecomposition_sourav import qr, QRResult
+from qrdecomposition_sourav import factor_many
+from qrdecomposition_sourav import qr_async, Async
+from qrdecomposition_sourav import randomized_qr
+from qrdecomposition_sourav.CustomExceptions import ModeUnrecognized
+from qrdecomposition_sourav.Streaming import row_blocks
+from qrdecomposition_sourav.Householder import Householder, find_u, find_tau, apply_Householder, apply_Householder_right, factor_pivoted, factor_in_place, Reflectors
 
 def createInstComplete(x):
     return qrs(x)
@@ -21,6 +39,9 @@ def createInstReduced(x):
 def createInstIncorrect(x):
     return qrs(x,'not a mode')
 
+def createInstBlocked(x, mode='complete', block_size=4):
+    return qrs(x, mode, method='blocked', block_size=block_size)
+
 def computeQR(x):
     return qrs(x).QR()
 
@@ -271,3 +292,850 @@ def test_QR_equivalence_modes_more_rows_int():
     
     
     
+M8 = np.random.rand(7,4)
+
+def test_rank_one_update_matches_Householder_matrix():
+    u = find_u(M8, M8.shape[0])
+    H = Householder(M8, M8.shape[0])
+    assert np.allclose(apply_Householder(u, find_tau(u), M8.copy()), H@M8, rtol=rtol_val, atol=atol_val)
+    assert np.allclose(apply_Householder_right(M8.T.copy(), u, find_tau(u)), M8.T@H, rtol=rtol_val, atol=atol_val)
+    
+def test_zero_leading_entry():
+    M = np.array([[0.,1.,2.],[3.,4.,5.],[4.,6.,8.]])       # np.sign(0.) would leave the first column as it is
+    for qr in [createInstComplete(M).QR(), createInstBlocked(M, block_size=2).QR(), batched_QR(np.stack((M,M)))[:2]]:
+        assert np.allclose(qr[0]@qr[1], M, rtol=rtol_val, atol=atol_val) and np.allclose(qr[1], np.triu(qr[1]), atol=atol_val)
+    
+    
+    
+M9 = np.random.rand(40,25)
+
+def test_exception_method(capfd):
+    qrs(M9, method='not a method')
+    out, err = capfd.readouterr()
+    assert out == 'The method is unrecognized, please choose a valid method.\n\n'
+    
+def test_exception_block_size(capfd):
+    createInstBlocked(M9, block_size=0)
+    out, err = capfd.readouterr()
+    assert out == 'The block size has to be a positive integer.\n\n'
+
+def test_blocked_consistency_with_input_complete():
+    qr = createInstBlocked(M9).QR()
+    assert np.allclose(qr[0]@qr[1], M9, rtol=rtol_val, atol=atol_val)
+    
+def test_blocked_consistency_with_input_reduced():
+    qr = createInstBlocked(M9, 'reduced', block_size=7).QR()
+    assert np.allclose(qr[0]@qr[1], M9, rtol=rtol_val, atol=atol_val)
+    
+def test_blocked_equivalence_householder():
+    qr_blocked = createInstBlocked(M9, block_size=6).QR()
+    qr = createInstComplete(M9).QR()
+    assert np.allclose(qr_blocked[0], qr[0], rtol=rtol_val, atol=atol_val) and np.allclose(qr_blocked[1], qr[1], rtol=rtol_val, atol=atol_val)
+    
+def test_blocked_more_columns():
+    qr = createInstBlocked(M9.T, block_size=3).QR()
+    assert np.allclose(qr[0]@qr[1], M9.T, rtol=rtol_val, atol=atol_val) and np.all(np.triu(qr[1]) == qr[1])
+    
+    
+    
+M10 = np.random.rand(20,6,4)
+
+def test_exception_dimension_batched(capfd):
+    batched_QR(M10[0])
+    out, err = capfd.readouterr()
+    assert out == 'Sorry, the batched QR decomposition needs a three dimensional array!\n\n'
+    
+def test_batched_consistency_with_input_complete():
+    q, r, fperror = batched_QR(M10)
+    assert np.allclose(q@r, M10, rtol=rtol_val, atol=atol_val) and q.shape == (20,6,6) and fperror.shape == (20,)
+    
+def test_batched_consistency_with_input_reduced():
+    q, r, fperror = batched_QR(M10, 'reduced')
+    assert np.allclose(q@r, M10, rtol=rtol_val, atol=atol_val) and q.shape == (20,6,4) and r.shape == (20,4,4)
+    
+def test_batched_equivalence_single():
+    q, r, fperror = batched_QR(M10)
+    qr = createInstComplete(M10[3]).QR()
+    assert np.allclose(q[3], qr[0], rtol=rtol_val, atol=atol_val) and np.allclose(r[3], qr[1], rtol=rtol_val, atol=atol_val)
+    
+def test_batched_already_uppertriangular():
+    q, r, fperror = batched_QR(np.triu(M10))
+    assert np.all(q == np.eye(6)) and np.all(r == np.triu(M10)) and np.all(np.isnan(fperror))
+    
+    
+    
+M11 = np.random.rand(30,8)
+X11 = np.random.rand(30,3)
+
+def test_apply_Q_complete():
+    inst = createInstComplete(M11)
+    assert np.allclose(inst.apply_Q(X11), inst.Qmatrix()@X11, rtol=rtol_val, atol=atol_val)
+    
+def test_apply_Qt_complete():
+    inst = createInstBlocked(M11, block_size=3)
+    assert np.allclose(inst.apply_Qt(X11), inst.Qmatrix().T@X11, rtol=rtol_val, atol=atol_val)
+    
+def test_apply_Q_reduced():
+    inst = createInstReduced(M11)
+    assert np.allclose(inst.apply_Q(inst.Rmatrix()), M11, rtol=rtol_val, atol=atol_val)
+    
+def test_apply_Qt_reduced_vector():
+    inst = createInstReduced(M11)
+    assert np.allclose(inst.apply_Qt(X11[:,0]), inst.Qmatrix().T@X11[:,0], rtol=rtol_val, atol=atol_val)
+    
+def test_apply_Q_shape_mismatch(capfd):
+    createInstReduced(M11).apply_Q(X11)
+    out, err = capfd.readouterr()
+    assert out == 'The shapes of Q and X are not aligned.\n\n'
+    
+    
+    
+M12 = np.random.rand(100000,3)      # a complete Q would need 80GB
+
+def test_reduced_Q_economy():
+    qr = createInstReduced(M12).QR()
+    assert qr[0].shape == (100000,3) and np.allclose(qr[0]@qr[1], M12, rtol=rtol_val, atol=atol_val)
+    
+def test_reduced_Q_economy_blocked():
+    q = createInstBlocked(M12, 'reduced', block_size=2).Qmatrix()
+    assert np.allclose(q.transpose()@q, np.eye(M12.shape[1]), rtol=1., atol=atol_val)
+    
+    
+    
+M13 = np.random.rand(6,6)
+M14 = np.random.rand(40,6)
+B14 = np.random.rand(40,3)
+
+def test_solve():
+    x = createInstComplete(M13).solve(B14[:6])
+    assert np.allclose(M13@x, B14[:6], rtol=rtol_val, atol=atol_val)
+    
+def test_solve_not_square(capfd):
+    createInstComplete(M14).solve(B14)
+    out, err = capfd.readouterr()
+    assert out == 'solve() needs a square matrix, use lstsq() instead.\n\n'
+    
+def test_lstsq_complete():
+    x = createInstComplete(M14).lstsq(B14)
+    assert np.allclose(x, np.linalg.lstsq(M14, B14, rcond=None)[0], rtol=rtol_val, atol=atol_val)
+    
+def test_lstsq_reduced_vector():
+    x = createInstReduced(M14).lstsq(B14[:,0])
+    assert np.allclose(x, np.linalg.lstsq(M14, B14[:,0], rcond=None)[0], rtol=rtol_val, atol=atol_val)
+    
+def test_lstsq_singular(capfd):
+    createInstReduced(np.hstack((M14, M14[:,:1]))).lstsq(B14)
+    out, err = capfd.readouterr()
+    assert out == 'The matrix is singular.\n\n'
+    
+    
+    
+M15 = np.random.rand(400,6)
+
+def test_exception_workers(capfd):
+    qrs(M15, method='tsqr', workers=0)
+    out, err = capfd.readouterr()
+    assert out == 'The number of workers has to be a positive integer.\n\n'
+
+def test_tsqr_consistency_with_input_complete():
+    qr = qrs(M15, method='tsqr', workers=5).QR()
+    assert np.allclose(qr[0]@qr[1], M15, rtol=rtol_val, atol=atol_val)
+    
+def test_tsqr_orthogonality_complete():
+    q = qrs(M15, method='tsqr', workers=3).Qmatrix()
+    assert np.allclose(q.transpose()@q, np.eye(M15.shape[0]), rtol=1., atol=atol_val)
+    
+def test_tsqr_equivalence_householder_R():
+    r = qrs(M15, 'reduced', method='tsqr', workers=4).Rmatrix()
+    r_householder = createInstReduced(M15).Rmatrix()
+    assert np.allclose(np.abs(r), np.abs(r_householder), rtol=rtol_val, atol=atol_val)
+    
+def test_tsqr_process_pool(monkeypatch):
+    monkeypatch.setattr(TSQR, 'min_parallel_size', 0)
+    inst = qrs(M15, 'reduced', method='tsqr', workers=2)
+    qr = inst.QR()
+    assert np.allclose(qr[0]@qr[1], M15, rtol=rtol_val, atol=atol_val) and qr[0].shape == (400,6)
+    assert np.allclose(inst.lstsq(M15[:,0]), np.eye(6)[0], rtol=rtol_val, atol=atol_val)
+    
+    
+    
+M16 = np.random.rand(500,7)
+B16 = np.random.rand(500,2)
+
+def test_QR_zero_pivot():
+    M = np.array([[0,4,1],[4,2,0],[3,2,1]])
+    qr = createInstComplete(M).QR()
+    assert np.allclose(qr[0]@qr[1], M, rtol=rtol_val, atol=atol_val)
+
+def test_streaming_R():
+    r = streaming_QR(row_blocks(M16, 30)).Rmatrix()
+    r_householder = createInstReduced(M16).Rmatrix()
+    assert np.allclose(np.abs(r), np.abs(r_householder), rtol=rtol_val, atol=atol_val) and np.all(np.triu(r) == r)
+    
+def test_streaming_lstsq():
+    stream = streaming_QR(row_blocks(M16, 3), row_blocks(B16, 3))
+    x, residuals = np.linalg.lstsq(M16, B16, rcond=None)[:2]
+    assert np.allclose(stream.lstsq(), x, rtol=rtol_val, atol=atol_val)
+    assert np.allclose(stream.residual_norm()**2, residuals, rtol=rtol_val, atol=atol_val)
+    
+def test_streaming_memmap(tmp_path):
+    np.save(tmp_path/'M16.npy', M16)
+    stream = streaming_QR(row_blocks(str(tmp_path/'M16.npy'), 64), row_blocks(M16@np.ones(7), 64))
+    assert np.allclose(stream.lstsq(), np.ones(7), rtol=rtol_val, atol=atol_val) and stream.nrows() == 500
+    
+def test_streaming_rhs_too_short(capfd):
+    assert streaming_QR(row_blocks(M16, 10), row_blocks((M16@np.ones(7))[:60], 10)) is None
+    assert streaming_QR(row_blocks(M16[:60], 10), row_blocks(M16@np.ones(7), 10)) is None
+    out, err = capfd.readouterr()
+    assert out == 2*'The blocks of the matrix and of the right hand side are not aligned.\n\n'
+    
+def test_streaming_shape_mismatch(capfd):
+    stream = StreamingQR()
+    stream.update(M16[:10])
+    stream.update(M16[:10,:3])
+    out, err = capfd.readouterr()
+    assert out == 'The shapes of the block and R are not aligned.\n\n'
+    
+    
+    
+M17 = np.random.rand(9,5)
+
+def test_insert_rows():
+    inst = createInstComplete(M17)
+    inst.QR()
+    inst.insert_rows(3, np.ones((2,5)))
+    qr = inst.QR()
+    assert np.allclose(qr[0]@qr[1], np.insert(M17, [3,3], 1., axis=0), rtol=rtol_val, atol=atol_val) and np.all(np.triu(qr[1]) == qr[1])
+    
+def test_delete_rows():
+    inst = createInstBlocked(M17, block_size=2)
+    inst.QR()
+    inst.delete_rows(2, 3)
+    qr = inst.QR()
+    assert np.allclose(qr[0]@qr[1], np.delete(M17, [2,3,4], axis=0), rtol=rtol_val, atol=atol_val)
+    assert np.allclose(qr[0].transpose()@qr[0], np.eye(6), rtol=1., atol=atol_val)
+    
+def test_insert_cols():
+    inst = createInstComplete(M17)
+    inst.QR()
+    inst.insert_cols(1, np.arange(9))
+    qr = inst.QR()
+    assert np.allclose(qr[0]@qr[1], np.insert(M17, 1, np.arange(9), axis=1), rtol=rtol_val, atol=atol_val) and np.all(np.triu(qr[1]) == qr[1])
+    
+def test_delete_cols_then_lstsq():
+    inst = createInstComplete(M17)
+    inst.QR()
+    inst.delete_cols(0, 2)
+    assert np.allclose(inst.lstsq(M17[:,2:]@np.ones(3)), np.ones(3), rtol=rtol_val, atol=atol_val)
+    
+def test_update_reduced():
+    inst = createInstReduced(M17)
+    inst.QR()
+    A = M17.copy()
+    u, v = np.random.rand(9), np.random.rand(5)
+    updates = [('insert_rows', (4, np.ones((2,5))), lambda A: np.insert(A, [4,4], 1., axis=0)),
+               ('delete_rows', (0, 3), lambda A: A[3:]),
+               ('insert_cols', (1, np.arange(16.).reshape(8,2)), lambda A: np.hstack((A[:,:1], np.arange(16.).reshape(8,2), A[:,1:]))),
+               ('rank1_update', (np.ones(8), np.arange(7.)), lambda A: A + np.outer(np.ones(8), np.arange(7.))),
+               ('delete_cols', (2, 2), lambda A: np.delete(A, [2,3], axis=1)),
+               ('delete_rows', (2, 4), lambda A: np.delete(A, [2,3,4,5], axis=0))]
+    for name, args, expected in updates:
+        getattr(inst, name)(*args)
+        A = expected(A)
+        Q, R = inst.QR()
+        n = min(A.shape)
+        assert Q.shape == (A.shape[0],n) and R.shape == (n,A.shape[1]) and np.all(np.triu(R) == R)
+        assert np.allclose(Q@R, A, rtol=rtol_val, atol=atol_val) and np.allclose(Q.T@Q, np.eye(n), rtol=rtol_val, atol=atol_val)
+    assert np.allclose(inst.apply_Qt(A), Q.T@A, rtol=rtol_val, atol=atol_val) and np.allclose(inst.apply_Q(R), A, rtol=rtol_val, atol=atol_val)
+    
+def test_update_out_of_range(capfd):
+    inst = createInstComplete(M17)
+    inst.delete_cols(3, 3)
+    out, err = capfd.readouterr()
+    assert out == 'The index is out of range.\n\n'
+    
+def test_rank1_update():
+    inst = createInstComplete(M17)
+    inst.QR()
+    u, v = np.random.rand(9), np.random.rand(5)
+    inst.rank1_update(u, v)
+    qr = inst.QR()
+    assert np.allclose(qr[0]@qr[1], M17 + np.outer(u, v), rtol=rtol_val, atol=atol_val) and np.all(np.triu(qr[1]) == qr[1])
+    assert np.allclose(qr[0].transpose()@qr[0], np.eye(9), rtol=1., atol=atol_val)
+    assert inst.FloatingPointErrorOrder().startswith('The floating point error is at best of the order of 10^-1')
+    
+def test_rank1_update_shape_mismatch(capfd):
+    createInstComplete(M17).rank1_update(np.ones(5), np.ones(9))
+    out, err = capfd.readouterr()
+    assert out == 'The shapes of the update and the matrix are not aligned.\n\n'
+    
+    
+    
+M18 = np.random.rand(12,3)@np.random.rand(3,7)     # of rank 3
+
+def test_pivoted_rank():
+    inst = qrs(M18, pivoting=True)
+    Q, R, perm = inst.QR()
+    assert inst.rank() == 3 and np.all(R[3:] == 0.) and sorted(perm) == list(range(7))
+    assert np.allclose(Q@R, M18[:,perm], rtol=rtol_val, atol=atol_val) and np.all(np.triu(R) == R)
+    
+def test_pivoted_order():
+    R = qrs(M18, pivoting=True).Rmatrix()
+    assert np.all(np.diff(np.abs(np.diagonal(R)[:3])) <= 0.)
+    
+def test_factor_pivoted_tol():
+    M = M18.copy()
+    V, tau, perm = factor_pivoted(M, tol=np.inf)
+    assert V.shape == (12,0) and np.all(M == M18)
+    
+def test_pivoted_lstsq():
+    x = qrs(M18, 'reduced', pivoting=True).lstsq(M18@np.ones(7))
+    assert np.allclose(M18@x, M18@np.ones(7), rtol=rtol_val, atol=1e-10) and np.count_nonzero(x) == 3
+    
+def test_pivoting_unsupported(capfd):
+    qrs(M18, method='blocked', pivoting=True)
+    out, err = capfd.readouterr()
+    assert out == "Column pivoting is only available with method='householder'.\n\n"
+    
+    
+    
+M19 = np.triu(np.random.rand(40,40),-1) + 40*np.eye(40)      # upper Hessenberg
+M20 = np.triu(np.tril(np.random.rand(60,50),4),-3)          # banded, tall
+
+def test_bandwidths():
+    assert Givens.bandwidths(M19) == (1,39) and Givens.bandwidths(M20) == (3,4) and Givens.bandwidths(np.zeros((3,3))) == (0,0)
+
+def test_givens_hessenberg():
+    inst = qrs(M19, method='givens')
+    qr = inst.QR()
+    assert np.allclose(qr[0]@qr[1], M19, rtol=rtol_val, atol=atol_val) and np.all(np.triu(qr[1]) == qr[1])
+    assert np.allclose(qr[0].transpose()@qr[0], np.eye(40), rtol=1., atol=atol_val)
+    assert np.allclose(inst.solve(M19@np.ones(40)), np.ones(40), rtol=rtol_val, atol=1e-10)
+    
+def test_givens_banded():
+    inst = qrs(M20, 'reduced', method='givens')
+    R = inst.Rmatrix()
+    assert np.allclose(inst.apply_Q(R), M20, rtol=rtol_val, atol=atol_val) and R.shape == (50,50)
+    assert np.all(np.triu(R,8) == 0.) and len(inst.QR()) == 2
+    
+def test_default_matches_legacy():
+    # the factors the Householder transforms gave before the Givens rotations came in, signs included
+    legacy = [(np.array([[1.,2.],[3.,4.]]), 
+               np.array([[0.3162277660168379, 0.9486832980505138], [0.9486832980505138, -0.3162277660168378]]),
+               np.array([[3.162277660168379, 4.427188724235731], [0., 0.6324555320336764]])),
+              (np.array([[2.,-1.,3.],[4.,1.,0.]]),
+               np.array([[0.44721359549995787, 0.894427190999916], [0.894427190999916, -0.4472135954999581]]),
+               np.array([[4.47213595499958, 0.4472135954999581, 1.3416407864998736], [0., -1.341640786499874, 2.683281572999748]])),
+              (np.array([[1.,2.,0.],[3.,4.,5.],[0.,6.,7.]]),
+               np.array([[0.3162277660168379, 0.09944903161976944, 0.9434563530497263],
+                         [0.9486832980505138, -0.0331496772065898, -0.31448545101657527],
+                         [0., 0.9944903161976937, -0.10482848367219177]]),
+               np.array([[3.162277660168379, 4.427188724235731, 4.743416490252569],
+                         [0., 6.033241251599342, 6.795683827350906],
+                         [0., 0., -2.3062266407882186]]))]
+    for M, Q, R in legacy:
+        inst = createInstComplete(M)
+        qr = inst.QR()
+        assert inst.backend() == 'householder' and np.allclose(qr[0], Q, rtol=rtol_val, atol=atol_val) and np.allclose(qr[1], R, rtol=rtol_val, atol=atol_val)
+    
+def test_givens_matches_householder():
+    R1 = qrs(M20, method='givens').Rmatrix()
+    R2 = qrs(M20, method='blocked').Rmatrix()
+    assert np.allclose(np.abs(R1), np.abs(R2), rtol=rtol_val, atol=1e-10)
+    
+    
+    
+M21 = np.triu(np.tril(np.random.rand(30,30),2),-3) + 30*np.eye(30)     # lower bandwidth 3, upper 2
+
+def test_pack_triu():
+    P = Storage.pack_triu(M14)
+    assert np.all(P.toarray() == np.triu(M14)) and P.data.size == 21 and np.all(P.diagonal() == np.diagonal(M14))
+    
+def test_packed_back_substitution():
+    R = np.triu(M13) + 6*np.eye(6)
+    X = Storage.packed_back_substitution(Storage.pack_triu(R), M13)
+    assert np.allclose(R@X, M13, rtol=rtol_val, atol=atol_val)
+    
+def test_packed_storage():
+    inst = qrs(M14, storage='packed')
+    assert inst.Rpacked().data.size == 21
+    qr = inst.QR()
+    assert np.allclose(qr[0]@qr[1], M14, rtol=rtol_val, atol=atol_val) and np.all(qr[1] == createInstComplete(M14).Rmatrix())
+    assert np.allclose(inst.lstsq(M14@np.ones(6)), np.ones(6), rtol=rtol_val, atol=1e-10)
+    
+def test_band_storage():
+    band = Storage.to_band(M21, 3, 2)
+    assert band.shape == (6,30) and np.all(Storage.from_band(band, 3, 2) == M21)
+    inst = qrs(band, band=(3,2), storage='packed')
+    assert np.allclose(inst.solve(M21@np.ones(30)), np.ones(30), rtol=rtol_val, atol=1e-10)
+    
+def test_band_factored_in_band_storage():
+    band = Storage.to_band(M21, 3, 2)
+    R = M21.copy()
+    rotations, err = Givens.factor_banded(R, 3, 2)
+    Rband, rotations_band, err_band = Givens.factor_band_storage(band, 3, 2)
+    assert Rband.shape == (6,30) and np.all(Storage.from_band(Rband, 0, 5) == R) and err_band == err
+    assert np.all(Storage.pack_band(Rband, 5).toarray() == R) and np.all(band == Storage.to_band(M21, 3, 2))
+    inst = qrs(band, band=(3,2))
+    qr = inst.QR()
+    assert np.all(qr[1] == R) and inst.backend() == 'givens' and np.allclose(qr[0]@qr[1], M21, rtol=rtol_val, atol=atol_val)
+    assert np.allclose(inst.lstsq(M21@np.ones(30), refine=1), np.ones(30), rtol=rtol_val, atol=1e-10)
+    inst.insert_rows(30, np.ones(30))
+    assert np.allclose(inst.Qmatrix()@inst.Rmatrix(), np.vstack((M21, np.ones(30))), rtol=rtol_val, atol=atol_val)
+    
+def test_band_invalid(capfd):
+    qrs(Storage.to_band(M21, 3, 2), band=(2,2))
+    out, err = capfd.readouterr()
+    assert out == "The band storage doesn't match the bandwidths.\n\n"
+    
+    
+    
+M22 = np.random.rand(50,8) + np.eye(50,8)
+
+def test_float32():
+    inst = qrs(M22, method='blocked', block_size=3, dtype='float32')
+    qr = inst.QR()
+    assert qr[0].dtype == np.float32 and qr[1].dtype == np.float32
+    assert np.allclose(qr[0]@qr[1], M22, rtol=1e-5, atol=1e-5)
+    assert inst.FloatingPointErrorOrder().endswith('in float32, whose machine epsilon is of the order of 10^-7')
+    
+def test_float32_refine():
+    inst = qrs(M22, 'reduced', dtype='float32')
+    b = M22@np.arange(8.)
+    assert inst.lstsq(b).dtype == np.float32
+    x = inst.lstsq(b, refine=3)
+    assert x.dtype == np.float64 and np.allclose(x, np.arange(8.), rtol=rtol_val, atol=1e-10)
+    
+def test_dtype_unsupported(capfd):
+    qrs(M22, dtype='int32')
+    qrs(M22, dtype='nope')
+    out, err = capfd.readouterr()
+    assert out == 2*'The dtype has to be float32 or float64.\n\n'
+    
+    
+    
+M23 = np.random.rand(40,6)
+
+def test_overwrite_a():
+    A = M23.copy()
+    inst = qrs(A, 'reduced', method='blocked', block_size=4, overwrite_a=True)
+    R = inst.Rmatrix()
+    assert np.all(np.triu(A[:6]) == R) and np.allclose(inst.apply_Q(R), M23, rtol=rtol_val, atol=atol_val)
+    assert np.allclose(inst.lstsq(M23@np.ones(6)), np.ones(6), rtol=rtol_val, atol=1e-10)
+    
+def test_overwrite_a_refine(capfd):
+    inst = qrs(M23.copy(), overwrite_a=True)
+    inst.lstsq(np.ones(40), refine=1)
+    out, err = capfd.readouterr()
+    assert out == 'refine needs the input matrix, which overwrite_a=True has overwritten.\n\n'
+    
+def test_no_copy_without_overwrite():
+    A = M23.copy()
+    inst = qrs(memoryview(A))
+    qr = inst.QR()
+    assert np.all(A == M23) and np.allclose(qr[0]@qr[1], M23, rtol=rtol_val, atol=atol_val)
+    
+def test_factor_in_place():
+    A = M23.copy()
+    tau, err = factor_in_place(A)
+    Q = Reflectors(A, tau, unit=True)
+    assert np.allclose(Q.form(40)@np.triu(A), M23, rtol=rtol_val, atol=atol_val) and err < 1e-12
+    
+def test_find_u_cancellation():
+    M = np.array([[1.],[1e-9]])
+    u = find_u(M, 2)
+    assert u[0] != 0. and abs(apply_Householder(u, find_tau(u), M)[1,0]) < 1e-20
+    
+def test_find_u_int():
+    M = np.array([[1,2],[3,4],[5,6]])
+    assert np.allclose(find_u(M, 3), [1-np.sqrt(35),3,5], rtol=rtol_val, atol=atol_val)
+    assert np.allclose((Householder(M, 3)@M)[1:,0], 0., atol=atol_val)
+    big = np.array([[3e9],[3e9],[3e9]], dtype=np.int64)        # its squares overflow int64
+    assert np.allclose(find_u(big, 3), [3e9*(1-np.sqrt(3)),3e9,3e9], rtol=rtol_val, atol=atol_val)
+    
+    
+    
+def test_order_F():
+    qr = qrs(M23, order='F').QR()
+    assert qr[0].flags.f_contiguous and qr[1].flags.f_contiguous
+    assert np.allclose(qr[0]@qr[1], M23, rtol=rtol_val, atol=atol_val)
+    
+def test_order_unrecognized(capfd):
+    qrs(M23, order='A')
+    out, err = capfd.readouterr()
+    assert out == "The order is unrecognized, please choose 'C' or 'F'.\n\n"
+    
+def test_overwrite_a_C_order():
+    A = M23.copy(order='C')
+    inst = qrs(A, method='blocked', block_size=4, overwrite_a=True)
+    assert np.allclose(inst.apply_Q(inst.Rmatrix()), M23, rtol=rtol_val, atol=atol_val)
+    
+    
+    
+M24 = np.random.rand(30,5)
+
+def test_cache_hit():
+    enable_cache()
+    clear_cache()
+    inst1 = qrs(M24)
+    inst2 = qrs(M24.copy())
+    assert inst1.Rmatrix() is inst2.Rmatrix() and not inst2.Rmatrix().flags.writeable
+    Q = inst1.Qmatrix()
+    assert qrs(M24.copy()).Qmatrix() is Q
+    info = cache_info()
+    disable_cache()
+    assert info.hits == 2 and info.misses == 1 and info.entries == 1
+    
+def test_cache_layout():
+    from qrdecomposition_sourav.Cache import content_key
+    A = np.random.rand(40,30)
+    keys = [content_key(X, 'complete') for X in [A, np.asfortranarray(A), A.T.copy().T, np.hstack((A, A))[:,:30]]]
+    assert all(key == keys[0] for key in keys) and content_key(A.T, 'complete') != keys[0]
+    enable_cache()
+    clear_cache()
+    R = qrs(M24).Rmatrix()
+    assert qrs(np.asfortranarray(M24)).Rmatrix() is R
+    info = cache_info()
+    disable_cache()
+    assert info.hits == 1 and info.entries == 1
+    
+def test_cache_options():
+    enable_cache()
+    clear_cache()
+    qrs(M24).Rmatrix()
+    inst = qrs(M24, 'reduced')
+    R = inst.Rmatrix()
+    info = cache_info()
+    disable_cache()
+    assert info.misses == 2 and R.shape == (5,5)
+    assert np.allclose(inst.Qmatrix()@R, M24, rtol=rtol_val, atol=atol_val)
+    
+def test_cache_eviction():
+    enable_cache()
+    clear_cache()
+    qrs(M24).Rmatrix()
+    size = cache_info().nbytes
+    enable_cache(size)
+    qrs(M24+1.).Rmatrix()
+    qrs(M24).Rmatrix()
+    info = cache_info()
+    disable_cache()
+    assert info.evictions == 2 and info.entries == 1 and info.hits == 0
+    
+def test_cache_update():
+    enable_cache()
+    clear_cache()
+    inst = qrs(M24)
+    inst.Rmatrix()
+    inst.insert_rows(2, np.ones((1,5)))
+    qr = qrs(M24).QR()
+    disable_cache()
+    assert np.allclose(qr[0]@qr[1], M24, rtol=rtol_val, atol=atol_val)
+    assert np.allclose(inst.Qmatrix()@inst.Rmatrix(), np.insert(M24, 2, np.ones(5), axis=0), rtol=rtol_val, atol=atol_val)
+    
+    
+    
+def test_qr_complete():
+    Q, R = qr(M24)
+    qr_inst = createInstComplete(M24).QR()
+    assert np.allclose(Q, qr_inst[0], rtol=rtol_val, atol=atol_val) and np.allclose(R, qr_inst[1], rtol=rtol_val, atol=atol_val)
+    
+def test_qr_reduced():
+    res = qr(M24, 'reduced')
+    assert res.Q.shape == (30,5) and res.R.shape == (5,5) and res.fperror < -10
+    assert np.allclose(res.Q@res.R, M24, rtol=rtol_val, atol=atol_val)
+    
+def test_qr_mode_unrecognized():
+    with pytest.raises(ModeUnrecognized):
+        qr(M24, 'not in list')
+    
+def test_QRResult_immutable():
+    res = qr(M24)
+    with pytest.raises(AttributeError):
+        res.R = None
+    with pytest.raises(AttributeError):
+        res.extra = None
+    assert not hasattr(res, '__dict__') and not hasattr(createInstComplete(M24), '__dict__')
+    
+    
+    
+def test_save_load(tmp_path):
+    inst = createInstBlocked(M24)
+    inst.QR()
+    inst.save(str(tmp_path))
+    loaded = qrs.load(str(tmp_path))
+    qr = loaded.QR()
+    assert isinstance(qr[1], np.memmap) and np.allclose(qr[0]@qr[1], M24, rtol=rtol_val, atol=atol_val)
+    assert loaded.FloatingPointErrorOrder() == inst.FloatingPointErrorOrder()
+    
+def test_save_numpy_options(tmp_path):
+    inst = qrs(M24, method='tiled', block_size=np.int64(8), workers=np.int32(2))
+    inst.save(str(tmp_path))
+    qrs(M24, pivoting=True, tol=np.float32(1e-6)).save(str(tmp_path/'pivoted'))
+    assert np.allclose(qrs.load(str(tmp_path)).Rmatrix(), inst.Rmatrix(), rtol=rtol_val, atol=atol_val)
+    
+def test_save_load_pivoting(tmp_path):
+    M = np.hstack((M24, M24[:,:2]))
+    createInstComplete(M).save(str(tmp_path))
+    loaded = qrs.load(str(tmp_path))
+    b = M24@np.ones(5)
+    assert loaded.rank() is None and np.allclose(loaded.apply_Qt(b), qrs(M).apply_Qt(b), rtol=rtol_val, atol=atol_val)
+    qrs(M, pivoting=True).save(str(tmp_path))
+    loaded = qrs.load(str(tmp_path), mmap_mode=None)
+    assert loaded.rank() == 5 and np.allclose(M@loaded.lstsq(b), b, rtol=rtol_val, atol=atol_val)
+    
+def test_load_refine(tmp_path, capfd):
+    createInstComplete(M24).save(str(tmp_path))
+    qrs.load(str(tmp_path)).lstsq(np.ones(30), refine=1)
+    out, err = capfd.readouterr()
+    assert out == "refine needs the input matrix, which a loaded decomposition doesn't have.\n\n"
+    
+def test_load_format_version(tmp_path, capfd):
+    createInstComplete(M24).save(str(tmp_path))
+    meta = (tmp_path / 'meta.json').read_text().replace('"format_version": 1', '"format_version": 0')
+    (tmp_path / 'meta.json').write_text(meta)
+    assert qrs.load(str(tmp_path)) is None
+    out, err = capfd.readouterr()
+    assert out == 'The saved decomposition is of an unsupported format version.\n\n'
+    
+    
+    
+M25 = [np.random.rand(12,5), np.random.rand(5,9), np.random.rand(20,20), M24]
+
+def test_factor_many_ordered():
+    results = list(factor_many(M25, workers=2, chunksize=1))
+    assert [i for i, res in results] == [0,1,2,3]
+    for i, (Q, R) in results:
+        assert np.allclose(Q@R, M25[i], rtol=rtol_val, atol=atol_val) and np.allclose(R, qr(M25[i]).R, rtol=rtol_val, atol=atol_val)
+    
+def test_factor_many_unordered_reduced():
+    results = dict(factor_many(M25, workers=2, mode='reduced', ordered=False))
+    assert sorted(results) == [0,1,2,3] and results[3].Q.shape == (30,5)
+    for i, res in results.items():
+        assert np.allclose(res.Q@res.R, M25[i], rtol=rtol_val, atol=atol_val)
+    
+def test_factor_many_outlives_blocks():
+    matrices = [np.random.randint(10, size=(6,4)), np.float32(M25[0])]
+    views = [res.Q[:,:2].T for i, res in factor_many(matrices, workers=2)]
+    gc.collect()
+    # the blocks are only unmapped once the views are gone
+    assert np.allclose(views[0], qr(matrices[0]).Q[:,:2].T, rtol=rtol_val, atol=atol_val) and views[1].shape == (2,M25[0].shape[0])
+    
+def test_factor_many_serial():
+    results = list(factor_many(M25, workers=1))
+    assert all(np.allclose(res.Q@res.R, M25[i], rtol=rtol_val, atol=atol_val) for i, res in results)
+    
+def test_factor_many_dimension(capfd):
+    assert factor_many([M24, np.ones((2,2,2))]) is None
+    out, err = capfd.readouterr()
+    assert out == 'Sorry, we can only work with two dimensional matrices!\n\n'
+    
+    
+    
+def test_qr_async_coalesce():
+    async def run():
+        return await asyncio.gather(qr_async(M24), qr_async(M24.copy()), qr_async(M24, 'reduced'))
+    res1, res2, res3 = asyncio.run(run())
+    assert res1 is res2 and res1 is not res3 and not res1.R.flags.writeable and res3.R.flags.writeable
+    assert np.allclose(res1.Q@res1.R, M24, rtol=rtol_val, atol=atol_val) and res3.R.shape == (5,5)
+    
+def test_qr_async_timeout():
+    executor = ThreadPoolExecutor(1)
+    busy = threading.Event()
+    executor.submit(busy.wait)
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await qr_async(M24, executor=executor, timeout=0.01)
+        await asyncio.sleep(0)
+        return dict(Async.inflight[asyncio.get_running_loop()])
+    pending = asyncio.run(run())
+    busy.set()
+    executor.shutdown()
+    assert pending == {}
+    
+def test_qr_async_cancel_one():
+    async def run():
+        first = asyncio.ensure_future(qr_async(M24))
+        second = asyncio.ensure_future(qr_async(M24))
+        await asyncio.sleep(0)
+        first.cancel()
+        return first, await second
+    first, res = asyncio.run(run())
+    assert first.cancelled() and np.allclose(res.Q@res.R, M24, rtol=rtol_val, atol=atol_val)
+    
+    
+    
+M26 = np.random.rand(45,31)
+
+def test_tiled():
+    for M in [M26, M26.T, M24]:
+        qr = qrs(M, method='tiled', block_size=8, workers=3).QR()
+        assert np.allclose(qr[0]@qr[1], M, rtol=rtol_val, atol=atol_val) and np.allclose(qr[1], np.triu(qr[1]))
+        assert np.allclose(qr[0].T@qr[0], np.eye(M.shape[0]), rtol=rtol_val, atol=atol_val)
+    
+def test_tiled_reduced_lstsq():
+    inst = qrs(M26, 'reduced', method='tiled', block_size=10)
+    b = np.ones(45)
+    assert inst.Qmatrix().shape == (45,31) and np.allclose(inst.lstsq(b), np.linalg.lstsq(M26, b, rcond=None)[0], rtol=rtol_val, atol=atol_val)
+    
+def test_tiled_matches_householder():
+    R1 = qrs(M26, method='tiled', block_size=7).Rmatrix()
+    R2 = createInstComplete(M26).Rmatrix()
+    assert np.allclose(np.abs(R1), np.abs(R2), rtol=rtol_val, atol=atol_val)
+    
+def test_scheduler_order():
+    out = []
+    graph = Tiled.Scheduler()
+    graph.insert(lambda: out.append(1), writes=['x'])
+    graph.insert(lambda: out.append(2), reads=['x'], writes=['y'])
+    graph.insert(lambda: out.append(3), reads=['x'])
+    graph.insert(lambda: out.append(4), writes=['x'])
+    graph.run(workers=3)
+    assert out.index(1) < out.index(2) < out.index(4) and out.index(3) < out.index(4)
+    assert graph.ndependencies == [0, 1, 1, 3]
+    
+def test_tiled_save_load(tmp_path):
+    inst = qrs(M26, method='tiled', block_size=8)
+    inst.save(str(tmp_path))
+    loaded = qrs.load(str(tmp_path))
+    assert np.allclose(loaded.apply_Q(loaded.Rmatrix()), M26, rtol=rtol_val, atol=atol_val)
+    
+    
+    
+M27 = np.random.rand(500,12)
+M28 = np.random.rand(60,6)
+M28[:,5] = M28[:,0] + 1e-10*M28[:,5]                   # too ill-conditioned for CholeskyQR2
+
+def test_cholqr2():
+    Q, R, err = CholQR.cholqr2(M27)
+    assert np.allclose(Q@R, M27, rtol=rtol_val, atol=atol_val) and np.allclose(Q.T@Q, np.eye(12), rtol=rtol_val, atol=atol_val)
+    assert np.array_equal(R, np.triu(R)) and err < 1e-12
+    assert CholQR.cholqr2(M28) is None and CholQR.cholqr2(M27.T) is None
+    
+def test_solve_right():
+    A = np.random.rand(100,40)
+    R = np.triu(np.random.rand(40,40)) + 40*np.eye(40)
+    X = CholQR.solve_right(A, R, block_size=7, chunk_rows=30)
+    assert X.shape == (100,40) and np.allclose(X@R, A, rtol=rtol_val, atol=atol_val)
+    assert np.allclose(X, CholQR.solve_right(A, R), rtol=rtol_val, atol=atol_val)
+    
+def test_cholqr2_reduced():
+    inst = qrs(M27, 'reduced', method='cholqr2')
+    Q, R = inst.QR()
+    b = np.arange(500.)
+    assert Q.shape == (500,12) and np.allclose(Q@R, M27, rtol=rtol_val, atol=atol_val)
+    assert np.allclose(inst.lstsq(b), np.linalg.lstsq(M27, b, rcond=None)[0], rtol=rtol_val, atol=atol_val)
+    assert np.allclose(inst.apply_Q(inst.apply_Qt(M27)), M27, rtol=rtol_val, atol=atol_val)
+    
+def test_cholqr2_complete():
+    inst = qrs(M27, method='cholqr2')
+    Q, R = inst.QR()
+    X = np.random.rand(500,3)
+    assert Q.shape == (500,500) and np.allclose(Q.T@Q, np.eye(500), rtol=rtol_val, atol=atol_val)
+    assert np.allclose(Q@R, M27, rtol=rtol_val, atol=atol_val)
+    assert np.allclose(inst.apply_Qt(X), Q.T@X, rtol=rtol_val, atol=atol_val) and np.allclose(inst.apply_Q(X), Q@X, rtol=rtol_val, atol=atol_val)
+    
+def test_cholqr2_fallback():
+    Q, R = qrs(M28, method='cholqr2').QR()
+    Q2, R2 = createInstComplete(M28).QR()
+    assert np.allclose(Q@R, M28, rtol=rtol_val, atol=atol_val) and np.allclose(Q, Q2) and np.allclose(R, R2)
+    
+def test_cholqr2_save_load(tmp_path):
+    inst = qrs(M27, method='cholqr2')
+    inst.save(str(tmp_path))
+    loaded = qrs.load(str(tmp_path))
+    assert np.allclose(loaded.apply_Q(loaded.Rmatrix()), M27, rtol=rtol_val, atol=atol_val)
+    
+    
+    
+M29 = np.triu(np.random.rand(300,300),-1)            # upper Hessenberg, past the default rule for LAPACK
+
+def test_lapack():
+    for M in [M24, M24.T, M26]:
+        inst = qrs(M, method='lapack')
+        Q, R = inst.QR()
+        R2 = createInstComplete(M).Rmatrix()
+        assert np.allclose(Q@R, M, rtol=rtol_val, atol=atol_val) and np.allclose(Q.T@Q, np.eye(M.shape[0]), rtol=rtol_val, atol=atol_val)
+        assert np.allclose(np.abs(R), np.abs(R2), rtol=rtol_val, atol=atol_val) and inst.backend() == 'lapack'
+    b = np.ones(45)
+    assert np.allclose(qrs(M26, 'reduced', method='lapack').lstsq(b), np.linalg.lstsq(M26, b, rcond=None)[0], rtol=rtol_val, atol=atol_val)
+    
+def test_auto_backend():
+    assert qrs(M26, method='auto').backend() == 'lapack'
+    assert qrs(M29, method='auto').backend() == 'givens'
+    assert qrs(M23, method='auto', pivoting=True).backend() == 'householder'
+    assert qrs(M28, method='cholqr2').backend() == 'householder' and qrs(M27, method='cholqr2').backend() == 'cholqr2'
+    assert qrs(M26).backend() == 'householder' and qrs(M20).backend() == 'householder' and qrs(M19, method='givens').backend() == 'givens'
+    
+def test_backend_rules():
+    saved = {dtype: {structure: [list(rule) for rule in table] for structure, table in tables.items()} for dtype, tables in Dispatch.rules.items()}
+    try:
+        set_backend_rules({'float64': {'dense': [[100, 'householder'], [None, 'blocked']], 'banded': [[None, 'lapack']]},
+                           'float32': {'dense': [[None, 'lapack']], 'banded': [[None, 'lapack']]}})
+        assert qrs(np.random.rand(10,10), method='auto').backend() == 'householder'
+        assert qrs(M26, method='auto').backend() == 'blocked'
+        assert qrs(M26, method='auto', dtype='float32').backend() == 'lapack'
+        rules = calibrate_backends(sizes=(4,8), repeats=1, dtypes=('float32',))
+        assert rules['float64']['dense'] == [[100, 'householder'], [None, 'blocked']]
+        assert rules['float32']['dense'][-1][0] is None and rules == Dispatch.rules
+    finally:
+        set_backend_rules(saved)
+        
+def test_auto_cache_save_load(tmp_path):
+    enable_cache()
+    try:
+        qrs(M26, method='auto').QR()
+        inst = qrs(M26.copy(), method='auto')
+        assert inst.backend() == 'lapack'
+    finally:
+        disable_cache()
+    inst.save(str(tmp_path))
+    loaded = qrs.load(str(tmp_path))
+    assert loaded.backend() == 'lapack' and np.allclose(loaded.apply_Q(loaded.Rmatrix()), M26, rtol=rtol_val, atol=atol_val)
+    
+    
+    
+M30 = np.random.rand(400,6) @ np.random.rand(6,90)          # rank 6
+U30, V30 = np.linalg.qr(np.random.randn(300,60))[0], np.linalg.qr(np.random.randn(80,60))[0]
+M31 = (U30/np.arange(1,61)) @ V30.T                         # slowly decaying singular values 1/i
+
+def test_randomized_qr_low_rank():
+    for sketch in ['gaussian', 'srft']:
+        Qk, Rk = randomized_qr(M30, 6, chunk_rows=70, sketch=sketch, seed=1)
+        assert Qk.shape == (400,6) and Rk.shape == (6,90) and np.allclose(Rk, np.triu(Rk))
+        assert np.allclose(Qk.T@Qk, np.eye(6), rtol=rtol_val, atol=atol_val) and np.allclose(Qk@Rk, M30, rtol=rtol_val, atol=atol_val)
+    
+def test_randomized_qr_memmap(tmp_path):
+    np.save(str(tmp_path/'A.npy'), M30)
+    res = randomized_qr(str(tmp_path/'A.npy'), 6, chunk_rows=64, seed=2)
+    assert np.allclose(res.Q@res.R, M30, rtol=rtol_val, atol=atol_val) and np.allclose(res.Q, randomized_qr(M30, 6, seed=2).Q)
+    
+def test_randomized_qr_power_iters():
+    errors = [np.linalg.norm(M31 - np.dot(*randomized_qr(M31, 5, oversample=5, power_iters=q, seed=3)), 2) for q in [0, 3]]
+    assert errors[1] < errors[0] and errors[1] < 1.01/6          # the best rank 5 error is 1/6
+    
+def test_randomized_qr_invalid(capfd):
+    assert randomized_qr(M30, 91) is None and randomized_qr(M30, 3, power_iters=-1) is None and randomized_qr(M2, 1) is None
+    out, err = capfd.readouterr()
+    assert out == ('The rank k has to be a positive integer no larger than min(r,c).\n\n'
+                   'The oversampling and power iterations have to be non-negative integers, the sketch gaussian or srft and chunk_rows positive.\n\n'
+                   'Sorry, we can only work with a two dimensional matrix!\n\n')
+    
+    
+    
+M32 = np.triu(np.random.rand(20,8,6)) + np.eye(8,6) + 1e-9*np.random.rand(20,8,6)      # nearly upper triangular, well conditioned
+
+def test_batched_QR_nearly_triangular():
+    Q, R, fperror = batched_QR(M32)
+    assert np.amax(np.abs(Q@R - M32)) < 1e-13 and np.allclose(Q[0][:,:6], createInstReduced(M32[0]).Qmatrix(), rtol=rtol_val, atol=atol_val)
+    Qred, Rred, fperror = batched_QR(M32, 'reduced')
+    assert Qred.shape == (20,8,6) and np.allclose(Qred, Q[:,:,:6], rtol=rtol_val, atol=atol_val) and np.allclose(Rred, R[:,:6], rtol=rtol_val, atol=atol_val)
+    
+def test_update_permutation_backend():
+    inst = createInstComplete(M24)
+    inst.QR()
+    inst.insert_cols(2, np.ones((30,2)))
+    assert np.array_equal(inst.permutation(), np.arange(7)) and inst.backend() == 'updated'
+    inst.delete_cols(0, 3)
+    assert np.array_equal(inst.permutation(), np.arange(4))
+    assert np.allclose(inst.Qmatrix()@inst.Rmatrix(), np.insert(M24, [2,2], 1., axis=1)[:,3:], rtol=rtol_val, atol=atol_val)